@@ -1,9 +1,11 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, BackgroundTasks, Form
-from fastapi.responses import FileResponse
-from typing import Optional
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, BackgroundTasks, Form, Query, Header, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
+from typing import Dict, List, Optional, Union
+from urllib.parse import quote
 import os
-import json
 import uuid
+import shutil
 import logging
 from datetime import datetime
 
@@ -11,34 +13,65 @@ from ...core.config import settings
 from ...core.redis_client import get_redis_client
 from ...core.dependencies import get_current_user
 from ...services.file_processor import FileProcessor
-from ...utils.file_utils import is_supported_file_type, get_file_size_mb, validate_file_size
-from ...models.task import TaskStatus, ProcessingTask
+from ...services.task_runner import run_split_task, task_work_dir, complete_from_cache
+from ...services.zip_stream import stream_zip_archive
+from ...services.job_queue import JobQueue
+from ...services.storage_manager import get_storage_manager
+from ...services.upload_sessions import get_upload_session_manager, UploadSessionError
+from ...services.progress import current_event, stream_task_events
+from ...services.task_store import get_task_store
+from ...utils.file_utils import (
+    is_supported_file_type, get_file_size_mb, validate_file_size,
+    sanitize_filename, save_upload_file, FileTooLargeError
+)
+from ...utils.dialect_utils import normalize_dialect_override
+from ...utils.compression_utils import compression_of, inner_filename
+from ...utils.cardinality_utils import estimate_output_files
+from ...models.task import TaskStatus, ProcessingTask, SplitResponse
 from ...models.user import User
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
-@router.post("/upload")
+@router.post("/upload", response_model=SplitResponse, response_model_exclude_none=True)
 async def upload_file(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    column_name: str = Form(...),
+    column_name: List[str] = Form(None),
+    nested: bool = Form(False),
     batch_size: Optional[int] = Form(None),
+    delimiter: Optional[str] = Form(None),
+    quotechar: Optional[str] = Form(None),
+    has_header: Optional[bool] = Form(None),
     user: User = Depends(get_current_user),
     redis_client = Depends(get_redis_client)
 ):
     """
     上傳檔案並開始處理任務
     
+    未指定 column_name 時只上傳檔案（狀態為 uploaded），可先以 /preview 取得欄位，
+    再以 /split 開始切分。重複指定 column_name 時只讀取一次檔案，依每個欄位分別切分，
+    結果放在 ZIP 內以欄位命名的資料夾；nested=true 時改為依各欄位的組合值多層切分
+    （例如 地區/門市，輸出為巢狀資料夾）。
+    
+    相同內容的檔案以相同設定切分過時，直接使用結果快取完成任務（狀態為 completed），
+    不重新處理，也不計入每日使用量。
+    
     支援格式：CSV, Excel (.xlsx, .xls), TXT
+    壓縮的 CSV/TXT（.csv.gz、.txt.bz2、.csv.zst、只含一個檔案的 .zip）邊讀取邊解壓縮，
+    檔案大小限制以壓縮後的大小計算
     免費用戶：5 檔案/日，10MB 限制，支援所有格式
     付費用戶：50 檔案/日，100MB 限制，支援所有格式
     
     Args:
         file: 上傳的檔案
-        column_name: 要進行分割的欄位名稱
-        batch_size: 每個批次的最大行數（可選，未實現）
+        column_name: 要進行分割的欄位名稱，可重複指定多個（可選）
+        nested: 多個欄位依序組成組合鍵多層切分，而非各自獨立切分
+        batch_size: 每個批次的最大行數（可選）
+        delimiter: CSV/TXT 分隔符（可選，預設自動偵測；可用 tab、comma 等名稱）
+        quotechar: CSV/TXT 引號字元（可選，預設自動偵測）
+        has_header: 第一列是否為標題列（可選，預設自動偵測）
         user: 當前認證用戶
     
     Returns:
@@ -49,133 +82,349 @@ async def upload_file(
         if not is_supported_file_type(file.filename):
             raise HTTPException(
                 status_code=400,
-                detail="不支援的檔案類型。支援格式: CSV, Excel (.xlsx, .xls), TXT"
+                detail="不支援的檔案類型。支援格式: CSV, Excel (.xlsx, .xls), TXT，以及壓縮的 CSV/TXT (.gz, .bz2, .zst, 單一檔案的 .zip)"
             )
         
-        # 檢查檔案大小
-        file_content = await file.read()
-        file_size_mb = len(file_content) / (1024 * 1024)
+        # 檢查使用者指定的檔案格式
+        try:
+            dialect = normalize_dialect_override(delimiter, quotechar, has_header)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        column_name = _normalize_split_columns(column_name, nested)
+        
+        # 生成任務 ID
+        task_id = str(uuid.uuid4())
         
-        # 根據用戶類型檢查檔案大小限制
+        # 預留最大檔案大小的空間，不足時淘汰最久未使用的任務
         max_size = settings.PREMIUM_FILE_SIZE_LIMIT if user.is_premium else settings.FREE_FILE_SIZE_LIMIT
-        if file_size_mb > max_size:
+        storage_manager = get_storage_manager()
+        if not await storage_manager.ensure_capacity(max_size * 1024 * 1024):
+            raise HTTPException(status_code=507, detail="伺服器儲存空間不足，請稍後再試")
+        await storage_manager.touch(task_id)
+        
+        # 串流寫入上傳目錄，邊寫入邊檢查用戶類型的檔案大小限制並計算內容雜湊
+        task_upload_dir = os.path.join(settings.UPLOAD_DIR, task_id)
+        file_path = os.path.join(task_upload_dir, sanitize_filename(file.filename))
+        try:
+            size_bytes, content_hash = await save_upload_file(
+                file, file_path, max_size * 1024 * 1024, settings.UPLOAD_CHUNK_SIZE
+            )
+        except FileTooLargeError:
+            shutil.rmtree(task_upload_dir, ignore_errors=True)
             raise HTTPException(
                 status_code=413,
                 detail=f"檔案過大。{'付費版' if user.is_premium else '免費版'}最大支援 {max_size}MB"
             )
         
-        # 檢查每日處理限制
-        today = datetime.now().strftime("%Y-%m-%d")
-        usage_key = f"daily_usage:{user.user_id}:{today}"
-        current_usage = await redis_client.get(usage_key) or 0
-        current_usage = int(current_usage)
+        return await _register_upload(
+            background_tasks, redis_client, user, task_id, file.filename, file_path,
+            size_bytes, content_hash, column_name, batch_size, dialect
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"檔案上傳失敗: {str(e)}")
+
+
+@router.post("/uploads")
+async def create_upload_session(
+    filename: str = Form(...),
+    size: int = Form(..., gt=0),
+    user: User = Depends(get_current_user),
+    redis_client = Depends(get_redis_client)
+):
+    """
+    建立可續傳的分塊上傳工作階段
+    
+    流程：建立工作階段 → 以 PUT /uploads/{upload_id}/chunks/{index} 並行上傳各區塊
+    → 中斷後以 GET /uploads/{upload_id} 查詢缺少的區塊並補傳 → POST /uploads/{upload_id}/commit
+    提交並開始處理（參數與 /upload 相同）。
+    
+    Args:
+        filename: 原始檔案名稱
+        size: 檔案大小（位元組）
+        user: 當前認證用戶
+    
+    Returns:
+        upload_id（提交後即為任務 ID）、區塊大小與區塊數
+    """
+    try:
+        if not is_supported_file_type(filename):
+            raise HTTPException(
+                status_code=400,
+                detail="不支援的檔案類型。支援格式: CSV, Excel (.xlsx, .xls), TXT，以及壓縮的 CSV/TXT (.gz, .bz2, .zst, 單一檔案的 .zip)"
+            )
         
-        daily_limit = settings.PREMIUM_DAILY_LIMIT if user.is_premium else settings.FREE_DAILY_LIMIT
-        if current_usage >= daily_limit:
+        max_size = settings.PREMIUM_FILE_SIZE_LIMIT if user.is_premium else settings.FREE_FILE_SIZE_LIMIT
+        if size > max_size * 1024 * 1024:
             raise HTTPException(
-                status_code=429,
-                detail=f"已達每日處理限制。{'付費版' if user.is_premium else '免費版'}每日可處理 {daily_limit} 個檔案"
+                status_code=413,
+                detail=f"檔案過大。{'付費版' if user.is_premium else '免費版'}最大支援 {max_size}MB"
             )
         
-        # 重置檔案指針
-        await file.seek(0)
+        # 預留檔案大小的空間，不足時淘汰最久未使用的任務
+        upload_id = str(uuid.uuid4())
+        storage_manager = get_storage_manager()
+        if not await storage_manager.ensure_capacity(size):
+            raise HTTPException(status_code=507, detail="伺服器儲存空間不足，請稍後再試")
+        await storage_manager.touch(upload_id)
         
-        # 生成任務 ID
-        task_id = str(uuid.uuid4())
+        session = await get_upload_session_manager().create(upload_id, user.user_id, filename, size)
+        return {
+            "upload_id": upload_id,
+            "chunk_size": session["chunk_size"],
+            "total_chunks": session["total_chunks"],
+            "expires_in": settings.UPLOAD_SESSION_TTL
+        }
         
-        # 創建處理任務
-        task = ProcessingTask(
-            task_id=task_id,
-            user_id=user.user_id,
-            filename=file.filename,
-            file_size_mb=round(file_size_mb, 2),
-            column_name=column_name,
-            status=TaskStatus.PENDING,
-            created_at=datetime.now()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"建立上傳工作階段失敗: {str(e)}")
+
+
+@router.get("/uploads/{upload_id}")
+async def get_upload_session(
+    upload_id: str,
+    user: User = Depends(get_current_user)
+):
+    """
+    查詢上傳進度：已收到與缺少的區塊、從檔案開頭連續收到的位元組數（offset）
+    """
+    session = await _get_owned_session(upload_id, user)
+    return await get_upload_session_manager().status(session)
+
+
+@router.put("/uploads/{upload_id}/chunks/{index}")
+async def upload_chunk(
+    upload_id: str,
+    index: int,
+    request: Request,
+    x_chunk_sha256: Optional[str] = Header(None),
+    user: User = Depends(get_current_user)
+):
+    """
+    上傳一個區塊（請求內容為區塊的原始位元組，邊接收邊寫入檔案的對應位置）
+    
+    Args:
+        upload_id: 上傳工作階段 ID
+        index: 區塊編號（從 0 開始），各區塊可以並行上傳，重複上傳會覆寫
+        x_chunk_sha256: 區塊的 SHA-256（X-Chunk-SHA256 標頭，十六進位），不符時回傳 400
+        user: 當前認證用戶
+    """
+    session = await _get_owned_session(upload_id, user)
+    try:
+        received = await get_upload_session_manager().write_chunk(
+            session, index, request.stream(), x_chunk_sha256
         )
+    except UploadSessionError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    
+    return {
+        "upload_id": upload_id,
+        "index": index,
+        "received_chunks": received,
+        "total_chunks": session["total_chunks"]
+    }
+
+
+@router.post("/uploads/{upload_id}/commit", response_model=SplitResponse, response_model_exclude_none=True)
+async def commit_upload_session(
+    upload_id: str,
+    background_tasks: BackgroundTasks,
+    column_name: List[str] = Form(None),
+    nested: bool = Form(False),
+    batch_size: Optional[int] = Form(None),
+    delimiter: Optional[str] = Form(None),
+    quotechar: Optional[str] = Form(None),
+    has_header: Optional[bool] = Form(None),
+    sha256: Optional[str] = Form(None),
+    user: User = Depends(get_current_user),
+    redis_client = Depends(get_redis_client)
+):
+    """
+    提交分塊上傳：確認所有區塊都已收到後，檔案直接交給切分流程
+    
+    參數與 /upload 相同；另可提供整個檔案的 sha256 驗證組合後的內容。
+    
+    Returns:
+        與 /upload 相同的任務 ID 與狀態
+    """
+    try:
+        session = await _get_owned_session(upload_id, user)
+        
+        try:
+            dialect = normalize_dialect_override(delimiter, quotechar, has_header)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        column_name = _normalize_split_columns(column_name, nested)
         
-        # 儲存任務到 Redis
-        await redis_client.setex(
-            f"task:{task_id}",
-            3600,  # 1小時過期
-            json.dumps(task.dict(), default=str)
+        try:
+            file_path, size_bytes, content_hash = await get_upload_session_manager().commit(session, sha256)
+        except UploadSessionError as e:
+            raise HTTPException(status_code=e.status_code, detail=str(e))
+        
+        return await _register_upload(
+            background_tasks, redis_client, user, upload_id, session["filename"], file_path,
+            size_bytes, content_hash, column_name, batch_size, dialect
         )
         
-        # 更新每日使用量
-        await redis_client.incr(usage_key)
-        await redis_client.expire(usage_key, 86400)  # 24小時過期
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"提交上傳失敗: {str(e)}")
+
+
+@router.delete("/uploads/{upload_id}")
+async def abort_upload_session(
+    upload_id: str,
+    user: User = Depends(get_current_user)
+):
+    """取消分塊上傳並刪除已收到的資料"""
+    session = await _get_owned_session(upload_id, user)
+    await get_upload_session_manager().abort(session)
+    await get_storage_manager().release(upload_id)
+    return {"upload_id": upload_id, "message": "已取消上傳"}
+
+
+@router.get("/preview/{task_id}")
+async def preview_file(
+    task_id: str,
+    rows: int = Query(settings.PREVIEW_ROWS, ge=1, le=settings.PREVIEW_MAX_ROWS),
+    delimiter: Optional[str] = None,
+    quotechar: Optional[str] = None,
+    has_header: Optional[bool] = None,
+    user: User = Depends(get_current_user)
+):
+    """
+    預覽已上傳的檔案
+    
+    只解析標題列與前 N 行，回傳欄位名稱、推斷型別與範例資料，
+    讀取時間與檔案大小無關。
+    
+    Args:
+        task_id: 任務 ID
+        rows: 範例資料行數
+        delimiter: CSV/TXT 分隔符（可選，預設使用上傳時的設定或自動偵測）
+        quotechar: CSV/TXT 引號字元（可選）
+        has_header: 第一列是否為標題列（可選）
+        user: 當前用戶
+    
+    Returns:
+        欄位列表、範例資料與偵測到的編碼
+    """
+    try:
+        task_dict = await _get_owned_task(task_id, user)
+        dialect = _resolve_dialect(task_dict, delimiter, quotechar, has_header)
         
-        # 啟動背景處理
-        background_tasks.add_task(process_file_background, task_id, file, column_name, batch_size)
+        file_path = task_dict.get("file_path")
+        if not file_path or not os.path.exists(file_path):
+            raise HTTPException(status_code=404, detail="上傳檔案不存在或已過期")
+        
+        try:
+            preview = await _preview_upload(file_path, task_dict.get("filename"), dialect, rows)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"無法讀取檔案: {str(e)}")
+        
+        # 附上上傳時估計的不重複值數量
+        column_profile = task_dict.get("column_profile") or {}
+        profiled_columns = column_profile.get("columns", {})
+        for column in preview["columns"]:
+            stats = profiled_columns.get(column["name"])
+            if stats:
+                column["distinct_estimate"] = stats["distinct_estimate"]
+                column["null_count"] = stats["null_count"]
         
         return {
             "task_id": task_id,
-            "status": TaskStatus.PENDING,
-            "message": "檔案上傳成功，開始處理中..."
+            "filename": task_dict.get("filename"),
+            **preview,
+            "total_rows": column_profile.get("total_rows"),
+            "output_files_warning": settings.OUTPUT_FILES_WARNING,
+            "max_output_files": settings.MAX_OUTPUT_FILES
         }
         
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"檔案上傳失敗: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"預覽檔案失敗: {str(e)}")
 
 
-@router.post("/split/{task_id}")
+@router.post("/split/{task_id}", response_model=SplitResponse, response_model_exclude_none=True)
 async def start_split_task(
     task_id: str,
-    column_name: str,
+    background_tasks: BackgroundTasks,
+    column_name: List[str] = Query(None),
+    nested: bool = False,
     batch_size: Optional[int] = None,
+    delimiter: Optional[str] = None,
+    quotechar: Optional[str] = None,
+    has_header: Optional[bool] = None,
     user: User = Depends(get_current_user),
     redis_client = Depends(get_redis_client)
 ):
     """
-    手動啟動檔案切分任務
+    啟動已上傳檔案的切分任務
     
     Args:
         task_id: 任務 ID
-        column_name: 要切分的欄位名稱
+        column_name: 要切分的欄位名稱，可重複指定多個（只讀取一次檔案，各欄位結果放在各自的資料夾）
+        nested: 多個欄位依序組成組合鍵多層切分（巢狀資料夾）
         batch_size: 每個批次的最大行數（可選）
+        delimiter: CSV/TXT 分隔符（可選，預設使用上傳時的設定或自動偵測）
+        quotechar: CSV/TXT 引號字元（可選）
+        has_header: 第一列是否為標題列（可選）
         user: 當前用戶
     
     Returns:
         處理狀態
     """
     try:
-        # 獲取任務資訊
-        task_data = await redis_client.get(f"task:{task_id}")
-        if not task_data:
-            raise HTTPException(status_code=404, detail="任務不存在或已過期")
-        
-        task_dict = json.loads(task_data)
-        
-        # 檢查任務擁有者
-        if task_dict.get("user_id") != user.user_id:
-            raise HTTPException(status_code=403, detail="無權訪問此任務")
+        task_dict = await _get_owned_task(task_id, user)
         
         # 檢查任務狀態
         if task_dict.get("status") != TaskStatus.UPLOADED:
             raise HTTPException(status_code=400, detail="任務狀態不正確，無法開始切分")
         
-        # 更新任務狀態
-        task_dict["status"] = TaskStatus.PROCESSING
-        task_dict["column_name"] = column_name
-        task_dict["batch_size"] = batch_size
-        task_dict["updated_at"] = datetime.now().isoformat()
+        dialect = _resolve_dialect(task_dict, delimiter, quotechar, has_header)
+        column_name = _normalize_split_columns(column_name, nested)
+        if not column_name:
+            raise HTTPException(status_code=400, detail="請指定切分欄位")
+        
+        file_path = task_dict.get("file_path")
+        if not file_path or not os.path.exists(file_path):
+            raise HTTPException(status_code=404, detail="上傳檔案不存在或已過期")
         
-        await redis_client.setex(
-            f"task:{task_id}",
-            3600,
-            json.dumps(task_dict, default=str)
+        # 只解析檔案開頭確認欄位存在
+        try:
+            preview = await _preview_upload(file_path, task_dict.get("filename"), dialect, rows=1)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"無法讀取檔案: {str(e)}")
+        _ensure_column_exists(preview, column_name)
+        estimated_files = _check_output_files(task_dict.get("column_profile"), column_name, batch_size)
+        
+        # 更新任務狀態（同一任務同時送出多個切分請求時只有一個成功）
+        task_dict = await get_task_store().transition(
+            task_id,
+            [TaskStatus.UPLOADED],
+            status=TaskStatus.PENDING,
+            column_name=column_name,
+            batch_size=batch_size,
+            dialect=dialect
         )
+        if task_dict is None:
+            raise HTTPException(status_code=409, detail="任務已開始切分或已過期")
         
-        # 啟動背景處理（這裡應該有實際的檔案處理邏輯）
-        # background_tasks.add_task(process_split_background, task_id)
+        # 相同檔案與設定已有結果時直接完成任務
+        await get_storage_manager().touch(task_id)
+        if await complete_from_cache(task_id, task_dict):
+            return _cached_response(task_id)
         
-        return {
-            "task_id": task_id,
-            "status": TaskStatus.PROCESSING,
-            "message": "切分任務已啟動"
-        }
+        # 啟動背景處理
+        await _dispatch_split_task(background_tasks, redis_client, task_dict)
+        
+        return _split_response(task_id, "切分任務已啟動", estimated_files)
         
     except HTTPException:
         raise
@@ -186,8 +435,7 @@ async def start_split_task(
 @router.get("/status/{task_id}")
 async def get_task_status(
     task_id: str,
-    user: User = Depends(get_current_user),
-    redis_client = Depends(get_redis_client)
+    user: User = Depends(get_current_user)
 ):
     """
     查詢任務處理狀態
@@ -200,24 +448,16 @@ async def get_task_status(
         任務狀態和處理進度
     """
     try:
-        # 獲取任務資訊
-        task_data = await redis_client.get(f"task:{task_id}")
-        if not task_data:
-            raise HTTPException(status_code=404, detail="任務不存在或已過期")
-        
-        task_dict = json.loads(task_data)
-        
-        # 檢查任務擁有者
-        if task_dict.get("user_id") != user.user_id:
-            raise HTTPException(status_code=403, detail="無權訪問此任務")
-        
-        # 獲取處理結果（如果有）
-        result_data = await redis_client.get(f"result:{task_id}")
-        result = json.loads(result_data) if result_data else None
+        # 以一次往返獲取任務資訊與處理結果（如果有）
+        task_dict, result = await get_task_store().get_with_result(task_id)
+        _ensure_owner(task_dict, user)
+        progress = await current_event(task_id, task_dict)
         
         response = {
             "task_id": task_id,
             "status": task_dict.get("status"),
+            "progress": progress.get("progress", 0),
+            "stage": progress.get("stage"),
             "filename": task_dict.get("filename"),
             "file_size_mb": task_dict.get("file_size_mb"),
             "column_name": task_dict.get("column_name"),
@@ -232,6 +472,12 @@ async def get_task_status(
                 "total_rows": result.get("total_rows"),
                 "split_groups": result.get("split_groups"),
                 "output_files": result.get("output_files"),
+                "split_columns": result.get("split_columns"),
+                "encoding": result.get("encoding"),
+                "encoding_confidence": result.get("encoding_confidence"),
+                "timings": result.get("timings"),
+                "compression": result.get("compression"),
+                "cached": result.get("cached", False),
                 "file_details": result.get("file_details")
             })
         
@@ -243,53 +489,88 @@ async def get_task_status(
         raise HTTPException(status_code=500, detail=f"查詢任務狀態失敗: {str(e)}")
 
 
+@router.get("/status/{task_id}/events")
+async def stream_task_status(
+    task_id: str,
+    request: Request,
+    user: User = Depends(get_current_user)
+):
+    """
+    以 Server-Sent Events 推送任務處理進度
+    
+    先送出目前狀態，之後每個事件為一行 data: JSON（status、progress 百分比、stage、
+    rows_processed、bytes_processed/bytes_total、groups_written/groups_total），
+    任務完成或失敗後結束串流；完整結果再以 /status 取得一次。
+    只在連線時驗證身分，取代處理期間的定期輪詢。
+    
+    Args:
+        task_id: 任務 ID
+        user: 當前用戶
+    """
+    await _get_owned_task(task_id, user)
+    return StreamingResponse(
+        stream_task_events(task_id, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # 不讓 nginx 緩衝事件
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
 @router.get("/download/{task_id}")
 async def download_result(
     task_id: str,
+    stream: bool = Query(False, description="任務尚未完成時即開始串流下載"),
     user: User = Depends(get_current_user),
     redis_client = Depends(get_redis_client)
 ):
     """
     下載處理結果
     
+    指定 stream=true 時，任務等待中或處理中也可以下載：每個群組寫入 ZIP 後
+    即以分塊傳輸送出，處理完成時送出中央目錄，下載與處理同時進行。
+    
     Args:
         task_id: 任務 ID
+        stream: 是否在處理完成前開始串流下載
         user: 當前用戶
     
     Returns:
         處理結果檔案
     """
     try:
-        # 獲取任務資訊
-        task_data = await redis_client.get(f"task:{task_id}")
-        if not task_data:
-            raise HTTPException(status_code=404, detail="任務不存在或已過期")
-        
-        task_dict = json.loads(task_data)
+        # 獲取任務資訊與處理結果
+        task_dict, result = await get_task_store().get_with_result(task_id)
+        _ensure_owner(task_dict, user)
         
-        # 檢查任務擁有者
-        if task_dict.get("user_id") != user.user_id:
-            raise HTTPException(status_code=403, detail="無權訪問此任務")
+        original_filename = task_dict.get("filename", "unknown")
+        download_filename = f"{original_filename}_split_results.zip"
+        await get_storage_manager().touch(task_id)
+        
+        # 處理中的任務改為串流下載（已完成的任務直接回傳完整檔案）
+        if stream and task_dict.get("status") in (TaskStatus.PENDING, TaskStatus.PROCESSING):
+            return StreamingResponse(
+                stream_zip_archive(redis_client, task_id, task_work_dir(task_id)),
+                media_type="application/zip",
+                headers={"Content-Disposition": _attachment_disposition(download_filename)}
+            )
         
         # 檢查任務是否完成
         if task_dict.get("status") != TaskStatus.COMPLETED:
             raise HTTPException(status_code=400, detail="任務尚未完成，無法下載")
         
         # 獲取結果檔案路徑
-        result_data = await redis_client.get(f"result:{task_id}")
-        if not result_data:
+        if not result:
             raise HTTPException(status_code=404, detail="處理結果不存在")
         
-        result = json.loads(result_data)
         zip_path = result.get("zip_path")
         
         if not zip_path or not os.path.exists(zip_path):
             raise HTTPException(status_code=404, detail="結果檔案不存在")
         
         # 返回檔案
-        original_filename = task_dict.get("filename", "unknown")
-        download_filename = f"{original_filename}_split_results.zip"
-        
         return FileResponse(
             path=zip_path,
             filename=download_filename,
@@ -302,93 +583,304 @@ async def download_result(
         raise HTTPException(status_code=500, detail=f"下載檔案失敗: {str(e)}")
 
 
-async def process_file_background(
+def _attachment_disposition(filename: str) -> str:
+    """與 FileResponse 相同的 Content-Disposition（非 ASCII 檔名使用 RFC 5987 編碼）"""
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+async def _get_owned_task(task_id: str, user: User) -> Dict:
+    """讀取任務並確認屬於當前用戶"""
+    task_dict = await get_task_store().get(task_id)
+    _ensure_owner(task_dict, user)
+    return task_dict
+
+
+def _ensure_owner(task_dict: Optional[Dict], user: User):
+    """確認任務存在且屬於當前用戶"""
+    if task_dict is None:
+        raise HTTPException(status_code=404, detail="任務不存在或已過期")
+    if task_dict.get("user_id") != user.user_id:
+        raise HTTPException(status_code=403, detail="無權訪問此任務")
+
+
+async def _get_owned_session(upload_id: str, user: User) -> Dict:
+    """讀取上傳工作階段並確認屬於當前用戶"""
+    session = await get_upload_session_manager().get(upload_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="上傳工作階段不存在或已過期")
+    if session["user_id"] != user.user_id:
+        raise HTTPException(status_code=403, detail="無權訪問此上傳工作階段")
+    return session
+
+
+async def _check_daily_limit(redis_client, user: User) -> str:
+    """檢查每日處理限制，回傳當日使用量的 Redis 鍵"""
+    today = datetime.now().strftime("%Y-%m-%d")
+    usage_key = f"daily_usage:{user.user_id}:{today}"
+    current_usage = await redis_client.get(usage_key) or 0
+    current_usage = int(current_usage)
+    
+    daily_limit = settings.PREMIUM_DAILY_LIMIT if user.is_premium else settings.FREE_DAILY_LIMIT
+    if current_usage >= daily_limit:
+        raise HTTPException(
+            status_code=429,
+            detail=f"已達每日處理限制。{'付費版' if user.is_premium else '免費版'}每日可處理 {daily_limit} 個檔案"
+        )
+    return usage_key
+
+
+async def _register_upload(
+    background_tasks: BackgroundTasks,
+    redis_client,
+    user: User,
     task_id: str,
-    file: UploadFile,
-    column_name: str,
-    batch_size: Optional[int] = None
-):
+    filename: str,
+    file_path: str,
+    size_bytes: int,
+    content_hash: str,
+    column_name: Optional[Union[str, List]],
+    batch_size: Optional[int],
+    dialect: Optional[Dict]
+) -> SplitResponse:
     """
-    背景處理檔案切分任務
-    
-    此函數在背景執行，不會阻塞 API 響應。
-    處理流程：
-    1. 將任務狀態更新為 PROCESSING
-    2. 調用 FileProcessor 處理檔案分割
-    3. 將結果保存到 Redis
-    4. 更新任務狀態為 COMPLETED 或 ERROR
+    已寫入上傳目錄的檔案建立任務（/upload 與分塊上傳提交共用）
     
-    Args:
-        task_id: 唯一任務識別符
-        file: 已上傳的檔案對象
-        column_name: 用於分割的欄位名稱
-        batch_size: 預留參數，目前未使用
+    有指定欄位時先查詢結果快取，命中時直接完成任務，不讀取檔案內容，也不檢查每日處理限制；
+    否則檢查每日處理限制、確認切分欄位存在、估計輸出檔案數並寫入 Redis，開始切分。
+    檢查失敗時刪除上傳目錄。
     """
-    redis_client = get_redis_client()
-    processor = FileProcessor()
+    task_upload_dir = os.path.dirname(file_path)
+    file_size_mb = size_bytes / (1024 * 1024)
     
+    # 創建處理任務（欄位統計在快取未命中時才計算）
+    task = ProcessingTask(
+        task_id=task_id,
+        user_id=user.user_id,
+        filename=filename,
+        file_size_mb=round(file_size_mb, 2),
+        file_path=file_path,
+        content_hash=content_hash,
+        column_name=column_name,
+        batch_size=batch_size,
+        dialect=dialect,
+        status=TaskStatus.PENDING if column_name else TaskStatus.UPLOADED,
+        created_at=datetime.now()
+    )
+    
+    # 相同檔案與設定已有結果時直接完成任務（相同內容先前已通過下列檢查）
+    if column_name and await complete_from_cache(task_id, task.dict(), create=True):
+        return _cached_response(task_id)
+    
+    # 檢查每日處理限制（需要內容雜湊查詢結果快取，所以在上傳完成後才檢查）
     try:
-        # 更新任務狀態為處理中
-        task_data = await redis_client.get(f"task:{task_id}")
-        task_dict = json.loads(task_data)
-        task_dict["status"] = TaskStatus.PROCESSING
-        task_dict["updated_at"] = datetime.now().isoformat()
-        
-        await redis_client.setex(
-            f"task:{task_id}",
-            3600,
-            json.dumps(task_dict, default=str)
-        )
-        
-        # 執行檔案處理
-        result = await processor.process_file(file, column_name, batch_size)
-        
-        if result["success"]:
-            # 更新任務狀態為完成
-            task_dict["status"] = TaskStatus.COMPLETED
-            task_dict["updated_at"] = datetime.now().isoformat()
-            
-            # 儲存處理結果
-            await redis_client.setex(
-                f"result:{task_id}",
-                3600,
-                json.dumps(result, default=str)
+        usage_key = await _check_daily_limit(redis_client, user)
+    except HTTPException:
+        shutil.rmtree(task_upload_dir, ignore_errors=True)
+        raise
+    
+    # 壓縮檔先確認內容為單一 CSV/TXT 且宣告的解壓縮大小未超過上限
+    if compression_of(filename):
+        try:
+            await run_in_threadpool(
+                inner_filename, file_path, filename,
+                settings.DECOMPRESSION_MAX_RATIO, settings.DECOMPRESSION_MAX_MB * 1024 * 1024
             )
-        else:
-            # 處理失敗
-            task_dict["status"] = TaskStatus.ERROR
-            task_dict["error_message"] = result.get("error", "處理失敗")
-            task_dict["updated_at"] = datetime.now().isoformat()
-        
-        # 更新任務狀態
-        await redis_client.setex(
-            f"task:{task_id}",
-            3600,
-            json.dumps(task_dict, default=str)
-        )
-        
-    except Exception as e:
-        # 處理異常
-        logger.error(f"背景任務處理失敗: {task_id}, 錯誤: {str(e)}")
-        
+        except ValueError as e:
+            shutil.rmtree(task_upload_dir, ignore_errors=True)
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    # 只解析檔案開頭確認欄位存在，避免完整切分後才失敗
+    if column_name:
         try:
-            task_data = await redis_client.get(f"task:{task_id}")
-            if task_data:
-                task_dict = json.loads(task_data)
-                task_dict["status"] = TaskStatus.ERROR
-                task_dict["error_message"] = str(e)
-                task_dict["updated_at"] = datetime.now().isoformat()
-                
-                await redis_client.setex(
-                    f"task:{task_id}",
-                    3600,
-                    json.dumps(task_dict, default=str)
+            preview = await _preview_upload(file_path, filename, dialect, rows=1)
+        except Exception as e:
+            shutil.rmtree(task_upload_dir, ignore_errors=True)
+            raise HTTPException(status_code=400, detail=f"無法讀取檔案: {str(e)}")
+        try:
+            _ensure_column_exists(preview, column_name)
+        except HTTPException:
+            shutil.rmtree(task_upload_dir, ignore_errors=True)
+            raise
+    
+    # 估計各欄位不重複值數量，切分前預估輸出檔案數
+    column_profile = await _profile_upload(file_path, filename, dialect)
+    estimated_files = None
+    if column_name:
+        try:
+            estimated_files = _check_output_files(column_profile, column_name, batch_size)
+        except HTTPException:
+            shutil.rmtree(task_upload_dir, ignore_errors=True)
+            raise
+    
+    # 儲存任務到 Redis（1小時過期）
+    task.column_profile = column_profile
+    await get_task_store().create(task_id, task.dict())
+    
+    # 更新每日使用量
+    await redis_client.incr(usage_key)
+    await redis_client.expire(usage_key, 86400)  # 24小時過期
+    
+    if not column_name:
+        return SplitResponse(
+            task_id=task_id,
+            status=TaskStatus.UPLOADED,
+            message="檔案上傳成功，請選擇切分欄位"
+        )
+    
+    # 啟動背景處理
+    await _dispatch_split_task(background_tasks, redis_client, task.dict())
+    
+    return _split_response(task_id, "檔案上傳成功，開始處理中...", estimated_files)
+
+
+def _resolve_dialect(
+    task_dict: Dict,
+    delimiter: Optional[str],
+    quotechar: Optional[str],
+    has_header: Optional[bool]
+) -> Optional[Dict]:
+    """有指定格式設定時使用新設定，否則沿用上傳時的設定"""
+    try:
+        dialect = normalize_dialect_override(delimiter, quotechar, has_header)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return dialect if dialect is not None else task_dict.get("dialect")
+
+
+async def _preview_upload(file_path: str, filename: str, dialect: Optional[Dict], rows: int) -> Dict:
+    """在執行緒中解析上傳檔案的開頭，不阻塞事件迴圈"""
+    # 預覽不會寫入任何檔案，以上傳目錄作為工作目錄，避免建立臨時目錄
+    processor = FileProcessor(os.path.dirname(file_path))
+    return await run_in_threadpool(processor.preview_file, file_path, filename, rows, dialect)
+
+
+def _normalize_split_columns(
+    column_names: Optional[List[str]],
+    nested: bool = False
+) -> Optional[Union[str, List]]:
+    """
+    去除空白與重複的切分欄位；只有一個欄位時回傳字串，與單欄位切分的任務格式相同
+    
+    nested 時多個欄位組成一個組合鍵，回傳 [[欄位1, 欄位2, ...]]。
+    """
+    columns = list(dict.fromkeys(column for column in column_names or [] if column))
+    if not columns:
+        return None
+    if len(columns) == 1:
+        return columns[0]
+    return [columns] if nested else columns
+
+
+def _split_column_list(column_name: Union[str, List]) -> List:
+    return [column_name] if isinstance(column_name, str) else column_name
+
+
+def _ensure_column_exists(preview: Dict, column_name: Union[str, List]):
+    """確認切分欄位（一個或多個，含組合鍵的各欄位）存在於檔案中"""
+    available_columns = [column["name"] for column in preview["columns"]]
+    for split_key in _split_column_list(column_name):
+        for split_column in ([split_key] if isinstance(split_key, str) else split_key):
+            if split_column not in available_columns:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"欄位 '{split_column}' 不存在。可用欄位: {available_columns}"
                 )
-        except Exception as redis_error:
-            logger.error(f"Redis 更新錯誤: {str(redis_error)}")
+
+
+async def _profile_upload(file_path: str, filename: str, dialect: Optional[Dict]) -> Optional[Dict]:
+    """
+    在執行緒中估計各欄位不重複值數量；失敗時不影響上傳
+    
+    只讀取檔案開頭的樣本（CARDINALITY_SAMPLE_ROWS），不佔用切分任務的處理程序池。
+    """
+    if not settings.CARDINALITY_PROFILE_ENABLED:
+        return None
+    try:
+        processor = FileProcessor(os.path.dirname(file_path))
+        return await run_in_threadpool(processor.profile_columns, file_path, filename, dialect)
+    except Exception as e:
+        logger.warning(f"欄位不重複值估計失敗: {filename}, 錯誤: {str(e)}")
+        return None
+
+
+def _check_output_files(
+    column_profile: Optional[Dict],
+    column_name: Union[str, List],
+    batch_size: Optional[int]
+) -> Optional[int]:
+    """
+    依不重複值估計預估輸出檔案數（多個切分欄位時為各欄位合計），超過 MAX_OUTPUT_FILES 時拒絕切分
     
-    finally:
-        # 清理資源會在 1 小時後由 Redis TTL 自動處理
-        # 避免過早清理導致下載失敗
-        pass
+    Returns:
+        預估檔案數，任一欄位沒有估計資料時回傳 None；組合鍵的組合數無法由各欄位估計，也回傳 None
+    """
+    estimated_files = 0
+    for split_column in _split_column_list(column_name):
+        if not isinstance(split_column, str):
+            return None
+        stats = (column_profile or {}).get("columns", {}).get(split_column)
+        if not stats:
+            return None
+        
+        # 空值另外歸入「空值」群組
+        distinct_count = stats["distinct_estimate"] + (1 if stats["null_count"] else 0)
+        column_files = estimate_output_files(distinct_count, column_profile["total_rows"], batch_size)
+        estimated_files += column_files
+        if estimated_files > settings.MAX_OUTPUT_FILES:
+            detail = (
+                f"欄位 '{split_column}' 約有 {stats['distinct_estimate']} 個不同的值，"
+                f"預計產生約 {column_files} 個檔案"
+            )
+            if column_files != estimated_files:
+                detail += f"（所有切分欄位合計約 {estimated_files} 個）"
+            raise HTTPException(
+                status_code=400,
+                detail=(
+                    f"{detail}，超過上限 {settings.MAX_OUTPUT_FILES} 個。"
+                    f"請選擇其他欄位{'或加大批次大小' if batch_size else ''}"
+                )
+            )
+    return estimated_files
+
+
+def _split_response(task_id: str, message: str, estimated_files: Optional[int]) -> SplitResponse:
+    """切分已啟動的回應，附上預估檔案數與警告"""
+    warning = None
+    if estimated_files is not None and estimated_files > settings.OUTPUT_FILES_WARNING:
+        warning = f"預計產生約 {estimated_files} 個檔案，處理與下載可能需要較長時間"
+    return SplitResponse(
+        task_id=task_id,
+        status=TaskStatus.PENDING,
+        message=message,
+        estimated_files=estimated_files,
+        warning=warning
+    )
+
+
+def _cached_response(task_id: str) -> SplitResponse:
+    """以結果快取完成任務時的回應"""
+    return SplitResponse(
+        task_id=task_id,
+        status=TaskStatus.COMPLETED,
+        message="已有相同檔案與設定的切分結果，可直接下載",
+        cached=True
+    )
+
 
+async def _dispatch_split_task(background_tasks: BackgroundTasks, redis_client, task_dict: Dict):
+    """推入 Redis 佇列由 worker 執行，或在 API 程序內以 BackgroundTasks 執行"""
+    job = {
+        "file_path": task_dict["file_path"],
+        "filename": task_dict["filename"],
+        "column_name": task_dict["column_name"],
+        "batch_size": task_dict.get("batch_size"),
+        "dialect": task_dict.get("dialect"),
+        "content_hash": task_dict.get("content_hash")
+    }
+    if settings.TASK_QUEUE_BACKEND == "redis":
+        await JobQueue(redis_client).enqueue(task_dict["task_id"], **job)
+    else:
+        background_tasks.add_task(run_split_task, task_dict["task_id"], **job)
@@ -15,9 +15,96 @@ class Settings(BaseSettings):
     # 檔案處理設定
     FREE_FILE_SIZE_LIMIT: int = 10    # 10MB
     PREMIUM_FILE_SIZE_LIMIT: int = 100 # 100MB
-    ALLOWED_EXTENSIONS: List[str] = [".csv", ".xlsx", ".xls", ".txt"]
+    ALLOWED_EXTENSIONS: List[str] = [".csv", ".xlsx", ".xls", ".txt", ".gz", ".bz2", ".zst", ".zip"]
     UPLOAD_DIR: str = "/app/storage/uploads"
     OUTPUT_DIR: str = "/app/storage/outputs"
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # 上傳檔案以 1MB 區塊串流寫入磁碟
+    
+    # 可續傳的分塊上傳：每個區塊大小與工作階段期限（每收到一個區塊即延長）
+    UPLOAD_SESSION_CHUNK_SIZE: int = 8 * 1024 * 1024
+    UPLOAD_SESSION_TTL: int = 6 * 3600
+    
+    # 壓縮上傳（.gz/.bz2/.zst/單一檔案的 .zip）邊讀取邊解壓縮；檔案大小限制以壓縮後的大小計算
+    DECOMPRESSION_MAX_RATIO: int = 100    # 解壓縮後超過 16MB 時，與壓縮檔大小的最大倍數
+    DECOMPRESSION_MAX_MB: int = 4096      # 解壓縮後的大小上限
+    
+    # 串流切分設定 - 大型 CSV/TXT 以固定行數區塊讀取，避免整檔載入記憶體
+    STREAMING_SPLIT_ENABLED: bool = True
+    STREAMING_MIN_FILE_MB: int = 20       # 超過此大小的檔案改用串流模式
+    STREAMING_CHUNK_ROWS: int = 50000     # 每個區塊最多讀取的行數
+    
+    # 檔案預覽：只解析標題列與前 N 行
+    PREVIEW_ROWS: int = 20
+    PREVIEW_MAX_ROWS: int = 200
+    
+    # 上傳時以 HyperLogLog 估計各欄位不重複值數量，預估切分後的檔案數
+    CARDINALITY_PROFILE_ENABLED: bool = True
+    CARDINALITY_PRECISION: int = 14       # 每個欄位 2^14 個暫存器（16KB），誤差約 0.8%
+    CARDINALITY_SAMPLE_ROWS: int = 200000 # 只讀取檔案開頭的行數，超過時依已讀取的比例推估（0 表示讀取整個檔案）
+    OUTPUT_FILES_WARNING: int = 1000      # 預估檔案數超過此值時提出警告
+    MAX_OUTPUT_FILES: int = 10000         # 預估檔案數超過此值時拒絕切分
+    
+    # 編碼偵測只讀取檔案樣本（開頭加上分散於檔案各處的區塊）
+    ENCODING_SAMPLE_BYTES: int = 2 * 1024 * 1024
+    # TXT 分隔符、引號與標題列偵測的樣本大小
+    DIALECT_SAMPLE_BYTES: int = 64 * 1024
+    
+    # Excel 讀取引擎：calamine（Rust，預設）、openpyxl（read_only 逐列讀取）或 pandas（完整載入）
+    EXCEL_ENGINE: str = "calamine"
+    
+    # CSV/TXT 處理後端：pandas（預設）或 arrow（多執行緒讀取、Arrow 運算分組與寫出，輸出內容與 pandas 相同）
+    # passthrough：只解析切分欄位並直接複製原始資料列，保留前導零、數字格式與 TXT 的分隔符
+    CSV_BACKEND: str = "pandas"
+    PASSTHROUGH_KEEP_ENCODING: bool = False         # 保留來源編碼（例如 Big5），不轉為 UTF-8
+    PASSTHROUGH_BLOCK_BYTES: int = 16 * 1024 * 1024  # 每次讀取的區塊大小
+    PASSTHROUGH_BUFFER_BYTES: int = 64 * 1024 * 1024 # 記憶體中暫存的資料列超過此大小時寫入群組暫存檔
+    
+    # 大型檔案依資料列邊界切成位元組範圍並行分組（0 表示使用所有 CPU 核心，1 表示不並行）
+    PASSTHROUGH_WORKERS: int = 0
+    PASSTHROUGH_PARALLEL_MIN_BYTES: int = 64 * 1024 * 1024
+    
+    # 結果 ZIP 壓縮：stored / deflated / bzip2；等級 -1 為 zlib 預設（6），1 最快
+    ARCHIVE_COMPRESSION: str = "deflated"
+    ARCHIVE_COMPRESSION_LEVEL: int = -1
+    ARCHIVE_COMPRESSION_THREADS: int = 4  # 並行壓縮的執行緒數（0 表示不使用執行緒池）
+    
+    # 串流下載：處理中的任務每隔 ZIP_STREAM_POLL_INTERVAL 秒檢查一次 ZIP 寫入進度
+    ZIP_STREAM_POLL_INTERVAL: float = 0.5
+    ZIP_STREAM_CHUNK_SIZE: int = 1024 * 1024
+    
+    # 欄式快取：解析後的 CSV/TXT 以 Arrow IPC 格式依內容雜湊保存，重複切分同一檔案時略過解析
+    # 超過 COLUMNAR_CACHE_MAX_MB 時刪除最久未使用的項目
+    COLUMNAR_CACHE_ENABLED: bool = True
+    COLUMNAR_CACHE_DIR: str = "/app/storage/cache"
+    COLUMNAR_CACHE_TTL_HOURS: int = 24
+    COLUMNAR_CACHE_MAX_MB: int = 4096
+    
+    # 結果快取：相同內容與切分設定的任務直接使用先前的結果 ZIP，超過容量時刪除最久未使用的項目
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_DIR: str = "/app/storage/result_cache"
+    RESULT_CACHE_MAX_MB: int = 2048
+    
+    # 任務檔案清理：task: 鍵過期後刪除上傳檔與輸出，任務檔案與兩種快取的總大小超過 STORAGE_MAX_MB 時，
+    # 先縮減快取，再淘汰最久未使用的任務（0 表示不限制）
+    STORAGE_MAX_MB: int = 10240
+    STORAGE_SWEEP_INTERVAL: int = 60          # 清理間隔秒數（0 表示停用定期清理）
+    STORAGE_ORPHAN_GRACE_SECONDS: int = 600   # 新建立的目錄在此秒數內不清除（上傳中尚未寫入 Redis 的任務）
+    
+    # 檔案處理程序池 - 切分工作在獨立程序執行，不阻塞 API 事件迴圈（0 表示改用背景執行緒）
+    PROCESS_POOL_WORKERS: int = 2
+    PROCESS_POOL_MAX_TASKS_PER_CHILD: int = 20
+    
+    # 任務佇列：background（API 程序內執行）或 redis（推入 Redis 佇列，由 app.worker 執行）
+    TASK_QUEUE_BACKEND: str = "background"
+    WORKER_CONCURRENCY: int = 2           # 每個 worker 程序同時處理的任務數
+    WORKER_POLL_TIMEOUT: int = 5          # 等待新任務的阻塞秒數
+    WORKER_HEARTBEAT_TTL: int = 30        # 心跳過期秒數，過期後未完成的任務會被放回佇列
+    JOB_MAX_ATTEMPTS: int = 3             # 同一任務最多執行次數，避免反覆讓 worker 當機的任務
+    WORKER_RETRY_DELAY: float = 2.0       # Redis 暫時無法使用時，處理槽重試前等待的秒數
+    
+    # 處理進度：處理程序經 Redis pub/sub 發布進度，API 以 Server-Sent Events 推送給用戶
+    PROGRESS_MIN_INTERVAL: float = 0.5    # 同一任務兩次進度事件的最短間隔秒數
+    PROGRESS_HEARTBEAT_SECONDS: int = 15  # 沒有事件時送出心跳，避免代理伺服器中斷連線
     
     # 確保目錄存在
     def __post_init__(self):
@@ -12,10 +12,15 @@ class RedisClient:
     def __init__(self):
         self.redis: Optional[redis.Redis] = None
     
-    async def connect(self):
-        """連接 Redis"""
+    async def connect(self, connection: Optional[redis.Redis] = None):
+        """
+        連接 Redis
+        
+        Args:
+            connection: 已建立的連線（可選，例如測試用的 fakeredis），未提供時依 REDIS_URL 連線
+        """
         try:
-            self.redis = redis.from_url(settings.REDIS_URL, decode_responses=True)
+            self.redis = connection or redis.from_url(settings.REDIS_URL, decode_responses=True)
             await self.redis.ping()
             logger.info("Redis connected successfully")
         except Exception as e:
@@ -28,9 +33,9 @@ class RedisClient:
             await self.redis.close()
             logger.info("Redis disconnected")
     
-    async def set(self, key: str, value: str, ex: int = None):
-        """設置鍵值"""
-        return await self.redis.set(key, value, ex=ex)
+    async def set(self, key: str, value: str, ex: int = None, nx: bool = False):
+        """設置鍵值（nx=True 時只在鍵不存在時設置，可作為簡易鎖）"""
+        return await self.redis.set(key, value, ex=ex, nx=nx)
     
     async def setex(self, key: str, time: int, value: str):
         """設置鍵值並設置過期時間"""
@@ -64,6 +69,80 @@ class RedisClient:
         """原子性自增"""
         return await self.redis.incr(key)
     
+    async def exists(self, key: str) -> bool:
+        """檢查鍵是否存在"""
+        return bool(await self.redis.exists(key))
+    
+    async def hincrby(self, name: str, key: str, amount: int = 1) -> int:
+        """原子性增加哈希表欄位值"""
+        return await self.redis.hincrby(name, key, amount)
+    
+    async def hdel(self, name: str, *keys: str):
+        """刪除哈希表欄位"""
+        return await self.redis.hdel(name, *keys)
+    
+    async def lpush(self, name: str, *values: str) -> int:
+        """從列表左側推入"""
+        return await self.redis.lpush(name, *values)
+    
+    async def blmove(self, source: str, destination: str, timeout: int,
+                     src: str = "RIGHT", dest: str = "LEFT") -> Optional[str]:
+        """阻塞式地將元素從來源列表原子性移到目標列表"""
+        return await self.redis.blmove(source, destination, timeout, src, dest)
+    
+    async def lmove(self, source: str, destination: str,
+                    src: str = "RIGHT", dest: str = "LEFT") -> Optional[str]:
+        """將元素從來源列表原子性移到目標列表"""
+        return await self.redis.lmove(source, destination, src, dest)
+    
+    async def lrem(self, name: str, count: int, value: str) -> int:
+        """從列表移除元素"""
+        return await self.redis.lrem(name, count, value)
+    
+    async def llen(self, name: str) -> int:
+        """獲取列表長度"""
+        return await self.redis.llen(name)
+    
+    async def sadd(self, name: str, *values: str) -> int:
+        """加入集合成員"""
+        return await self.redis.sadd(name, *values)
+    
+    async def smembers(self, name: str) -> set:
+        """獲取所有集合成員"""
+        return await self.redis.smembers(name)
+    
+    async def scard(self, name: str) -> int:
+        """獲取集合成員數"""
+        return await self.redis.scard(name)
+    
+    async def zadd(self, name: str, mapping: dict) -> int:
+        """設置有序集合成員分數"""
+        return await self.redis.zadd(name, mapping)
+    
+    async def zrem(self, name: str, *members: str) -> int:
+        """移除有序集合成員"""
+        return await self.redis.zrem(name, *members)
+    
+    async def zrange_withscores(self, name: str, start: int = 0, end: int = -1) -> list:
+        """依分數由小到大取得有序集合成員與分數"""
+        return await self.redis.zrange(name, start, end, withscores=True)
+    
+    async def publish(self, channel: str, message: str) -> int:
+        """發布訊息到頻道，回傳收到訊息的訂閱者數"""
+        return await self.redis.publish(channel, message)
+    
+    def pubsub(self):
+        """建立訂閱連線（使用完畢須呼叫 aclose）"""
+        return self.redis.pubsub()
+
+    def pipeline(self, transaction: bool = True):
+        """建立管線（transaction=True 時以 MULTI/EXEC 執行），指令在 execute 時一次送出"""
+        return self.redis.pipeline(transaction=transaction)
+    
+    async def scan_keys(self, pattern: str) -> list:
+        """以 SCAN 列出符合模式的鍵（不阻塞 Redis）"""
+        return [key async for key in self.redis.scan_iter(match=pattern)]
+    
     async def set_json(self, key: str, value: dict, ex: int = None):
         """設置 JSON 值"""
         json_str = json.dumps(value, default=str)
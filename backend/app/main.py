@@ -7,6 +7,8 @@ from datetime import datetime
 
 from .core.config import settings
 from .core.redis_client import redis_client
+from .services.task_executor import processing_executor
+from .services.storage_manager import storage_manager
 
 # 配置結構化日誌
 structlog.configure(
@@ -56,10 +58,16 @@ async def startup_event():
     # 連接 Redis
     await redis_client.connect()
     
+    # 啟動檔案處理程序池
+    processing_executor.start()
+    
     # 確保存儲目錄存在
     os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
     os.makedirs(settings.OUTPUT_DIR, exist_ok=True)
     
+    # 啟動過期任務檔案清理
+    storage_manager.start()
+    
     logger.info("Application started successfully")
 
 @app.on_event("shutdown")
@@ -67,9 +75,15 @@ async def shutdown_event():
     """應用關閉事件"""
     logger.info("Shutting down File Split Tool API")
     
+    # 停止檔案清理
+    storage_manager.shutdown()
+    
     # 斷開 Redis 連接
     await redis_client.disconnect()
     
+    # 關閉檔案處理程序池
+    processing_executor.shutdown()
+    
     logger.info("Application shutdown complete")
 
 @app.get("/")
@@ -92,12 +106,19 @@ async def health_check():
         logger.error("Redis health check failed", error=str(e))
         redis_status = "unhealthy"
     
+    try:
+        storage_usage = await storage_manager.usage()
+    except Exception as e:
+        logger.error("Storage usage check failed", error=str(e))
+        storage_usage = None
+    
     return {
         "status": "healthy" if redis_status == "healthy" else "unhealthy",
         "services": {
             "redis": redis_status,
             "storage": "healthy" if os.path.exists(settings.UPLOAD_DIR) else "unhealthy"
         },
+        "storage_usage": storage_usage,
         "timestamp": datetime.now().isoformat()
     }
 
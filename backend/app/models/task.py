@@ -1,10 +1,11 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Optional, Union
 from datetime import datetime
 from enum import Enum
 
 class TaskStatus(str, Enum):
     """任務狀態枚舉"""
+    UPLOADED = "uploaded"      # 已上傳，等待選擇切分欄位
     PENDING = "pending"
     PROCESSING = "processing"
     COMPLETED = "completed"
@@ -24,9 +25,13 @@ class SplitRequest(BaseModel):
     split_column: str
 
 class SplitResponse(BaseModel):
-    """切分響應模型"""
+    """切分響應模型（上傳、提交分塊上傳與啟動切分）"""
     task_id: str
-    estimated_files: int
+    status: TaskStatus
+    message: str
+    estimated_files: Optional[int] = None  # 依上傳時的欄位統計預估的輸出檔案數
+    warning: Optional[str] = None
+    cached: Optional[bool] = None          # 以結果快取直接完成任務
 
 class TaskStatusResponse(BaseModel):
     """任務狀態響應模型"""
@@ -51,7 +56,12 @@ class ProcessingTask(BaseModel):
     user_id: str
     filename: str
     file_size_mb: float
-    column_name: str
+    file_path: Optional[str] = None
+    content_hash: Optional[str] = None
+    column_name: Optional[Union[str, List[Union[str, List[str]]]]] = None  # 多個切分欄位時為列表，組合鍵為子列表
+    batch_size: Optional[int] = None
+    dialect: Optional[dict] = None
+    column_profile: Optional[dict] = None
     status: TaskStatus = TaskStatus.PENDING
     progress: int = 0
     message: Optional[str] = None
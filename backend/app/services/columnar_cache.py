@@ -0,0 +1,182 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from ..core.config import settings
+from ..utils.arrow_utils import arrow_available
+
+try:
+    import pyarrow as pa
+except ImportError:  # 未安裝時停用快取
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+# schema metadata 中保存解析資訊（編碼、是否有標題列）的鍵
+METADATA_KEY = b"file_split"
+
+
+class ColumnarCache:
+    """
+    已解析檔案的欄式快取（Arrow IPC）
+
+    以上傳內容的 SHA-256 與解析設定為鍵，將解析後的資料表存成未壓縮的
+    Arrow IPC 檔案。同一檔案再次切分時以記憶體映射開啟，略過編碼偵測與文字解析。
+    快取在最後一次使用後超過 COLUMNAR_CACHE_TTL_HOURS 即過期；總大小超過
+    COLUMNAR_CACHE_MAX_MB 時，依最後使用時間刪除最舊的項目。
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        ttl_seconds: Optional[int] = None,
+        max_bytes: Optional[int] = None
+    ):
+        self.cache_dir = cache_dir or settings.COLUMNAR_CACHE_DIR
+        self.ttl_seconds = ttl_seconds or settings.COLUMNAR_CACHE_TTL_HOURS * 3600
+        self.max_bytes = max_bytes if max_bytes is not None else settings.COLUMNAR_CACHE_MAX_MB * 1024 * 1024
+
+    @property
+    def enabled(self) -> bool:
+        return settings.COLUMNAR_CACHE_ENABLED and self.max_bytes > 0 and arrow_available()
+
+    @staticmethod
+    def make_key(content_hash: str, file_extension: str, dialect: Optional[Dict] = None) -> str:
+        """快取鍵：內容雜湊加上會影響解析結果的設定"""
+        options = json.dumps({"ext": file_extension, "dialect": dialect or {}}, sort_keys=True)
+        options_hash = hashlib.sha256(options.encode("utf-8")).hexdigest()[:16]
+        return f"{content_hash}_{options_hash}"
+
+    def load(self, key: str) -> Optional[Tuple["pa.Table", Dict]]:
+        """
+        以記憶體映射開啟快取
+
+        Returns:
+            (資料表, 解析資訊)，沒有快取或已過期時回傳 None
+        """
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl_seconds:
+                os.remove(path)
+                return None
+            table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, pa.ArrowException) as e:
+            logger.warning(f"欄式快取讀取失敗: {key}, 錯誤: {str(e)}")
+            return None
+
+        metadata = json.loads((table.schema.metadata or {}).get(METADATA_KEY, b"{}"))
+        logger.info(f"使用欄式快取: {key} ({table.num_rows} 行)")
+        return table, metadata
+
+    def store(self, key: str, table: "pa.Table", metadata: Dict) -> None:
+        """寫入快取（先寫入暫存檔再原子性地改名，避免讀到寫入一半的檔案），超過容量時刪除最舊的項目"""
+        if table.nbytes > self.max_bytes:
+            logger.info(f"資料表超過欄式快取容量，略過快取: {key}")
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        schema_metadata = dict(table.schema.metadata or {})
+        schema_metadata[METADATA_KEY] = json.dumps(metadata).encode("utf-8")
+        table = table.replace_schema_metadata(schema_metadata)
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(tmp_path, self._path(key))
+            logger.info(f"已建立欄式快取: {key}")
+        except (OSError, pa.ArrowException) as e:
+            logger.warning(f"欄式快取寫入失敗: {key}, 錯誤: {str(e)}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        self.purge_expired()
+        self.evict()
+
+    def store_dataframe(self, key: str, df: pd.DataFrame, metadata: Dict) -> None:
+        """將 pandas 解析的 DataFrame 轉為 Arrow 後寫入快取；無法轉換的型別則略過"""
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+        except (pa.ArrowException, TypeError, ValueError) as e:
+            logger.info(f"資料無法轉為欄式格式，略過快取: {str(e)}")
+            return
+        self.store(key, table, metadata)
+
+    def purge_expired(self) -> int:
+        """刪除過期的快取檔案，回傳刪除數量"""
+        removed = 0
+        now = time.time()
+        try:
+            entries = list(os.scandir(self.cache_dir))
+        except FileNotFoundError:
+            return 0
+
+        for entry in entries:
+            try:
+                if now - entry.stat().st_mtime > self.ttl_seconds:
+                    os.remove(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                continue
+
+        if removed:
+            logger.info(f"已清除 {removed} 個過期的欄式快取")
+        return removed
+
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """
+        依最後使用時間刪除最舊的快取，直到總大小不超過 max_bytes（預設為容量上限）
+
+        Returns:
+            刪除數量
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        items = self._entries()
+        total_bytes = sum(size for _, size, _ in items)
+        removed = 0
+        for _, size, path in sorted(items):
+            if total_bytes <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+            removed += 1
+
+        if removed:
+            logger.info(f"已清除 {removed} 個最久未使用的欄式快取")
+        return removed
+
+    def size(self) -> int:
+        """快取總大小（位元組）"""
+        return sum(size for _, size, _ in self._entries())
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """(最後使用時間, 大小, 路徑)"""
+        try:
+            entries = [entry for entry in os.scandir(self.cache_dir) if entry.name.endswith(".arrow")]
+        except FileNotFoundError:
+            return []
+
+        items = []
+        for entry in entries:
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            items.append((stat.st_mtime, stat.st_size, entry.path))
+        return items
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.arrow")
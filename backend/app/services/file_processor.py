@@ -1,85 +1,206 @@
+import io
 import os
+import json
+import codecs
+import pickle
+import shutil
 import tempfile
-import zipfile
+import uuid
+import datetime
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from itertools import count, islice
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Union
+import numpy as np
 import pandas as pd
-import chardet
-from fastapi import UploadFile
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
 import logging
 
+from ..core.config import settings
+from ..utils.encoding_utils import detect_encoding
+from ..utils.compression_utils import compression_of, inner_filename, input_position, open_decompressed
+from ..utils.dialect_utils import sniff_dialect
+from ..utils.cardinality_utils import HyperLogLog, extrapolate_distinct
+from ..utils.archive_utils import ParallelZipWriter
+from ..utils.csv_passthrough import (
+    BlockGrouper,
+    PassthroughUnsupportedError,
+    RowBlock,
+    group_byte_range,
+    iter_line_blocks,
+    passthrough_supported,
+    read_header,
+    record_boundaries,
+    split_fields,
+)
+from .columnar_cache import ColumnarCache
+from .progress import ProgressReporter
+from ..utils.arrow_utils import (
+    ArrowParseError,
+    arrow_available,
+    count_groups,
+    format_table_like_pandas,
+    has_pandas_compatible_header,
+    iter_groups,
+    needs_quoting,
+    read_csv_table,
+    write_csv_table,
+)
+
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:  # 未安裝時改用 openpyxl read_only
+    CalamineWorkbook = None
+
 logger = logging.getLogger(__name__)
 
+# DataFrame.to_excel 的標題列樣式，串流模式寫出的 Excel 與一般模式相同
+_EXCEL_HEADER_FONT = Font(bold=True)
+_EXCEL_HEADER_BORDER = Border(
+    left=Side(style="thin"), right=Side(style="thin"), top=Side(style="thin"), bottom=Side(style="thin")
+)
+_EXCEL_HEADER_ALIGNMENT = Alignment(horizontal="center", vertical="top")
+
 
 class FileProcessor:
-    """檔案處理引擎 - 支援 CSV（含Big5）、Excel、TXT 檔案的單欄位值切分"""
+    """檔案處理引擎 - 支援 CSV（含Big5）、Excel、TXT 檔案依一個或多個欄位值切分"""
     
     SUPPORTED_EXTENSIONS = {'.csv', '.xlsx', '.xls', '.txt'}
     CSV_ENCODINGS = ['utf-8', 'big5', 'gb2312', 'gbk', 'latin-1', 'cp1252']
+    ZIP_FILENAME = "split_results.zip"
+    # ZIP 寫入進度（已完成項目的結尾位移），供處理中的串流下載讀取
+    ZIP_PROGRESS_FILENAME = "split_results.zip.progress"
     
-    def __init__(self):
-        self.temp_dir = tempfile.mkdtemp()
+    def __init__(self, work_dir: Optional[str] = None, progress: Optional[ProgressReporter] = None):
+        # 指定工作目錄時（例如共享儲存空間上的任務目錄），API 與 worker 程序都能存取輸出檔
+        if work_dir:
+            os.makedirs(work_dir, exist_ok=True)
+            self.temp_dir = work_dir
+        else:
+            self.temp_dir = tempfile.mkdtemp()
+        self.encoding_info = {"encoding": None, "encoding_confidence": None}
+        self.compression_info: Dict = {}
+        self.dialect_override: Dict = {}
+        self.split_folders: Dict[str, str] = {}
+        self.write_header = True
+        # 壓縮上傳的格式（gzip、bz2、zstd、zip），讀取時邊解壓縮邊解析
+        self.compression: Optional[str] = None
+        self.columnar_cache = ColumnarCache()
+        # 處理進度（切分任務由執行層傳入會發布到 Redis 的回報器）
+        self.progress = progress or ProgressReporter()
+        # 串流讀取中的檔案，用於回報已讀取的位元組數
+        self._tracked_input = None
     
-    async def process_file(
+    def process_file(
         self, 
-        file: UploadFile, 
-        column_name: str,
-        batch_size: Optional[int] = None
+        file_path: str,
+        filename: str,
+        column_name: Union[str, List[Union[str, List[str]]]],
+        batch_size: Optional[int] = None,
+        dialect: Optional[Dict] = None,
+        content_hash: Optional[str] = None
     ) -> Dict:
         """
         處理上傳的檔案，按指定欄位值進行切分
         
+        指定多個切分欄位時只讀取一次檔案，各欄位的切分結果分別放在 ZIP 內以欄位命名的資料夾。
+        列表中的項目也可以是欄位列表（組合鍵，例如 ["地區", "門市"]），依各層的值輸出為
+        巢狀資料夾（地區/檔名_門市.csv）。
+        
         Args:
-            file: 上傳的檔案
-            column_name: 要切分的欄位名稱
+            file_path: 已儲存的上傳檔案路徑
+            filename: 原始檔案名稱
+            column_name: 要切分的欄位名稱，或多個切分欄位（欄位名稱或組合鍵）的列表
             batch_size: 每個批次的最大行數（可選）
+            dialect: 使用者指定的 CSV/TXT 格式（sep、quotechar、header，可選）
+            content_hash: 上傳內容的 SHA-256，用於欄式快取（可選）
             
         Returns:
             包含處理結果的字典
         """
+        self.dialect_override = dialect or {}
         try:
-            # 儲存上傳檔案
-            file_path = await self._save_uploaded_file(file)
-            
-            # 檢查檔案類型
-            file_extension = Path(file.filename).suffix.lower()
+            # 檢查檔案類型（壓縮檔依內容的檔名處理，輸出檔名也以內容檔名為準）
+            filename, file_extension = self._resolve_input(file_path, filename)
             if file_extension not in self.SUPPORTED_EXTENSIONS:
                 raise ValueError(f"不支援的檔案類型: {file_extension}")
             
+            column_names = self._split_keys(column_name)
+            if not column_names:
+                raise ValueError("未指定切分欄位")
+            self.split_folders = self._split_folders(column_names)
+            self.progress.stage("reading", bytes_total=os.path.getsize(file_path))
+            
+            # 位元組直通模式：只解析切分欄位，直接複製原始資料列
+            if self._use_passthrough_backend(file_extension):
+                try:
+                    return self._process_file_passthrough(
+                        file_path, file_extension, filename, column_names, batch_size
+                    )
+                except (PassthroughUnsupportedError, UnicodeError) as e:
+                    logger.warning(f"無法以位元組直通模式切分，改用一般模式: {str(e)}")
+                    shutil.rmtree(os.path.join(self.temp_dir, ".passthrough"), ignore_errors=True)
+            
+            use_arrow = self._use_arrow_backend(file_extension)
+            
+            # 同一檔案已解析過時直接使用欄式快取，略過編碼偵測與文字解析
+            cache_key = self._columnar_cache_key(file_path, file_extension, content_hash, use_arrow)
+            table = self._load_columnar_cache(cache_key)
+            
+            # 使用 Arrow 後端時，CSV/TXT 以多執行緒讀取並以 Arrow 運算分組
+            if use_arrow and table is None:
+                table = self._read_arrow_table(file_path, file_extension)
+                if table is not None:
+                    self._store_columnar_cache(cache_key, table)
+            # 組合鍵只有 pandas 切分支援，Arrow 讀取的表格轉為 DataFrame 處理
+            if (
+                use_arrow and table is not None and not self._is_txt_content(table.column_names, file_extension)
+                and all(isinstance(split_key, str) for split_key in column_names)
+            ):
+                return self._split_arrow_table(table, file_extension, filename, column_names, batch_size)
+            
+            # 大型 CSV/TXT 與 Excel 改用串流模式，避免整檔載入記憶體
+            if table is None and self._should_stream(file_path, file_extension):
+                return self._process_file_streaming(
+                    file_path, file_extension, filename, column_names, batch_size
+                )
+            output_extension = self._output_extension(file_extension)
+            
             # 讀取檔案內容
-            df = await self._read_file(file_path, file_extension)
+            if table is not None:
+                df = table.to_pandas()
+            else:
+                df = self._read_file(file_path, file_extension)
+                self._store_columnar_cache(cache_key, df)
             
             # 驗證欄位是否存在
-            if column_name not in df.columns:
-                available_columns = list(df.columns)
-                raise ValueError(f"欄位 '{column_name}' 不存在。可用欄位: {available_columns}")
+            self._check_split_columns(column_names, list(df.columns))
             
-            # 執行切分
-            split_results = await self._split_by_column(df, column_name, batch_size)
-            
-            # 生成輸出檔案
-            output_files = await self._generate_output_files(
-                split_results, file_extension, file.filename
+            total_rows = len(df)
+            self.progress.stage(
+                "splitting", rows_processed=total_rows, bytes_processed=self.progress.state["bytes_total"]
             )
+            base_name = Path(filename).stem
+            file_details = []
+            with self._open_zip_archive() as archive:
+                for i, split_column in enumerate(column_names):
+                    split_results = self._split_by_column(df, split_column, batch_size)
+                    self.progress.stage("writing", groups_total=len(file_details) + len(split_results))
+                    if i == len(column_names) - 1:
+                        # 切分結果為排序後資料的連續切片，最後一次切分後釋放原始資料以免同時保留兩份
+                        del df
+                    # 各群組直接寫入 ZIP 檔，不另外產生中間檔案
+                    file_details += self._write_split_results(
+                        archive, split_results, output_extension, base_name, split_column
+                    )
+            logger.info(f"創建 ZIP 檔案成功: {archive.filename}")
             
-            # 創建 ZIP 檔案
-            zip_path = await self._create_zip_archive(output_files)
-            
-            return {
-                "success": True,
-                "total_rows": len(df),
-                "split_groups": len(split_results),
-                "output_files": len(output_files),
-                "zip_path": zip_path,
-                "file_details": [
-                    {
-                        "group_value": group,
-                        "row_count": len(data),
-                        "filename": f"{Path(file.filename).stem}_{group}{file_extension}"
-                    }
-                    for group, data in split_results.items()
-                ]
-            }
+            return self._split_result(total_rows, file_details, archive.filename)
             
         except Exception as e:
             logger.error(f"檔案處理失敗: {str(e)}")
@@ -88,73 +209,311 @@ class FileProcessor:
                 "error": str(e)
             }
     
-    async def _save_uploaded_file(self, file: UploadFile) -> str:
-        """儲存上傳檔案到臨時目錄"""
-        file_path = os.path.join(self.temp_dir, file.filename)
-        with open(file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
-        return file_path
+    def preview_file(
+        self,
+        file_path: str,
+        filename: str,
+        rows: Optional[int] = None,
+        dialect: Optional[Dict] = None
+    ) -> Dict:
+        """
+        預覽檔案：只解析標題列與前 N 行資料
+        
+        讀取量與檔案大小無關，可在切分前確認欄位是否存在。欄位名稱與
+        切分時相同（包含沒有標題列時的 column_N、Excel 的 Unnamed: N）。
+        
+        Args:
+            file_path: 已儲存的上傳檔案路徑
+            filename: 原始檔案名稱
+            rows: 範例資料行數（預設 PREVIEW_ROWS）
+            dialect: 使用者指定的 CSV/TXT 格式（可選）
+            
+        Returns:
+            {"columns": [{"name", "type"}], "rows", "row_count", "encoding", "encoding_confidence"}
+        """
+        self.dialect_override = dialect or {}
+        rows = rows or settings.PREVIEW_ROWS
+        
+        filename, file_extension = self._resolve_input(file_path, filename)
+        if file_extension not in self.SUPPORTED_EXTENSIONS:
+            raise ValueError(f"不支援的檔案類型: {file_extension}")
+        
+        if file_extension in ('.xlsx', '.xls'):
+            df = self._preview_excel(file_path, file_extension, rows)
+        else:
+            df = self._preview_delimited(file_path, file_extension, rows)
+        
+        return {
+            "columns": [
+                {"name": str(column), "type": self._infer_column_type(df[column])}
+                for column in df.columns
+            ],
+            "rows": json.loads(df.to_json(orient='values', date_format='iso', force_ascii=False)),
+            "row_count": len(df),
+            **self.encoding_info
+        }
     
-    async def _read_file(self, file_path: str, file_extension: str) -> pd.DataFrame:
+    def _preview_delimited(self, file_path: str, file_extension: str, rows: int) -> pd.DataFrame:
+        """以與切分相同的編碼與格式偵測結果，只解析 CSV/TXT 的前 N 行"""
+        encoding = self._detect_encoding(file_path)
+        if file_extension == '.csv':
+            read_options = self._csv_read_options(file_path, encoding)
+        else:
+            read_options = self._txt_read_options(file_path, encoding)
+        
+        if read_options is not None:
+            try:
+                return self._parse_with_encoding(
+                    lambda enc: pd.read_csv(self._source(file_path), encoding=enc, nrows=rows, **read_options),
+                    encoding
+                )
+            except pd.errors.ParserError as e:
+                if file_extension == '.csv' or self.dialect_override:
+                    raise ValueError(f"無法解析檔案: {str(e)}")
+        
+        # 無法分欄的 TXT 與切分時相同，當作單欄位 content 處理
+        with self._open_text(file_path, encoding, errors='replace') as f:
+            lines = (line.strip() for line in f)
+            return pd.DataFrame({'content': list(islice((line for line in lines if line), rows))})
+    
+    def _preview_excel(self, file_path: str, file_extension: str, rows: int) -> pd.DataFrame:
+        """只讀取 Excel 第一個工作表的標題列與前 N 行"""
+        engine = self._excel_engine(file_extension)
+        if engine == 'pandas':
+            return pd.read_excel(file_path, nrows=rows)
+        if file_extension == '.xlsx':
+            # calamine 會先載入整個工作表；openpyxl read_only 逐列解析，只讀取需要的部分
+            engine = 'openpyxl'
+        
+        excel_rows = self._iter_excel_rows(file_path, engine)
+        try:
+            header = next(excel_rows, None)
+            if header is None:
+                raise ValueError("Excel 檔案沒有任何資料")
+            columns = self._excel_header(header)
+            width = len(columns)
+            data = [(row + [None] * width)[:width] for row in islice(excel_rows, rows)]
+        finally:
+            excel_rows.close()
+        return pd.DataFrame(data, columns=columns)
+    
+    def profile_columns(
+        self,
+        file_path: str,
+        filename: str,
+        dialect: Optional[Dict] = None
+    ) -> Dict:
+        """
+        以一次分塊讀取估計每個欄位的不重複值數量（HyperLogLog）
+        
+        記憶體用量與檔案大小無關：每個欄位只保留固定大小的 sketch。
+        值以原始文字計算，因此 "1" 與 "1.0" 會視為不同值（估計值可能略高）。
+        空值不計入不重複值，切分時另外歸入「空值」群組。
+        
+        只讀取前 CARDINALITY_SAMPLE_ROWS 行；檔案更大時依已讀取的位元組比例推估
+        總行數、空值數與不重複值數量（Excel 無法得知比例，回傳樣本的數值）。
+        
+        Returns:
+            {"total_rows", "sampled", "sample_rows", "columns": {欄位: {"distinct_estimate", "null_count"}}}
+        """
+        self.dialect_override = dialect or {}
+        filename, file_extension = self._resolve_input(file_path, filename)
+        
+        sample_limit = settings.CARDINALITY_SAMPLE_ROWS
+        sketches = {}
+        null_counts = {}
+        chunks = []
+        sample_rows = 0
+        rows_read = 0     # 已解析的行數（含樣本以外的部分），與讀取位置對應
+        sampled = False
+        # 第一個與最後一個區塊讀完時的 (行數, 讀取位置)；兩者都包含解析器預先讀取的緩衝，
+        # 以兩點之間的差推估每行的位元組數，不受預先讀取的影響
+        first_mark = last_mark = (0, 0)
+        try:
+            columns, chunks = self._open_profile_chunks(file_path, file_extension)
+            sketches = {column: HyperLogLog(settings.CARDINALITY_PRECISION) for column in columns}
+            null_counts = dict.fromkeys(columns, 0)
+            for chunk in chunks:
+                rows_read += len(chunk)
+                last_mark = (rows_read, self._input_bytes_read())
+                if first_mark == (0, 0):
+                    first_mark = last_mark
+                if sample_limit and sample_rows >= sample_limit:
+                    sampled = True
+                    break
+                if sample_limit and sample_rows + len(chunk) > sample_limit:
+                    chunk = chunk.iloc[:sample_limit - sample_rows]
+                    sampled = True
+                sample_rows += len(chunk)
+                for column in columns:
+                    series = chunk[column]
+                    sketches[column].add_series(series)
+                    null_counts[column] += int(series.isna().sum())
+        finally:
+            # 先結束讀取器再關閉檔案
+            if hasattr(chunks, 'close'):
+                chunks.close()
+            if self._tracked_input is not None:
+                self._tracked_input.close()
+        
+        total_rows = sample_rows
+        distinct_counts = {column: sketches[column].estimate() for column in sketches}
+        file_size = os.path.getsize(file_path)
+        if sampled and 0 < last_mark[1] < file_size:
+            if last_mark[1] > first_mark[1]:
+                bytes_per_row = (last_mark[1] - first_mark[1]) / (last_mark[0] - first_mark[0])
+            else:
+                bytes_per_row = last_mark[1] / last_mark[0]
+            total_rows = max(int(round(rows_read + (file_size - last_mark[1]) / bytes_per_row)), rows_read)
+            for column in sketches:
+                distinct_counts[column] = extrapolate_distinct(distinct_counts[column], sample_rows, total_rows)
+                null_counts[column] = int(round(null_counts[column] * total_rows / sample_rows))
+        
+        return {
+            "total_rows": total_rows,
+            "sampled": sampled,
+            "sample_rows": sample_rows,
+            "columns": {
+                column: {
+                    "distinct_estimate": distinct_counts[column],
+                    "null_count": null_counts[column]
+                }
+                for column in sketches
+            }
+        }
+    
+    def _open_profile_chunks(self, file_path: str, file_extension: str):
+        """單次讀取的資料區塊來源；CSV/TXT 以字串讀取，不需先掃描欄位型別"""
+        chunk_rows = settings.STREAMING_CHUNK_ROWS
+        if file_extension in ('.xlsx', '.xls'):
+            if self._excel_engine(file_extension) == 'pandas':
+                df = pd.read_excel(file_path)
+                return list(df.columns), [df]
+            return self._open_excel_chunks(file_path, file_extension, chunk_rows)
+        if file_extension not in ('.csv', '.txt'):
+            raise ValueError(f"不支援的檔案類型: {file_extension}")
+        
+        encoding = self._detect_encoding(file_path)
+        if file_extension == '.csv':
+            read_options = self._csv_read_options(file_path, encoding)
+        else:
+            read_options = self._txt_read_options(file_path, encoding)
+        if read_options is None:
+            return ['content'], self._iter_txt_lines_chunks(file_path, chunk_rows)
+        
+        # 估計用途，樣本以外無法解碼的少數位元組直接取代
+        # 由讀取位置得知樣本佔整個檔案的比例
+        reader = pd.read_csv(
+            self._open_tracked(file_path), encoding=encoding, encoding_errors='replace', dtype=str,
+            chunksize=chunk_rows, **read_options
+        )
+        first_chunk = next(reader, None)
+        if first_chunk is None:
+            return [], []
+        return list(first_chunk.columns), self._chain_chunks(first_chunk, reader)
+    
+    @staticmethod
+    def _chain_chunks(first_chunk: pd.DataFrame, reader):
+        yield first_chunk
+        yield from reader
+    
+    @staticmethod
+    def _infer_column_type(series: pd.Series) -> str:
+        """推斷欄位型別：integer、float、boolean、datetime、string、mixed 或 empty"""
+        if series.isna().all():
+            return "empty"
+        inferred = pd.api.types.infer_dtype(series, skipna=True)
+        return {
+            "integer": "integer",
+            "floating": "float",
+            "mixed-integer-float": "float",
+            "boolean": "boolean",
+            "datetime64": "datetime",
+            "datetime": "datetime",
+            "date": "datetime",
+            "string": "string",
+        }.get(inferred, "mixed")
+    
+    def _read_file(self, file_path: str, file_extension: str) -> pd.DataFrame:
         """根據檔案類型讀取檔案內容"""
         if file_extension == '.csv':
-            return await self._read_csv_with_encoding(file_path)
+            return self._read_csv_with_encoding(file_path)
         elif file_extension in ['.xlsx', '.xls']:
             return pd.read_excel(file_path)
         elif file_extension == '.txt':
-            return await self._read_txt_file(file_path)
+            return self._read_txt_file(file_path)
         else:
             raise ValueError(f"不支援的檔案類型: {file_extension}")
     
-    async def _read_csv_with_encoding(self, file_path: str) -> pd.DataFrame:
+    def _read_csv_with_encoding(self, file_path: str) -> pd.DataFrame:
         """支援多種編碼的 CSV 讀取，包含 Big5"""
-        # 首先嘗試自動檢測編碼
-        with open(file_path, 'rb') as f:
-            raw_data = f.read()
-            detected = chardet.detect(raw_data)
-            detected_encoding = detected.get('encoding', 'utf-8')
-        
-        # 編碼優先順序：檢測到的編碼 + 常用編碼
-        encodings_to_try = [detected_encoding] + [
-            enc for enc in self.CSV_ENCODINGS if enc != detected_encoding
-        ]
-        
-        for encoding in encodings_to_try:
+        encoding = self._detect_encoding(file_path)
+        read_options = self._csv_read_options(file_path, encoding)
+        df = self._parse_with_encoding(
+            lambda enc: pd.read_csv(self._source(file_path), encoding=enc, **read_options), encoding
+        )
+        logger.info(f"成功使用 {self.encoding_info['encoding']} 編碼讀取 CSV 檔案")
+        return df
+    
+    def _detect_encoding(self, file_path: str) -> str:
+        """以檔案樣本偵測編碼，並記錄偵測結果與信心值"""
+        if self.compression:
+            # 壓縮檔無法跳躍讀取，只以解壓縮後的開頭作為樣本
+            with self._open_binary(file_path) as f:
+                encoding, confidence = detect_encoding(
+                    f, self.CSV_ENCODINGS, max_sample_bytes=settings.ENCODING_SAMPLE_BYTES
+                )
+        else:
+            encoding, confidence = detect_encoding(
+                file_path, self.CSV_ENCODINGS, max_sample_bytes=settings.ENCODING_SAMPLE_BYTES
+            )
+        self.encoding_info = {"encoding": encoding, "encoding_confidence": confidence}
+        logger.info(f"偵測到檔案編碼: {encoding} (信心值 {confidence})")
+        return encoding
+    
+    def _parse_with_encoding(self, parse, encoding: str):
+        """
+        以偵測到的編碼解析一次檔案
+        
+        僅在樣本以外出現無法解碼的內容時，才依序改用其他候選編碼重新解析。
+        """
+        try:
+            return parse(encoding)
+        except (UnicodeDecodeError, UnicodeError) as e:
+            logger.warning(f"使用 {encoding} 編碼讀取失敗: {str(e)}")
+        
+        fallbacks = [enc for enc in self.CSV_ENCODINGS if enc != encoding]
+        for fallback in fallbacks:
             try:
-                logger.info(f"嘗試使用編碼讀取 CSV: {encoding}")
-                df = pd.read_csv(file_path, encoding=encoding)
-                logger.info(f"成功使用 {encoding} 編碼讀取 CSV 檔案")
-                return df
-            except (UnicodeDecodeError, UnicodeError, pd.errors.ParserError) as e:
-                logger.warning(f"使用 {encoding} 編碼讀取失敗: {str(e)}")
+                result = parse(fallback)
+            except (UnicodeDecodeError, UnicodeError) as e:
+                logger.warning(f"使用 {fallback} 編碼讀取失敗: {str(e)}")
                 continue
+            self.encoding_info = {"encoding": fallback, "encoding_confidence": 0.0}
+            return result
         
-        raise ValueError(f"無法讀取 CSV 檔案，已嘗試編碼: {encodings_to_try}")
+        raise ValueError(f"無法讀取檔案，已嘗試編碼: {[encoding] + fallbacks}")
     
-    async def _read_txt_file(self, file_path: str) -> pd.DataFrame:
-        """讀取 TXT 檔案，嘗試自動檢測分隔符"""
-        # 檢測編碼
-        with open(file_path, 'rb') as f:
-            raw_data = f.read()
-            detected = chardet.detect(raw_data)
-            encoding = detected.get('encoding', 'utf-8')
-        
-        # 嘗試不同的分隔符
-        separators = ['\t', ',', ';', '|']
+    def _read_txt_file(self, file_path: str) -> pd.DataFrame:
+        """讀取 TXT 檔案，以樣本偵測分隔符後只完整解析一次"""
+        encoding = self._detect_encoding(file_path)
+        read_options = self._txt_read_options(file_path, encoding)
         
-        for sep in separators:
+        if read_options is not None:
             try:
-                df = pd.read_csv(file_path, encoding=encoding, sep=sep)
-                if len(df.columns) > 1:  # 如果成功分割成多欄
-                    logger.info(f"TXT 檔案使用分隔符 '{sep}' 和編碼 '{encoding}' 讀取成功")
-                    return df
-            except Exception as e:
-                continue
+                df = self._parse_with_encoding(
+                    lambda enc: pd.read_csv(self._source(file_path), encoding=enc, **read_options), encoding
+                )
+                logger.info(f"TXT 檔案使用分隔符 {read_options['sep']!r} 和編碼 '{encoding}' 讀取成功")
+                return df
+            except pd.errors.ParserError as e:
+                if self.dialect_override:
+                    raise ValueError(f"無法以指定的格式讀取 TXT 檔案: {str(e)}")
+                logger.warning(f"TXT 檔案分隔符偵測結果無法解析整個檔案: {str(e)}")
         
-        # 如果都失敗，當作單欄位檔案處理
+        # 無法分欄時，當作單欄位檔案處理
         try:
-            with open(file_path, 'r', encoding=encoding) as f:
+            with self._open_text(file_path, encoding) as f:
                 lines = [line.strip() for line in f.readlines() if line.strip()]
                 df = pd.DataFrame({'content': lines})
                 logger.info(f"TXT 檔案當作單欄位處理，編碼: {encoding}")
@@ -162,84 +521,1031 @@ class FileProcessor:
         except Exception as e:
             raise ValueError(f"無法讀取 TXT 檔案: {str(e)}")
     
-    async def _split_by_column(
+    def _csv_read_options(self, file_path: str, encoding: str) -> Dict:
+        """CSV 讀取參數：預設逗號分隔且有標題列，可由使用者指定的格式覆寫"""
+        if not self.dialect_override:
+            return {}
+        dialect = {"sep": ",", "quotechar": '"', "header": True, **self.dialect_override}
+        return self._dialect_read_options(file_path, encoding, dialect)
+    
+    def _txt_read_options(self, file_path: str, encoding: str) -> Optional[Dict]:
+        """
+        TXT 讀取參數：從檔案開頭的小樣本偵測分隔符、引號與標題列
+        
+        使用者指定的格式優先於偵測結果；無法分欄時回傳 None。
+        """
+        with self._open_binary(file_path) as f:
+            raw_sample = f.read(settings.DIALECT_SAMPLE_BYTES + 1)
+        complete = len(raw_sample) <= settings.DIALECT_SAMPLE_BYTES
+        sample = raw_sample[:settings.DIALECT_SAMPLE_BYTES].decode(encoding, errors='ignore')
+        dialect = sniff_dialect(sample, complete=complete)
+        
+        if dialect is None and 'sep' not in self.dialect_override:
+            return None
+        dialect = {**(dialect or {"quotechar": '"', "header": True}), **self.dialect_override}
+        logger.info(f"TXT 檔案格式: 分隔符 {dialect['sep']!r}，標題列 {dialect['header']}")
+        return self._dialect_read_options(file_path, encoding, dialect)
+    
+    def _dialect_read_options(self, file_path: str, encoding: str, dialect: Dict) -> Dict:
+        """將格式設定轉換為 pd.read_csv 參數；沒有標題列時以 column_N 命名欄位"""
+        read_options = {"sep": dialect["sep"], "quotechar": dialect["quotechar"]}
+        self.write_header = dialect["header"]
+        if not self.write_header:
+            first_row = pd.read_csv(
+                self._source(file_path), encoding=encoding, header=None, nrows=1, encoding_errors='ignore',
+                **read_options
+            )
+            read_options["header"] = None
+            read_options["names"] = [f"column_{i+1}" for i in range(len(first_row.columns))]
+        return read_options
+    
+    def _split_by_column(
         self, 
         df: pd.DataFrame, 
-        column_name: str, 
+        split_key: Union[str, Tuple[str, ...]], 
         batch_size: Optional[int] = None
-    ) -> Dict[str, pd.DataFrame]:
-        """按欄位值切分資料"""
-        split_results = {}
+    ) -> Dict[Union[str, Tuple[str, ...]], pd.DataFrame]:
+        """
+        按欄位值切分資料
         
-        # 按欄位值分組
-        grouped = df.groupby(column_name)
+        欄位值只做一次 factorize（排序後的群組編號）與一次穩定排序，依排序結果
+        重排資料後，每個群組（及批次）都是連續列範圍的切片，不另外複製資料。
+        群組依值排序、群組內保持原始順序，空值歸入最後的「空值」群組。
         
-        for group_value, group_df in grouped:
-            # 處理空值
-            group_key = str(group_value) if pd.notna(group_value) else "空值"
-            
-            if batch_size and len(group_df) > batch_size:
-                # 如果指定批次大小且資料超過限制，進一步切分
-                for i, start_idx in enumerate(range(0, len(group_df), batch_size)):
-                    end_idx = min(start_idx + batch_size, len(group_df))
-                    batch_df = group_df.iloc[start_idx:end_idx].copy()
-                    batch_key = f"{group_key}_batch_{i+1}"
-                    split_results[batch_key] = batch_df
+        split_key 為多個欄位（組合鍵）時，各欄位的編號依序合併為單一編號（混合進位），
+        仍只需一次排序；群組鍵為各層值的 tuple，依第一層、第二層…的順序排列。
+        """
+        key_columns = [split_key] if isinstance(split_key, str) else list(split_key)
+        codes = np.zeros(len(df), dtype=np.int64)
+        code_bound = 1
+        level_codes = []
+        level_keys = []
+        for column in key_columns:
+            column_codes, uniques = pd.factorize(df[column], sort=True)
+            # 空值（編號 -1）排到最後
+            null_code = len(uniques)
+            column_codes = np.where(column_codes < 0, null_code, column_codes)
+            if code_bound * (null_code + 1) > np.iinfo(np.int64).max:
+                # 組合編號會溢位時先壓縮為連續編號（保持順序）
+                codes = np.unique(codes, return_inverse=True)[1].astype(np.int64)
+                code_bound = int(codes.max()) + 1
+            codes = codes * (null_code + 1) + column_codes
+            code_bound *= null_code + 1
+            level_codes.append(column_codes)
+            level_keys.append([str(value) for value in uniques] + ["空值"])
+        order = np.argsort(codes, kind='stable')
+        sorted_df = df.take(order)
+        
+        split_results = {}
+        if len(df):
+            sorted_codes = codes[order]
+            offsets = np.concatenate(([0], np.flatnonzero(np.diff(sorted_codes)) + 1, [len(df)]))
+        else:
+            offsets = np.zeros(1, dtype=np.int64)
+        for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist()):
+            row = order[start]
+            group_key = tuple(keys[level[row]] for keys, level in zip(level_keys, level_codes))
+            if isinstance(split_key, str):
+                group_key = group_key[0]
+            if batch_size and end - start > batch_size:
+                # 如果指定批次大小且資料超過限制，依偏移量進一步切分
+                for i, batch_start in enumerate(range(start, end, batch_size)):
+                    batch_key = _batch_key(group_key, i + 1)
+                    split_results[batch_key] = sorted_df.iloc[batch_start:min(batch_start + batch_size, end)]
             else:
-                split_results[group_key] = group_df.copy()
+                split_results[group_key] = sorted_df.iloc[start:end]
         
         logger.info(f"成功切分為 {len(split_results)} 個群組")
         return split_results
     
-    async def _generate_output_files(
-        self, 
-        split_results: Dict[str, pd.DataFrame], 
-        file_extension: str, 
-        original_filename: str
-    ) -> List[str]:
-        """生成輸出檔案"""
-        output_files = []
-        base_name = Path(original_filename).stem
-        
+    def _write_split_results(
+        self,
+        archive: ParallelZipWriter,
+        split_results: Dict[str, pd.DataFrame],
+        file_extension: str,
+        base_name: str,
+        split_column: str
+    ) -> List[Dict]:
+        """將一個切分欄位的各群組依序序列化為 ZIP 項目，回傳 file_details"""
+        file_details = []
         for group_key, group_df in split_results.items():
-            # 清理檔名中的特殊字符
-            safe_group_key = self._sanitize_filename(group_key)
-            output_filename = f"{base_name}_{safe_group_key}{file_extension}"
-            output_path = os.path.join(self.temp_dir, output_filename)
-            
-            # 根據檔案類型儲存
-            if file_extension == '.csv':
-                group_df.to_csv(output_path, index=False, encoding='utf-8')
-            elif file_extension in ['.xlsx', '.xls']:
-                group_df.to_excel(output_path, index=False)
-            elif file_extension == '.txt':
-                # TXT 檔案特殊處理
-                if 'content' in group_df.columns and len(group_df.columns) == 1:
-                    # 單欄位內容直接寫入
-                    with open(output_path, 'w', encoding='utf-8') as f:
-                        for content in group_df['content']:
-                            f.write(f"{content}\n")
-                else:
-                    # 多欄位用 tab 分隔
-                    group_df.to_csv(output_path, index=False, sep='\t', encoding='utf-8')
-            
-            output_files.append(output_path)
+            output_filename = self._output_filename(split_column, base_name, group_key, file_extension)
+            buffer = io.BytesIO()
+            self._write_group(group_df, buffer, file_extension)
+            # xlsx 本身已是壓縮格式，不再重複壓縮
+            archive.add(output_filename, buffer.getbuffer(), compress=file_extension not in ('.xlsx', '.xls'))
             logger.info(f"生成輸出檔案: {output_filename} ({len(group_df)} 行)")
+            file_details.append(self._file_detail(split_column, base_name, group_key, len(group_df), file_extension))
+        return file_details
+    
+    @staticmethod
+    def _split_keys(column_name: Union[str, List[Union[str, List[str]]]]) -> List[Union[str, Tuple[str, ...]]]:
+        """整理切分欄位：組合鍵轉為 tuple（只有一個欄位時視同單一欄位），並去除重複"""
+        if isinstance(column_name, str):
+            return [column_name]
+        split_keys = []
+        for split_key in column_name:
+            if not isinstance(split_key, str):
+                split_key = tuple(split_key)
+                if len(split_key) == 1:
+                    split_key = split_key[0]
+            split_keys.append(split_key)
+        return list(dict.fromkeys(split_keys))
+    
+    def _split_folders(self, column_names: List[Union[str, Tuple[str, ...]]]) -> Dict:
+        """多欄位切分時各切分欄位在 ZIP 內的資料夾（以 / 結尾）；單一欄位時不建立資料夾"""
+        if len(column_names) == 1:
+            return {column_names[0]: ""}
+        folders = {}
+        for split_key in column_names:
+            folder = self._sanitize_filename(split_key if isinstance(split_key, str) else "_".join(split_key))
+            candidate = folder
+            suffix = 2
+            # 清理後同名的欄位加上編號，避免結果互相覆蓋
+            while f"{candidate}/" in folders.values():
+                candidate = f"{folder}_{suffix}"
+                suffix += 1
+            folders[split_key] = f"{candidate}/"
+        return folders
+    
+    @staticmethod
+    def _check_split_columns(column_names: List[Union[str, Tuple[str, ...]]], columns: List[str]):
+        """確認所有切分欄位（含組合鍵的各欄位）都存在"""
+        for split_key in column_names:
+            for column in ([split_key] if isinstance(split_key, str) else split_key):
+                if column not in columns:
+                    raise ValueError(f"欄位 '{column}' 不存在。可用欄位: {columns}")
+    
+    def _output_filename(self, split_key, base_name: str, group_key, file_extension: str) -> str:
+        """ZIP 項目名稱（清理群組值中的特殊字符）；組合鍵的上層值作為巢狀資料夾"""
+        *parents, leaf = group_key if isinstance(group_key, tuple) else (group_key,)
+        directories = "".join(f"{self._sanitize_filename(parent)}/" for parent in parents)
+        safe_group_key = self._sanitize_filename(leaf)
+        return f"{self.split_folders[split_key]}{directories}{base_name}_{safe_group_key}{file_extension}"
+    
+    def _file_detail(self, split_key, base_name: str, group_key, row_count: int, file_extension: str) -> Dict:
+        *parents, leaf = group_key if isinstance(group_key, tuple) else (group_key,)
+        directories = "".join(f"{parent}/" for parent in parents)
+        return {
+            "split_column": split_key,
+            "group_value": "/".join(group_key) if isinstance(group_key, tuple) else group_key,
+            "row_count": row_count,
+            "filename": f"{self.split_folders[split_key]}{directories}{base_name}_{leaf}{file_extension}"
+        }
+    
+    def _split_result(self, total_rows: int, file_details: List[Dict], zip_path: str) -> Dict:
+        """各切分模式共用的結果格式"""
+        return {
+            "success": True,
+            "total_rows": total_rows,
+            "split_columns": list(self.split_folders),
+            "split_groups": len(file_details),
+            "output_files": len(file_details),
+            "zip_path": zip_path,
+            **self.encoding_info,
+            **self.compression_info,
+            "file_details": file_details
+        }
+    
+    def _write_group(self, group_df: pd.DataFrame, entry, file_extension: str):
+        """將單一群組序列化到二進位串流"""
+        # 根據檔案類型儲存
+        if file_extension == '.csv':
+            group_df.to_csv(entry, index=False, header=self.write_header, encoding='utf-8')
+        elif file_extension in ['.xlsx', '.xls']:
+            group_df.to_excel(entry, index=False)
+        elif file_extension == '.txt':
+            # TXT 檔案特殊處理
+            if 'content' in group_df.columns and len(group_df.columns) == 1:
+                # 單欄位內容直接寫入
+                f = io.TextIOWrapper(entry, encoding='utf-8', newline='')
+                for content in group_df['content']:
+                    f.write(f"{content}\n")
+                f.flush()
+                f.detach()
+            else:
+                # 多欄位用 tab 分隔
+                group_df.to_csv(
+                    entry, index=False, header=self.write_header, sep='\t', encoding='utf-8'
+                )
+    
+    @contextmanager
+    def _open_zip_archive(self):
+        """
+        建立輸出 ZIP 檔；各群組直接加入壓縮檔，暫存空間只保留最終的壓縮檔
+        
+        各項目依 ARCHIVE_COMPRESSION 設定在執行緒池中並行壓縮，依序寫入。
+        每寫完一個項目就更新寫入進度，串流下載可以在處理完成前傳送已完成的部分；
+        結束時寫入中央目錄並標記為完成，壓縮統計記錄在 compression_info。
+        """
+        zip_path = os.path.join(self.temp_dir, self.ZIP_FILENAME)
+        # 先移除前一次執行的進度檔與 ZIP，再建立新檔：
+        # 舊 ZIP 可能與結果快取共用同一份內容（硬連結），不可就地截斷
+        for path in (os.path.join(self.temp_dir, self.ZIP_PROGRESS_FILENAME), zip_path):
+            if os.path.exists(path):
+                os.remove(path)
+        # 每次寫入使用新的識別碼，任務重試時下載端可以發現檔案已被重寫
+        self._zip_run_id = uuid.uuid4().hex
+        with ParallelZipWriter(
+            zip_path,
+            method=settings.ARCHIVE_COMPRESSION,
+            level=settings.ARCHIVE_COMPRESSION_LEVEL,
+            threads=settings.ARCHIVE_COMPRESSION_THREADS,
+            on_entry=self._on_zip_entry
+        ) as archive:
+            # ZIP 檔建立後才發布進度，串流下載看到進度時一定能開啟檔案
+            self._publish_zip_progress(0)
+            yield archive
+        self._publish_zip_progress(os.path.getsize(zip_path), complete=True)
+        
+        summary = archive.summary()
+        self.compression_info = {"compression": summary}
+        logger.info(
+            f"ZIP 壓縮完成: {summary['method']} 等級 {summary['level']}，"
+            f"{summary['uncompressed_bytes']} → {summary['compressed_bytes']} bytes（比例 {summary['ratio']}），"
+            f"壓縮耗時 {summary['compress_seconds']} 秒"
+        )
+    
+    def _on_zip_entry(self, offset: int):
+        self._publish_zip_progress(offset)
+        self.progress.entry_written()
+    
+    def _publish_zip_progress(self, offset: int, complete: bool = False):
+        """以原子性改名寫入 ZIP 進度檔，讀取端不會讀到寫入一半的內容"""
+        progress_path = os.path.join(self.temp_dir, self.ZIP_PROGRESS_FILENAME)
+        tmp_path = f"{progress_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"run_id": self._zip_run_id, "offset": offset, "complete": complete}, f)
+        os.replace(tmp_path, progress_path)
+    
+    def _use_arrow_backend(self, file_extension: str) -> bool:
+        """判斷是否以 Arrow 後端處理 CSV/TXT"""
+        if settings.CSV_BACKEND != 'arrow' or file_extension not in ('.csv', '.txt'):
+            return False
+        if not arrow_available():
+            logger.warning("未安裝 pyarrow，CSV 處理改用 pandas")
+            return False
+        return True
+    
+    @staticmethod
+    def _use_passthrough_backend(file_extension: str) -> bool:
+        """判斷是否以位元組直通模式處理（只適用 CSV/TXT）"""
+        return settings.CSV_BACKEND == 'passthrough' and file_extension in ('.csv', '.txt')
+    
+    def _columnar_cache_key(
+        self, file_path: str, file_extension: str, content_hash: Optional[str], use_arrow: bool
+    ) -> Optional[str]:
+        """
+        欄式快取鍵；只快取 CSV/TXT
+        
+        pandas 後端處理串流大小的檔案時不使用快取，避免整個資料表載入記憶體。
+        """
+        if not content_hash or not self.columnar_cache.enabled or file_extension not in ('.csv', '.txt'):
+            return None
+        if not use_arrow and self._should_stream(file_path, file_extension):
+            return None
+        return self.columnar_cache.make_key(content_hash, file_extension, self.dialect_override)
+    
+    def _load_columnar_cache(self, cache_key: Optional[str]):
+        """讀取欄式快取並還原解析資訊，沒有快取時回傳 None"""
+        if cache_key is None:
+            return None
+        cached = self.columnar_cache.load(cache_key)
+        if cached is None:
+            return None
+        table, metadata = cached
+        self.encoding_info = {
+            "encoding": metadata.get("encoding"),
+            "encoding_confidence": metadata.get("encoding_confidence")
+        }
+        self.write_header = metadata.get("write_header", True)
+        return table
+    
+    def _store_columnar_cache(self, cache_key: Optional[str], data):
+        """將解析結果（Arrow 資料表或 DataFrame）寫入欄式快取"""
+        if cache_key is None:
+            return
+        metadata = {**self.encoding_info, "write_header": self.write_header}
+        if isinstance(data, pd.DataFrame):
+            self.columnar_cache.store_dataframe(cache_key, data, metadata)
+        else:
+            self.columnar_cache.store(cache_key, data, metadata)
+    
+    @staticmethod
+    def _is_txt_content(columns: List[str], file_extension: str) -> bool:
+        """是否為無法分欄、以單欄位 content 處理的 TXT"""
+        return file_extension == '.txt' and list(columns) == ['content']
+    
+    def _read_arrow_table(self, file_path: str, file_extension: str):
+        """
+        以多執行緒 Arrow CSV 讀取器讀取整個檔案
+        
+        檔案無法由 Arrow 以與 pandas 相同的方式解析（欄位數不一致、無法分欄的 TXT、
+        需改名的標題）時回傳 None，改由 pandas 處理。
+        """
+        encoding = self._detect_encoding(file_path)
+        if file_extension == '.csv':
+            read_options = self._csv_read_options(file_path, encoding) or {}
+        else:
+            read_options = self._txt_read_options(file_path, encoding)
+            if read_options is None:
+                return None
+        
+        try:
+            table = self._parse_with_encoding(
+                lambda enc: read_csv_table(
+                    partial(self._open_binary, file_path) if self.compression else file_path,
+                    enc,
+                    sep=read_options.get('sep', ','),
+                    quotechar=read_options.get('quotechar', '"'),
+                    column_names=read_options.get('names')
+                ),
+                encoding
+            )
+        except ArrowParseError as e:
+            logger.warning(f"Arrow 無法解析檔案，改用 pandas: {str(e)}")
+            return None
+        
+        if not has_pandas_compatible_header(table):
+            logger.info("檔案標題含空白或重複欄位名稱，改用 pandas")
+            return None
+        logger.info(f"成功使用 {self.encoding_info['encoding']} 編碼以 Arrow 讀取檔案")
+        return table
+    
+    def _split_arrow_table(
+        self,
+        table,
+        file_extension: str,
+        original_filename: str,
+        column_names: List[str],
+        batch_size: Optional[int] = None
+    ) -> Dict:
+        """
+        Arrow 切分：以 Arrow 排序與計數運算分組後寫出
+        
+        群組順序與輸出文字皆與 pandas 模式相同。
+        """
+        self._check_split_columns(column_names, table.column_names)
+        self.progress.stage(
+            "writing",
+            rows_processed=table.num_rows,
+            bytes_processed=self.progress.state["bytes_total"],
+            groups_total=sum(count_groups(table, split_column) for split_column in column_names)
+        )
+        
+        sep = '\t' if file_extension == '.txt' else ','
+        formatted = format_table_like_pandas(table)
+        # 需要引號的值交由 pandas 寫出，引號規則才會與 pandas 完全相同
+        use_arrow_writer = not needs_quoting(formatted, sep)
+        
+        base_name = Path(original_filename).stem
+        file_details = []
+        with self._open_zip_archive() as archive:
+            for split_column in column_names:
+                for part_key, part_indices in self._iter_arrow_parts(table, split_column, batch_size):
+                    part = formatted.take(part_indices)
+                    output_filename = self._output_filename(split_column, base_name, part_key, file_extension)
+                    buffer = io.BytesIO()
+                    if use_arrow_writer:
+                        write_csv_table(part, buffer, sep, self.write_header)
+                    else:
+                        part.to_pandas().to_csv(
+                            buffer, index=False, header=self.write_header, sep=sep, encoding='utf-8'
+                        )
+                    archive.add(output_filename, buffer.getbuffer())
+                    logger.info(f"生成輸出檔案: {output_filename} ({part.num_rows} 行)")
+                    file_details.append(
+                        self._file_detail(split_column, base_name, part_key, part.num_rows, file_extension)
+                    )
+        
+        logger.info(f"Arrow 模式成功切分為 {len(file_details)} 個群組")
+        
+        return self._split_result(table.num_rows, file_details, archive.filename)
+    
+    @staticmethod
+    def _iter_arrow_parts(table, column_name: str, batch_size: Optional[int] = None):
+        """依群組（及批次）產生 (群組鍵, 列索引)"""
+        for group_value, indices in iter_groups(table, column_name):
+            group_key = str(group_value) if group_value is not None else "空值"
+            if batch_size and len(indices) > batch_size:
+                for i, start in enumerate(range(0, len(indices), batch_size)):
+                    yield f"{group_key}_batch_{i+1}", indices.slice(start, batch_size)
+            else:
+                yield group_key, indices
+    
+    def _should_stream(self, file_path: str, file_extension: str) -> bool:
+        """判斷是否以串流模式處理（大型 CSV/TXT，或使用快速 Excel 引擎）"""
+        if file_extension in ('.xlsx', '.xls'):
+            return self._excel_engine(file_extension) != 'pandas'
+        if not settings.STREAMING_SPLIT_ENABLED or file_extension not in ('.csv', '.txt'):
+            return False
+        if self.compression:
+            # 解壓縮後的大小要讀完才知道，壓縮檔一律串流處理，記憶體用量不受壓縮率影響
+            return True
+        threshold_bytes = settings.STREAMING_MIN_FILE_MB * 1024 * 1024
+        return os.path.getsize(file_path) >= threshold_bytes
+    
+    def _process_file_streaming(
+        self,
+        file_path: str,
+        file_extension: str,
+        original_filename: str,
+        column_names: List[str],
+        batch_size: Optional[int] = None
+    ) -> Dict:
+        """
+        串流切分：以固定行數區塊讀取檔案，逐塊將資料列附加到各群組的輸出檔
+        
+        記憶體中同時只保留一個區塊，輸出結果與 file_details 與一般模式一致。
+        多個切分欄位共用同一次讀取，每個區塊依各欄位分別分組。
+        """
+        chunk_rows = settings.STREAMING_CHUNK_ROWS
+        columns, chunks = self._open_streaming_source(file_path, file_extension, chunk_rows)
+        output_extension = self._output_extension(file_extension)
+        
+        self._check_split_columns(column_names, columns)
+        
+        spool_dir = os.path.join(self.temp_dir, ".stream")
+        os.makedirs(spool_dir, exist_ok=True)
+        
+        groups: Dict[str, Dict] = {split_column: {} for split_column in column_names}
+        group_ids = count()
+        total_rows = 0
+        self.progress.stage("reading", bytes_processed=0)
+        for chunk in chunks:
+            total_rows += len(chunk)
+            self.progress.update(rows_processed=total_rows, bytes_processed=self._input_bytes_read())
+            for split_column, column_groups in groups.items():
+                by = split_column if isinstance(split_column, str) else list(split_column)
+                for group_value, part in chunk.groupby(by, sort=False, dropna=False):
+                    # 各區塊的 NaN 不是同一個物件，統一以 None 作為空值群組的鍵
+                    key = _null_key(group_value)
+                    group = column_groups.get(key)
+                    if group is None:
+                        group = _StreamingGroup(group_value, next(group_ids), spool_dir)
+                        column_groups[key] = group
+                    group.append(part, batch_size, self._write_group_chunk, output_extension)
+        
+        self.progress.stage(
+            "writing",
+            bytes_processed=self.progress.state["bytes_total"],
+            groups_total=sum(len(column_groups) for column_groups in groups.values())
+        )
+        base_name = Path(original_filename).stem
+        file_details = []
+        with self._open_zip_archive() as archive:
+            for split_column, column_groups in groups.items():
+                # 與一般模式相同依群組值排序，空值群組（組合鍵為各層的空值）排在最後
+                try:
+                    ordered_keys = sorted(column_groups, key=_streaming_sort_key)
+                except TypeError:
+                    ordered_keys = sorted(column_groups, key=partial(_streaming_sort_key, by_type=True))
+                
+                for key in ordered_keys:
+                    for group_key, part_path, row_count in column_groups[key].finalize(batch_size):
+                        output_filename = self._output_filename(split_column, base_name, group_key, output_extension)
+                        self._finalize_group_output(part_path, archive, output_filename, output_extension)
+                        logger.info(f"生成輸出檔案: {output_filename} ({row_count} 行)")
+                        file_details.append(
+                            self._file_detail(split_column, base_name, group_key, row_count, output_extension)
+                        )
+        
+        logger.info(f"串流模式成功切分為 {len(file_details)} 個群組")
+        
+        return self._split_result(total_rows, file_details, archive.filename)
+    
+    def _process_file_passthrough(
+        self,
+        file_path: str,
+        file_extension: str,
+        original_filename: str,
+        column_names: List[str],
+        batch_size: Optional[int] = None
+    ) -> Dict:
+        """
+        位元組直通切分：只找出每筆資料列的切分欄位，原始位元組直接附加到群組輸出檔
+        
+        不推斷型別也不重新格式化，前導零、數字格式與 TXT 的分隔符保持原樣；輸出預設轉為 UTF-8，
+        PASSTHROUGH_KEEP_ENCODING 時保留原始編碼。群組依原始文字區分（01 與 1 為不同群組），
+        全部為數字時依數值排序，否則依解碼後的文字排序（與一般模式相同），空值群組排在最後。
+        大型檔案依資料列邊界切成位元組範圍，由多個行程並行分組，輸出與逐一處理相同。
+        
+        Raises:
+            PassthroughUnsupportedError: 編碼、分隔符或標題列不適用，應改用一般模式
+            UnicodeError: 內容無法以偵測到的編碼解碼
+        """
+        if self.compression:
+            raise PassthroughUnsupportedError("壓縮檔無法依位元組位置直接複製資料列")
+        encoding = self._detect_encoding(file_path)
+        if file_extension == '.txt':
+            read_options = self._txt_read_options(file_path, encoding)
+            if read_options is None:
+                raise PassthroughUnsupportedError("無法偵測 TXT 檔案的分隔符")
+        else:
+            read_options = self._csv_read_options(file_path, encoding)
+        sep = read_options.get('sep', ',')
+        quotechar = read_options.get('quotechar', '"')
+        if not passthrough_supported(encoding, sep, quotechar):
+            raise PassthroughUnsupportedError(f"無法在 {encoding} 編碼的位元組中直接尋找分隔符 {sep!r}")
+        sep_bytes = sep.encode('ascii')
+        quote_bytes = quotechar.encode('ascii')
+        
+        header, data_start = read_header(file_path, quote_bytes, self.write_header)
+        if header is not None:
+            columns = [field.decode(encoding) for field in split_fields(header, sep_bytes, quote_bytes)]
+            if not all(columns) or len(set(columns)) != len(columns):
+                # pandas 會改名為 Unnamed: N 或加上 .1 後綴，交由一般模式處理
+                raise PassthroughUnsupportedError("標題列有空白或重複的欄位名稱")
+        else:
+            columns = read_options["names"]
+        
+        self._check_split_columns(column_names, columns)
+        if not all(isinstance(split_key, str) for split_key in column_names):
+            raise PassthroughUnsupportedError("組合鍵切分需要解析多個欄位")
+        transcode = not settings.PASSTHROUGH_KEEP_ENCODING and codecs.lookup(encoding).name not in ('utf-8', 'ascii')
+        
+        spool_dir = os.path.join(self.temp_dir, ".passthrough")
+        os.makedirs(spool_dir, exist_ok=True)
+        options = {
+            "indices": [columns.index(split_column) for split_column in column_names],
+            "sep": sep_bytes,
+            "quote": quote_bytes,
+            "encoding": encoding,
+            "transcode": transcode,
+        }
+        
+        workers = self._passthrough_workers(file_path)
+        if workers > 1:
+            total_rows, column_groups = self._group_passthrough_parallel(
+                file_path, data_start, header, batch_size, spool_dir, workers, options
+            )
+        else:
+            total_rows, column_groups = self._group_passthrough_serial(
+                file_path, data_start, header, batch_size, spool_dir, options
+            )
+        
+        self.progress.stage(
+            "writing",
+            rows_processed=total_rows,
+            bytes_processed=self.progress.state["bytes_total"],
+            groups_total=sum(len(entries) for groups in column_groups for entries in groups.values())
+        )
+        base_name = Path(original_filename).stem
+        file_details = []
+        with self._open_zip_archive() as archive:
+            for split_column, groups in zip(column_names, column_groups):
+                null_group = groups.pop(None, None)
+                try:
+                    ordered_keys = sorted(groups, key=float)
+                except ValueError:
+                    # 欄位值為原始位元組，依解碼後的文字排序（Big5 的位元組順序與文字順序不同）
+                    ordered_keys = sorted(groups, key=lambda key: key.decode(encoding))
+                ordered_groups = [groups[key] for key in ordered_keys]
+                if null_group is not None:
+                    ordered_groups.append(null_group)
+                
+                for entries in ordered_groups:
+                    for group_key, segments, row_count, on_done in entries:
+                        output_filename = self._output_filename(split_column, base_name, group_key, file_extension)
+                        archive.add_segments(output_filename, segments, on_done=on_done)
+                        logger.info(f"生成輸出檔案: {output_filename} ({row_count} 行)")
+                        file_details.append(
+                            self._file_detail(split_column, base_name, group_key, row_count, file_extension)
+                        )
+        
+        shutil.rmtree(spool_dir, ignore_errors=True)
+        logger.info(f"位元組直通模式成功切分為 {len(file_details)} 個群組")
+        
+        return self._split_result(total_rows, file_details, archive.filename)
+    
+    @staticmethod
+    def _passthrough_workers(file_path: str) -> int:
+        """並行分組的行程數；檔案小於 PASSTHROUGH_PARALLEL_MIN_BYTES 時逐一處理"""
+        workers = settings.PASSTHROUGH_WORKERS or os.cpu_count() or 1
+        if workers > 1 and os.path.getsize(file_path) >= settings.PASSTHROUGH_PARALLEL_MIN_BYTES:
+            return workers
+        return 1
+    
+    def _group_passthrough_serial(
+        self,
+        file_path: str,
+        data_start: int,
+        header: Optional[bytes],
+        batch_size: Optional[int],
+        spool_dir: str,
+        options: Dict
+    ) -> Tuple[int, Dict]:
+        """
+        在目前行程中逐區塊分組，資料列直接寫入各批次的暫存檔
+        
+        Returns:
+            (資料列數, 各切分欄位的 {欄位值: [(群組鍵, 檔案片段, 行數, 讀取完成後的回呼)]})
+        """
+        encoding = options["encoding"]
+        
+        def convert(data) -> bytes:
+            return str(data, encoding).encode('utf-8') if options["transcode"] else data
+        
+        def write_chunk(rows: RowBlock, output_path: str, file_extension: str, header_row: bool):
+            with open(output_path, 'ab') as f:
+                if header_row and header is not None:
+                    f.write(convert(header + b'\n'))
+                f.write(convert(rows.data))
+        
+        groupers = [BlockGrouper(index, options["sep"], options["quote"]) for index in options["indices"]]
+        groups: Dict = {}  # (切分欄位順序, 欄位值) -> _PassthroughGroup
+        buffers: Dict = {}
+        buffered_bytes = 0
+        
+        def flush():
+            for (position, key), parts in buffers.items():
+                group = groups.get((position, key))
+                if group is None:
+                    group_value = key.decode(encoding) if key is not None else None
+                    group = _PassthroughGroup(group_value, len(groups), spool_dir)
+                    groups[(position, key)] = group
+                for rows in parts:
+                    group.append(rows, batch_size, write_chunk, '.csv')
+            buffers.clear()
+        
+        def collect(position: int, grouped: Dict):
+            for key, rows in grouped.items():
+                buffers.setdefault((position, key), []).append(rows)
+        
+        bytes_read = data_start
+        for block in iter_line_blocks(file_path, data_start, settings.PASSTHROUGH_BLOCK_BYTES):
+            for position, grouper in enumerate(groupers):
+                collect(position, grouper.group(block))
+            buffered_bytes += len(block)
+            bytes_read += len(block)
+            self.progress.update(rows_processed=groupers[0].rows, bytes_processed=bytes_read)
+            if buffered_bytes >= settings.PASSTHROUGH_BUFFER_BYTES:
+                flush()
+                buffered_bytes = 0
+        for position, grouper in enumerate(groupers):
+            collect(position, grouper.finish())
+        flush()
+        
+        column_groups = [{} for _ in groupers]
+        for (position, key), group in groups.items():
+            column_groups[position][key] = [
+                (group_key, [(part_path, 0, None)], row_count, partial(os.remove, part_path))
+                for group_key, part_path, row_count in group.finalize(batch_size)
+            ]
+        return groupers[0].rows, column_groups
+    
+    def _group_passthrough_parallel(
+        self,
+        file_path: str,
+        data_start: int,
+        header: Optional[bytes],
+        batch_size: Optional[int],
+        spool_dir: str,
+        workers: int,
+        options: Dict
+    ) -> Tuple[int, Dict]:
+        """
+        依資料列邊界將檔案切成位元組範圍，各範圍在行程池中分組並寫出部分輸出檔
+        
+        每個群組的輸出為標題列加上各範圍的部分輸出檔依範圍順序串接，資料列順序與逐一處理相同；
+        超過批次大小的群組依各資料列的結尾位移切出片段，不需重新寫入檔案。
+        
+        Returns:
+            (資料列數, 各切分欄位的 {欄位值: [(群組鍵, 檔案片段, 行數, 讀取完成後的回呼)]})
+        """
+        boundaries = record_boundaries(
+            file_path, data_start, workers, options["quote"], settings.PASSTHROUGH_BLOCK_BYTES
+        )
+        ranges = list(zip(boundaries[:-1], boundaries[1:]))
+        logger.info(f"位元組直通模式以 {len(ranges)} 個行程並行分組")
+        
+        with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+            futures = [
+                pool.submit(
+                    group_byte_range,
+                    file_path,
+                    start,
+                    end,
+                    spool_prefix=os.path.join(spool_dir, f"range{i}_"),
+                    block_size=settings.PASSTHROUGH_BLOCK_BYTES,
+                    buffer_bytes=max(settings.PASSTHROUGH_BUFFER_BYTES // len(ranges), 1),
+                    track_rows=bool(batch_size),
+                    **options
+                )
+                for i, (start, end) in enumerate(ranges)
+            ]
+            results = [future.result() for future in futures]
+        
+        header_segments = []
+        if header is not None:
+            header_path = os.path.join(spool_dir, "header.part")
+            with open(header_path, 'wb') as f:
+                header_row = header + b'\n'
+                f.write(str(header_row, options["encoding"]).encode('utf-8') if options["transcode"] else header_row)
+            header_segments.append((header_path, 0, None))
+        
+        partials: Dict = {}
+        for _, range_partials in results:
+            for group_id, partial_output in range_partials.items():
+                partials.setdefault(group_id, []).append(partial_output)
         
-        return output_files
+        column_groups = [{} for _ in options["indices"]]
+        for (position, key), parts in partials.items():
+            group_key = key.decode(options["encoding"]) if key is not None else "空值"
+            row_count = sum(rows for _, rows, _ in parts)
+            if not batch_size or row_count <= batch_size:
+                batches = [([(path, 0, None) for path, _, _ in parts], row_count)]
+                names = [group_key]
+            else:
+                batches = self._passthrough_batches(parts, batch_size)
+                names = [f"{group_key}_batch_{i+1}" for i in range(len(batches))]
+            on_done = _release_after(len(batches), [path for path, _, _ in parts])
+            column_groups[position][key] = [
+                (name, header_segments + segments, rows, on_done)
+                for name, (segments, rows) in zip(names, batches)
+            ]
+        
+        return sum(rows for rows, _ in results), column_groups
+    
+    @staticmethod
+    def _passthrough_batches(parts: List[Tuple[str, int, np.ndarray]], batch_size: int) -> List[Tuple[List, int]]:
+        """依批次大小將各部分輸出檔切成片段，回傳 [(檔案片段, 行數)]"""
+        batches = []
+        segments, rows = [], 0
+        for path, part_rows, ends in parts:
+            taken = 0
+            while taken < part_rows:
+                take = min(part_rows - taken, batch_size - rows)
+                start = int(ends[taken - 1]) if taken else 0
+                segments.append((path, start, int(ends[taken + take - 1])))
+                rows += take
+                taken += take
+                if rows == batch_size:
+                    batches.append((segments, rows))
+                    segments, rows = [], 0
+        if rows:
+            batches.append((segments, rows))
+        return batches
     
-    async def _create_zip_archive(self, file_paths: List[str]) -> str:
-        """創建包含所有輸出檔案的 ZIP 壓縮檔"""
-        zip_path = os.path.join(self.temp_dir, "split_results.zip")
+    def _open_streaming_source(self, file_path: str, file_extension: str, chunk_rows: int):
+        """開啟串流資料來源，回傳 (欄位列表, 資料區塊迭代器)"""
+        if file_extension in ('.xlsx', '.xls'):
+            return self._open_excel_chunks(file_path, file_extension, chunk_rows)
+        
+        read_options = self._resolve_streaming_options(file_path, file_extension)
+        if read_options is None:
+            # TXT 無法分欄時，與一般模式相同當作單欄位 content 處理
+            return ['content'], self._iter_txt_lines_chunks(file_path, chunk_rows)
+        
+        columns = read_options.pop('columns')
+        return columns, self._iter_csv_chunks(file_path, chunk_rows, read_options)
+    
+    def _iter_csv_chunks(self, file_path: str, chunk_rows: int, read_options: Dict):
+        """逐塊讀取 CSV/TXT，讀取位置供進度回報使用"""
+        with self._open_tracked(file_path) as f:
+            yield from pd.read_csv(f, chunksize=chunk_rows, **read_options)
+    
+    def _resolve_streaming_options(self, file_path: str, file_extension: str) -> Optional[Dict]:
+        """
+        決定串流讀取參數（編碼、分隔符與各欄位型別）
+        
+        先以區塊掃描整個檔案統一各區塊推斷出的欄位型別，確保第二次讀取時
+        每個區塊的型別與一次性讀取整個檔案時相同。TXT 無法分欄時回傳 None。
+        """
+        detected_encoding = self._detect_encoding(file_path)
         
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for file_path in file_paths:
-                file_name = os.path.basename(file_path)
-                zipf.write(file_path, file_name)
-                logger.info(f"加入 ZIP 檔案: {file_name}")
+        if file_extension == '.csv':
+            read_options = self._csv_read_options(file_path, detected_encoding)
+        else:
+            read_options = self._txt_read_options(file_path, detected_encoding)
+            if read_options is None:
+                logger.info(f"TXT 檔案當作單欄位處理，編碼: {detected_encoding}")
+                return None
         
-        logger.info(f"創建 ZIP 檔案成功: {zip_path}")
-        return zip_path
+        try:
+            columns, dtypes = self._parse_with_encoding(
+                lambda enc: self._scan_chunk_dtypes(file_path, encoding=enc, **read_options),
+                detected_encoding
+            )
+        except pd.errors.ParserError as e:
+            if file_extension == '.csv' or self.dialect_override:
+                raise
+            logger.warning(f"TXT 檔案分隔符偵測結果無法解析整個檔案: {str(e)}")
+            return None
+        
+        encoding = self.encoding_info['encoding']
+        logger.info(f"成功使用 {encoding} 編碼串流讀取檔案")
+        return {"columns": columns, "encoding": encoding, "dtype": dtypes, **read_options}
+    
+    def _scan_chunk_dtypes(self, file_path: str, **read_options) -> Tuple[List[str], Dict]:
+        """分塊掃描檔案，依 pandas 合併區塊的規則統一各欄位型別"""
+        columns: List[str] = []
+        dtypes: Dict = {}
+        self.progress.stage("scanning", bytes_processed=0)
+        with self._open_tracked(file_path) as f:
+            for chunk in pd.read_csv(f, chunksize=settings.STREAMING_CHUNK_ROWS, **read_options):
+                if not columns:
+                    columns = list(chunk.columns)
+                for column, dtype in chunk.dtypes.items():
+                    dtypes[column] = self._merge_dtypes(dtypes.get(column), dtype)
+                self.progress.update(bytes_processed=self._input_bytes_read())
+        return columns, dtypes
+    
+    @staticmethod
+    def _merge_dtypes(current, new):
+        """合併兩個區塊的欄位型別：數值型別取共同型別，其他混合情況退回 object"""
+        if current is None or current == new:
+            return new
+        if current.kind in 'iuf' and new.kind in 'iuf':
+            return np.result_type(current, new)
+        return np.dtype(object)
+    
+    def _iter_txt_lines_chunks(self, file_path: str, chunk_rows: int):
+        """逐塊讀取單欄位 TXT 檔案的非空行"""
+        encoding = self.encoding_info['encoding']
+        lines = []
+        with io.TextIOWrapper(self._open_tracked(file_path), encoding=encoding) as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    lines.append(line)
+                if len(lines) >= chunk_rows:
+                    yield pd.DataFrame({'content': lines})
+                    lines = []
+        if lines:
+            yield pd.DataFrame({'content': lines})
+    
+    def _resolve_input(self, file_path: str, filename: str) -> Tuple[str, str]:
+        """
+        判斷上傳檔案是否為壓縮檔，回傳 (內容的檔名, 副檔名)
+        
+        壓縮檔（data.csv.gz、單一檔案的 ZIP）之後的讀取都經由 _source/_open_binary
+        邊讀取邊解壓縮，不寫出解壓縮後的暫存檔。
+        """
+        self.compression = compression_of(filename)
+        if self.compression:
+            filename = inner_filename(
+                file_path, filename, settings.DECOMPRESSION_MAX_RATIO, settings.DECOMPRESSION_MAX_MB * 1024 * 1024
+            )
+            logger.info(f"壓縮檔 ({self.compression})，內容: {filename}")
+        return filename, Path(filename).suffix.lower()
+    
+    def _open_binary(self, file_path: str):
+        """開啟二進位讀取串流；壓縮檔為解壓縮後的內容（超過大小或壓縮率上限時中止）"""
+        if not self.compression:
+            return open(file_path, 'rb')
+        return open_decompressed(
+            file_path, self.compression, settings.DECOMPRESSION_MAX_RATIO, settings.DECOMPRESSION_MAX_MB * 1024 * 1024
+        )
+    
+    def _open_text(self, file_path: str, encoding: str, errors: str = 'strict'):
+        """開啟文字讀取串流（與 open(file_path, 'r') 相同的換行處理）"""
+        return io.TextIOWrapper(self._open_binary(file_path), encoding=encoding, errors=errors)
+    
+    def _open_tracked(self, file_path: str):
+        """開啟二進位讀取串流並記錄為目前的讀取來源，供進度回報讀取位置"""
+        self._tracked_input = self._open_binary(file_path)
+        return self._tracked_input
+    
+    def _input_bytes_read(self) -> int:
+        """目前讀取來源已讀取的位元組數（壓縮檔為壓縮後的位元組數）"""
+        if self._tracked_input is None or self._tracked_input.closed:
+            return 0
+        return input_position(self._tracked_input)
+    
+    def _source(self, file_path: str):
+        """傳給 pd.read_csv 的資料來源：一般檔案為路徑，壓縮檔為新開啟的解壓縮串流"""
+        return self._open_binary(file_path) if self.compression else file_path
+    
+    def _excel_engine(self, file_extension: str) -> str:
+        """依設定選擇 Excel 讀取引擎；calamine 未安裝時 .xlsx 改用 openpyxl，.xls 改用 pandas"""
+        engine = settings.EXCEL_ENGINE
+        if engine == 'calamine' and CalamineWorkbook is None:
+            engine = 'openpyxl'
+        if engine == 'openpyxl' and file_extension == '.xls':
+            # openpyxl 不支援舊版 .xls
+            engine = 'calamine' if CalamineWorkbook is not None else 'pandas'
+        return engine
+    
+    def _open_excel_chunks(self, file_path: str, file_extension: str, chunk_rows: int):
+        """以快速引擎逐列讀取 Excel 第一個工作表，回傳 (欄位列表, 資料區塊迭代器)"""
+        engine = self._excel_engine(file_extension)
+        logger.info(f"使用 {engine} 引擎串流讀取 Excel 檔案")
+        rows = self._iter_excel_rows(file_path, engine)
+        header = next(rows, None)
+        if header is None:
+            raise ValueError("Excel 檔案沒有任何資料")
+        columns = self._excel_header(header)
+        return columns, self._iter_excel_chunks(rows, columns, chunk_rows)
+    
+    def _iter_excel_rows(self, file_path: str, engine: str):
+        """逐列產生儲存格值，略過空白列（與 pd.read_excel 相同）"""
+        if engine == 'calamine':
+            workbook = CalamineWorkbook.from_path(file_path)
+            raw_rows = workbook.get_sheet_by_index(0).iter_rows()
+        else:
+            workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+            raw_rows = workbook.worksheets[0].iter_rows(values_only=True)
+        
+        try:
+            for raw_row in raw_rows:
+                row = [self._convert_excel_cell(value) for value in raw_row]
+                if any(value is not None for value in row):
+                    yield row
+        finally:
+            workbook.close()
+    
+    @staticmethod
+    def _convert_excel_cell(value):
+        """
+        轉為與 pd.read_excel 相同的值：整數值的浮點數轉為 int，空字串視為空值，
+        日期（calamine 對沒有時間的儲存格回傳 date）與日期時間轉為 Timestamp、期間轉為 Timedelta；
+        時間儲存格各引擎都回傳 datetime.time，與 pandas 相同
+        """
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        if isinstance(value, datetime.date):
+            return pd.Timestamp(value)
+        if isinstance(value, datetime.timedelta):
+            return pd.Timedelta(value)
+        if value == '':
+            return None
+        return value
+    
+    @staticmethod
+    def _excel_header(header: List) -> List[str]:
+        """依 pandas 規則命名欄位：空白標題為 Unnamed: N，重複標題加上 .1、.2 後綴"""
+        columns = []
+        seen: Dict[str, int] = {}
+        for i, value in enumerate(header):
+            name = f"Unnamed: {i}" if value is None else str(value)
+            if name in seen:
+                seen[name] += 1
+                name = f"{name}.{seen[name]}"
+            seen.setdefault(name, 0)
+            columns.append(name)
+        return columns
+    
+    def _iter_excel_chunks(self, rows, columns: List[str], chunk_rows: int):
+        """將 Excel 資料列組成固定行數的區塊，保留各儲存格原本的型別"""
+        width = len(columns)
+        batch = []
+        for row in rows:
+            batch.append((row + [None] * width)[:width])
+            if len(batch) >= chunk_rows:
+                yield pd.DataFrame(batch, columns=columns, dtype=object)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=columns, dtype=object)
+    
+    @staticmethod
+    def _output_extension(file_extension: str) -> str:
+        """輸出檔的副檔名；pandas 已無法寫入舊版 .xls，改輸出 .xlsx"""
+        return '.xlsx' if file_extension == '.xls' else file_extension
+    
+    def _write_group_chunk(self, part: pd.DataFrame, output_path: str, file_extension: str, header: bool):
+        """將一個區塊中屬於同一群組的資料列附加到輸出檔"""
+        if file_extension == '.xlsx':
+            # Excel 無法附加寫入，先暫存區塊，完成後再一次轉成工作表
+            with open(output_path, 'ab') as f:
+                pickle.dump(part, f)
+        elif file_extension == '.txt' and 'content' in part.columns and len(part.columns) == 1:
+            with open(output_path, 'a', encoding='utf-8') as f:
+                for content in part['content']:
+                    f.write(f"{content}\n")
+        else:
+            sep = '\t' if file_extension == '.txt' else ','
+            part.to_csv(
+                output_path, mode='a', header=header and self.write_header, index=False, sep=sep, encoding='utf-8'
+            )
+    
+    def _finalize_group_output(
+        self, part_path: str, archive: ParallelZipWriter, output_filename: str, file_extension: str
+    ):
+        """將群組暫存檔加入 ZIP 檔，讀取完成後即刪除，暫存空間中不會同時存在輸出檔與暫存檔"""
+        if file_extension != '.xlsx':
+            archive.add_file(output_filename, part_path, on_done=lambda: os.remove(part_path))
+            return
+        
+        # 以 write_only 模式逐列寫入，記憶體中只保留一個暫存區塊
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet(title='Sheet1')
+        with open(part_path, 'rb') as f:
+            header_written = False
+            while True:
+                try:
+                    part = pickle.load(f)
+                except EOFError:
+                    break
+                if not header_written:
+                    sheet.append([_excel_header_cell(sheet, column) for column in part.columns])
+                    header_written = True
+                for row in part.itertuples(index=False, name=None):
+                    sheet.append([_excel_cell(sheet, value) for value in row])
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        archive.add(output_filename, buffer.getbuffer(), compress=False)
+        os.remove(part_path)
     
     def _sanitize_filename(self, filename: str) -> str:
         """清理檔名中的非法字符"""
@@ -251,7 +1557,6 @@ class FileProcessor:
     
     def cleanup(self):
         """清理臨時檔案"""
-        import shutil
         try:
             shutil.rmtree(self.temp_dir)
             logger.info(f"清理臨時目錄: {self.temp_dir}")
@@ -267,4 +1572,136 @@ class FileProcessor:
             "size_mb": round(file_stats.st_size / (1024 * 1024), 2),
             "extension": Path(file_path).suffix.lower(),
             "supported": Path(file_path).suffix.lower() in self.SUPPORTED_EXTENSIONS
-        }
\ No newline at end of file
+        }
+
+
+def _excel_header_cell(sheet, name) -> WriteOnlyCell:
+    """與 DataFrame.to_excel 相同樣式的標題儲存格（粗體、細框線、置中）"""
+    cell = WriteOnlyCell(sheet, value=str(name))
+    cell.font = _EXCEL_HEADER_FONT
+    cell.border = _EXCEL_HEADER_BORDER
+    cell.alignment = _EXCEL_HEADER_ALIGNMENT
+    return cell
+
+
+def _excel_cell(sheet, value):
+    """
+    與 DataFrame.to_excel 相同轉換儲存格值：日期時間加上 pandas 的日期格式，
+    期間轉為天數，數值與布林以外的物件（例如時間）轉為文字
+    """
+    if pd.isna(value):
+        return None
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return float(value)
+    if isinstance(value, datetime.datetime):
+        number_format = "YYYY-MM-DD HH:MM:SS"
+    elif isinstance(value, datetime.date):
+        number_format = "YYYY-MM-DD"
+    elif isinstance(value, datetime.timedelta):
+        value, number_format = value.total_seconds() / 86400, "0"
+    else:
+        return str(value)
+    cell = WriteOnlyCell(sheet, value=value)
+    cell.number_format = number_format
+    return cell
+
+
+def _batch_key(group_key: Union[str, Tuple[str, ...]], number: int) -> Union[str, Tuple[str, ...]]:
+    """批次的群組鍵；組合鍵只在最後一層加上批次編號"""
+    if isinstance(group_key, tuple):
+        return group_key[:-1] + (f"{group_key[-1]}_batch_{number}",)
+    return f"{group_key}_batch_{number}"
+
+
+def _null_key(group_value):
+    """串流模式的群組字典鍵：空值統一為 None（組合鍵逐層轉換）"""
+    if isinstance(group_value, tuple):
+        return tuple(_null_key(value) for value in group_value)
+    return group_value if pd.notna(group_value) else None
+
+
+def _streaming_sort_key(key, by_type: bool = False):
+    """
+    與一般模式 pd.factorize(sort=True) 相同的群組順序（組合鍵逐層比較）：
+    非字串的值（數值）在前、字串在後，各自依值排序，空值排在最後。
+    by_type 為 True 時非字串的值改依 (型別名稱, 文字) 排序，用於無法互相比較的型別（例如日期與數值）。
+    """
+    if isinstance(key, tuple):
+        return tuple(_streaming_sort_key(value, by_type) for value in key)
+    if key is None:
+        return (2,)
+    if isinstance(key, str):
+        return (1, key)
+    return (0, (type(key).__name__, str(key)) if by_type else key)
+
+
+def _release_after(times: int, paths: List[str]):
+    """回傳一個回呼，被呼叫 times 次（各批次都讀取完成）後刪除 paths"""
+    remaining = [times]
+    lock = threading.Lock()
+    
+    def release():
+        with lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        for path in paths:
+            os.remove(path)
+    
+    return release
+
+
+class _StreamingGroup:
+    """串流模式下單一群組的輸出狀態，負責依批次大小把資料列分配到暫存檔"""
+    
+    def __init__(self, group_value, index: int, spool_dir: str):
+        if isinstance(group_value, tuple):
+            self.group_key = tuple(str(value) if pd.notna(value) else "空值" for value in group_value)
+        else:
+            self.group_key = str(group_value) if pd.notna(group_value) else "空值"
+        self.index = index
+        self.spool_dir = spool_dir
+        self.row_count = 0
+        self.batches: List[Tuple[str, int]] = []
+    
+    def append(self, part: pd.DataFrame, batch_size: Optional[int], write_chunk, file_extension: str):
+        """附加資料列，超過批次大小時開啟下一個批次暫存檔"""
+        offset = 0
+        while offset < len(part):
+            if not self.batches or (batch_size and self.batches[-1][1] >= batch_size):
+                batch_path = os.path.join(self.spool_dir, f"{self.index}_{len(self.batches)}.part")
+                self.batches.append((batch_path, 0))
+            batch_path, batch_rows = self.batches[-1]
+            take = len(part) - offset
+            if batch_size:
+                take = min(take, batch_size - batch_rows)
+            write_chunk(self._slice(part, offset, offset + take), batch_path, file_extension, batch_rows == 0)
+            self.batches[-1] = (batch_path, batch_rows + take)
+            self.row_count += take
+            offset += take
+    
+    @staticmethod
+    def _slice(part: pd.DataFrame, start: int, stop: int) -> pd.DataFrame:
+        return part.iloc[start:stop]
+    
+    def finalize(self, batch_size: Optional[int]) -> List[Tuple[str, str, int]]:
+        """回傳 (群組鍵, 暫存檔路徑, 行數)，命名規則與一般模式的批次切分相同"""
+        if batch_size and self.row_count > batch_size:
+            return [
+                (_batch_key(self.group_key, i + 1), path, rows)
+                for i, (path, rows) in enumerate(self.batches)
+            ]
+        path, rows = self.batches[0]
+        return [(self.group_key, path, rows)]
+
+
+class _PassthroughGroup(_StreamingGroup):
+    """位元組直通模式下的群組，資料列為原始位元組區塊（RowBlock）"""
+    
+    @staticmethod
+    def _slice(part: RowBlock, start: int, stop: int) -> RowBlock:
+        return part[start:stop]
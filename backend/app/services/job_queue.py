@@ -0,0 +1,90 @@
+import json
+import time
+import logging
+from typing import Dict, Optional, Tuple
+
+from ..core.config import settings
+from ..core.redis_client import RedisClient, get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Redis 鍵
+QUEUE_KEY = "queue:tasks"                      # 等待處理的任務（LPUSH 推入，右側取出）
+PROCESSING_KEY_PREFIX = "queue:processing:"    # 各 worker 處理中的任務
+HEARTBEAT_KEY_PREFIX = "worker:heartbeat:"     # worker 心跳
+ATTEMPTS_KEY = "queue:attempts"                # 各任務被取出的次數
+
+
+class JobQueue:
+    """
+    Redis 持久化工作佇列
+
+    API 將切分任務推入佇列，獨立的 worker 程序以 BLMOVE 原子性地把任務
+    移到自己的處理中列表，完成後才移除。worker 當機或重新部署時，
+    心跳過期的處理中任務會被放回佇列，不會遺失。
+    """
+
+    def __init__(self, redis_client: Optional[RedisClient] = None):
+        self.redis_client = redis_client or get_redis_client()
+
+    async def enqueue(self, task_id: str, **job) -> None:
+        """推入切分任務"""
+        payload = {"task_id": task_id, "enqueued_at": time.time(), **job}
+        await self.redis_client.lpush(QUEUE_KEY, json.dumps(payload, default=str))
+        logger.info(f"任務已加入佇列: {task_id}")
+
+    async def dequeue(self, worker_id: str, timeout: int) -> Optional[Tuple[str, Dict]]:
+        """
+        取出下一個任務並移到此 worker 的處理中列表
+
+        Returns:
+            (原始訊息, 任務內容)，逾時沒有任務時回傳 None。任務內容含 attempts（第幾次執行）
+        """
+        raw = await self.redis_client.blmove(QUEUE_KEY, self._processing_key(worker_id), timeout)
+        if raw is None:
+            return None
+        job = json.loads(raw)
+        job["attempts"] = await self.redis_client.hincrby(ATTEMPTS_KEY, job["task_id"])
+        return raw, job
+
+    async def ack(self, worker_id: str, raw: str, task_id: str) -> None:
+        """任務完成（成功或失敗），從處理中列表移除"""
+        await self.redis_client.lrem(self._processing_key(worker_id), 1, raw)
+        await self.redis_client.hdel(ATTEMPTS_KEY, task_id)
+
+    async def heartbeat(self, worker_id: str) -> None:
+        """更新 worker 心跳"""
+        await self.redis_client.setex(
+            f"{HEARTBEAT_KEY_PREFIX}{worker_id}", settings.WORKER_HEARTBEAT_TTL, str(time.time())
+        )
+
+    async def unregister(self, worker_id: str) -> None:
+        """worker 正常結束時移除心跳"""
+        await self.redis_client.delete(f"{HEARTBEAT_KEY_PREFIX}{worker_id}")
+
+    async def recover_orphaned_jobs(self) -> int:
+        """
+        將心跳已過期的 worker 未完成的任務放回佇列前端
+
+        Returns:
+            放回佇列的任務數
+        """
+        recovered = 0
+        for processing_key in await self.redis_client.scan_keys(f"{PROCESSING_KEY_PREFIX}*"):
+            worker_id = processing_key[len(PROCESSING_KEY_PREFIX):]
+            if await self.redis_client.exists(f"{HEARTBEAT_KEY_PREFIX}{worker_id}"):
+                continue
+            while await self.redis_client.lmove(processing_key, QUEUE_KEY, "RIGHT", "RIGHT"):
+                recovered += 1
+
+        if recovered:
+            logger.warning(f"已將 {recovered} 個中斷的任務放回佇列")
+        return recovered
+
+    async def size(self) -> int:
+        """等待處理的任務數"""
+        return await self.redis_client.llen(QUEUE_KEY)
+
+    @staticmethod
+    def _processing_key(worker_id: str) -> str:
+        return f"{PROCESSING_KEY_PREFIX}{worker_id}"
@@ -0,0 +1,224 @@
+import json
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional
+
+import redis
+
+from ..core.config import settings
+from ..core.redis_client import get_redis_client
+from ..models.task import TaskStatus
+from .task_store import get_task_store
+
+logger = logging.getLogger(__name__)
+
+# Redis 鍵與頻道：progress:{task_id} 為最新進度，progress:{task_id}:events 為進度事件頻道
+PROGRESS_KEY_PREFIX = "progress:"
+PROGRESS_TTL = 3600
+
+# 各處理階段對應的進度百分比範圍（依已讀取位元組或已寫出群組在範圍內推進，完成時為 100）
+STAGE_RANGES = {
+    "scanning": (0, 25),    # 串流模式第一次讀取：統一各區塊的欄位型別
+    "reading": (25, 60),    # 讀取與分組（沒有先掃描時從 0 開始）
+    "splitting": (60, 60),  # 整檔讀取後排序分組
+    "writing": (60, 99),    # 寫出 ZIP 項目
+}
+
+TERMINAL_STATUSES = (TaskStatus.COMPLETED, TaskStatus.ERROR)
+
+# 處理程序內共用的同步連線（每個工作程序各自建立）
+_sync_client: Optional[redis.Redis] = None
+
+
+def progress_key(task_id: str) -> str:
+    return f"{PROGRESS_KEY_PREFIX}{task_id}"
+
+
+def progress_channel(task_id: str) -> str:
+    return f"{PROGRESS_KEY_PREFIX}{task_id}:events"
+
+
+class ProgressReporter:
+    """
+    處理進度回報（在處理程序中同步呼叫）
+
+    記錄目前階段與已處理的資料列數、位元組數及已寫出的群組數，依 PROGRESS_MIN_INTERVAL
+    限制發布頻率：最新進度寫入 progress:{task_id}（供稍後連線的用戶與狀態查詢），
+    同時發布到 progress:{task_id}:events 頻道。沒有 task_id 時（預覽、欄位估計）只記錄不發布；
+    發布失敗時記錄警告並停止發布，不影響處理。
+    """
+
+    def __init__(self, task_id: Optional[str] = None):
+        self.task_id = task_id
+        self.state = {
+            "stage": "reading",
+            "rows_processed": 0,
+            "bytes_processed": 0,
+            "bytes_total": None,
+            "groups_written": 0,
+            "groups_total": None
+        }
+        self._published_at = 0.0
+        self._scanned = False
+        # ZIP 項目寫入完成的回呼可能在壓縮執行緒中執行
+        self._lock = threading.Lock()
+
+    def stage(self, stage: str, **counters):
+        """進入新的處理階段（立即發布）"""
+        self.update(force=True, stage=stage, **counters)
+
+    def update(self, force: bool = False, **counters):
+        """更新計數，距離上次發布超過 PROGRESS_MIN_INTERVAL 秒時發布"""
+        with self._lock:
+            self.state.update(counters)
+            self._scanned = self._scanned or self.state["stage"] == "scanning"
+            if self.task_id is None:
+                return
+            now = time.monotonic()
+            if not force and now - self._published_at < settings.PROGRESS_MIN_INTERVAL:
+                return
+            self._published_at = now
+            event = self._event()
+        self._publish(event)
+
+    def entry_written(self):
+        """一個 ZIP 項目寫入完成"""
+        with self._lock:
+            self.state["groups_written"] += 1
+        self.update()
+
+    def percent(self) -> int:
+        start, end = STAGE_RANGES.get(self.state["stage"], (0, 0))
+        if self.state["stage"] == "reading" and not self._scanned:
+            start = 0
+        if self.state["stage"] == "writing":
+            done, total = self.state["groups_written"], self.state["groups_total"]
+        else:
+            done, total = self.state["bytes_processed"], self.state["bytes_total"]
+        if not total:
+            return start
+        return start + int((end - start) * min(done / total, 1))
+
+    def _event(self) -> Dict:
+        return {
+            "task_id": self.task_id,
+            "status": TaskStatus.PROCESSING,
+            "progress": self.percent(),
+            **self.state,
+            "updated_at": datetime.now().isoformat()
+        }
+
+    def _publish(self, event: Dict):
+        data = json.dumps(event, default=str)
+        try:
+            pipe = _get_sync_client().pipeline(transaction=False)
+            pipe.setex(progress_key(self.task_id), PROGRESS_TTL, data)
+            pipe.publish(progress_channel(self.task_id), data)
+            pipe.execute()
+        except (redis.RedisError, OSError) as e:
+            logger.warning(f"進度發布失敗，停止回報任務 {self.task_id} 的進度: {str(e)}")
+            self.task_id = None
+
+
+def _get_sync_client() -> redis.Redis:
+    global _sync_client
+    if _sync_client is None:
+        _sync_client = redis.Redis.from_url(
+            settings.REDIS_URL, decode_responses=True, socket_timeout=5, socket_connect_timeout=5
+        )
+    return _sync_client
+
+
+async def publish_task_status(task_id: str, task_dict: Dict):
+    """任務狀態改變（開始處理、完成、失敗）時發布事件；發布失敗不影響任務"""
+    status = task_dict.get("status")
+    event = {
+        "task_id": task_id,
+        "status": status,
+        "progress": 100 if status == TaskStatus.COMPLETED else 0,
+        "error_message": task_dict.get("error_message"),
+        "updated_at": task_dict.get("updated_at")
+    }
+    data = json.dumps(event, default=str)
+    redis_client = get_redis_client()
+    try:
+        await redis_client.setex(progress_key(task_id), PROGRESS_TTL, data)
+        await redis_client.publish(progress_channel(task_id), data)
+    except Exception as e:
+        logger.warning(f"任務狀態事件發布失敗: {task_id}, 錯誤: {str(e)}")
+
+
+async def current_event(task_id: str, task_dict: Optional[Dict] = None) -> Dict:
+    """
+    任務目前的狀態事件：處理中時為最新進度，其餘依任務狀態產生
+
+    Args:
+        task_id: 任務 ID
+        task_dict: 已讀取的任務資訊（可選，未提供時從 Redis 讀取）
+    """
+    if task_dict is None:
+        task_dict = await get_task_store().get(task_id)
+        if task_dict is None:
+            return {"task_id": task_id, "status": TaskStatus.ERROR, "progress": 0, "error_message": "任務不存在或已過期"}
+
+    status = task_dict.get("status")
+    if status == TaskStatus.PROCESSING:
+        snapshot = await get_redis_client().get(progress_key(task_id))
+        if snapshot:
+            event = json.loads(snapshot)
+            if event.get("status") == TaskStatus.PROCESSING:
+                return event
+    return {
+        "task_id": task_id,
+        "status": status,
+        "progress": 100 if status == TaskStatus.COMPLETED else 0,
+        "error_message": task_dict.get("error_message"),
+        "updated_at": task_dict.get("updated_at")
+    }
+
+
+async def stream_task_events(
+    task_id: str,
+    is_disconnected: Callable[[], Awaitable[bool]]
+) -> AsyncIterator[str]:
+    """
+    以 Server-Sent Events 格式產生任務的進度事件，任務完成或失敗後結束
+
+    先送出目前狀態，之後轉送進度頻道的事件；PROGRESS_HEARTBEAT_SECONDS 內沒有事件時
+    重新確認任務狀態（處理程序異常結束時不會發布完成事件）並送出心跳註解。
+
+    Args:
+        task_id: 任務 ID
+        is_disconnected: 檢查用戶是否已中斷連線
+    """
+    pubsub = get_redis_client().pubsub()
+    # 先訂閱再讀取目前狀態，不會遺漏兩者之間發布的事件
+    await pubsub.subscribe(progress_channel(task_id))
+    try:
+        event = await current_event(task_id)
+        yield _format_event(event)
+        while event.get("status") not in TERMINAL_STATUSES:
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=settings.PROGRESS_HEARTBEAT_SECONDS
+            )
+            if await is_disconnected():
+                return
+            if message is None:
+                latest = await current_event(task_id)
+                if latest.get("status") in TERMINAL_STATUSES:
+                    event = latest
+                    yield _format_event(event)
+                else:
+                    yield ": heartbeat\n\n"
+                continue
+            event = json.loads(message["data"])
+            yield _format_event(event)
+    finally:
+        await pubsub.unsubscribe()
+        await pubsub.aclose()
+
+
+def _format_event(event: Dict) -> str:
+    return f"data: {json.dumps(event, default=str, ensure_ascii=False)}\n\n"
@@ -0,0 +1,179 @@
+import os
+import json
+import shutil
+import hashlib
+import logging
+from typing import Dict, List, Optional, Tuple, Union
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """
+    切分結果快取（內容定址、LRU、磁碟容量上限）
+
+    以上傳內容的 SHA-256、檔名、切分欄位、批次大小、格式設定與輸出設定為鍵，
+    保存完成任務的結果 ZIP 與結果資訊。同一份檔案以相同設定再次切分時，
+    直接把快取的 ZIP 連結到新任務的工作目錄，略過整個處理流程。
+    快取與任務目錄的 ZIP 以硬連結共用同一份內容，兩邊都不就地改寫：
+    建立連結前先移除目的檔，任務重新產生 ZIP 時也先移除舊檔（見 FileProcessor）。
+    快取總大小超過 RESULT_CACHE_MAX_MB 時，依最後使用時間刪除最舊的項目。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.cache_dir = cache_dir or settings.RESULT_CACHE_DIR
+        self.max_bytes = max_bytes if max_bytes is not None else settings.RESULT_CACHE_MAX_MB * 1024 * 1024
+
+    @property
+    def enabled(self) -> bool:
+        return settings.RESULT_CACHE_ENABLED and self.max_bytes > 0
+
+    @staticmethod
+    def make_key(
+        content_hash: str,
+        filename: str,
+        column_name: Union[str, List],
+        batch_size: Optional[int] = None,
+        dialect: Optional[Dict] = None
+    ) -> str:
+        """快取鍵：內容雜湊加上會影響輸出 ZIP 的所有設定（輸出檔名取自原始檔名）"""
+        options = json.dumps({
+            "filename": filename,
+            "column_name": column_name,
+            "batch_size": batch_size,
+            "dialect": dialect or {},
+            "csv_backend": settings.CSV_BACKEND,
+            "keep_encoding": settings.PASSTHROUGH_KEEP_ENCODING,
+            "compression": settings.ARCHIVE_COMPRESSION,
+            "compression_level": settings.ARCHIVE_COMPRESSION_LEVEL
+        }, sort_keys=True, ensure_ascii=False)
+        options_hash = hashlib.sha256(options.encode("utf-8")).hexdigest()[:16]
+        return f"{content_hash}_{options_hash}"
+
+    def lookup(self, key: str, work_dir: str) -> Optional[Dict]:
+        """
+        將快取的 ZIP 連結到任務工作目錄
+
+        Returns:
+            結果資訊（zip_path 指向工作目錄中的檔案），沒有快取時回傳 None
+        """
+        try:
+            with open(self._meta_path(key), "r", encoding="utf-8") as f:
+                result = json.load(f)
+            os.makedirs(work_dir, exist_ok=True)
+            zip_path = os.path.join(work_dir, result.pop("zip_name"))
+            _link_or_copy(self._zip_path(key), zip_path)
+            os.utime(self._zip_path(key))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"結果快取讀取失敗: {key}, 錯誤: {str(e)}")
+            return None
+
+        result["zip_path"] = zip_path
+        logger.info(f"使用結果快取: {key}")
+        return result
+
+    def store(self, key: str, result: Dict) -> None:
+        """保存完成任務的 ZIP 與結果資訊（先建立暫存檔再原子性地改名），超過容量時刪除最舊的項目"""
+        zip_path = result.get("zip_path")
+        if not zip_path or not os.path.exists(zip_path):
+            return
+        if os.path.getsize(zip_path) > self.max_bytes:
+            logger.info(f"結果 ZIP 超過快取容量，略過快取: {key}")
+            return
+
+        metadata = {k: v for k, v in result.items() if k not in ("zip_path", "timings")}
+        metadata["zip_name"] = os.path.basename(zip_path)
+
+        tmp_zip = os.path.join(self.cache_dir, f"{key}.zip.tmp")
+        tmp_meta = os.path.join(self.cache_dir, f"{key}.json.tmp")
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_meta, "w", encoding="utf-8") as f:
+                json.dump(metadata, f, ensure_ascii=False, default=str)
+            _link_or_copy(zip_path, tmp_zip)
+            # ZIP 先就位再寫入結果資訊，讀取端只要看到結果資訊就能取得完整的 ZIP
+            os.replace(tmp_zip, self._zip_path(key))
+            os.utime(self._zip_path(key))
+            os.replace(tmp_meta, self._meta_path(key))
+            logger.info(f"已建立結果快取: {key}")
+        except OSError as e:
+            logger.warning(f"結果快取寫入失敗: {key}, 錯誤: {str(e)}")
+            for path in (tmp_zip, tmp_meta):
+                if os.path.exists(path):
+                    os.remove(path)
+            return
+
+        self.evict()
+
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """
+        依最後使用時間刪除最舊的快取，直到總大小不超過 max_bytes（預設為容量上限）
+
+        Returns:
+            刪除數量
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        items = self._entries()
+        total_bytes = sum(size for _, size, _ in items)
+        removed = 0
+        for _, size, key in sorted(items):
+            if total_bytes <= max_bytes:
+                break
+            # 先刪除結果資訊，讀取端就不會再使用即將刪除的 ZIP
+            for path in (self._meta_path(key), self._zip_path(key)):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            total_bytes -= size
+            removed += 1
+
+        if removed:
+            logger.info(f"已清除 {removed} 個最久未使用的結果快取")
+        return removed
+
+    def size(self) -> int:
+        """快取總大小（位元組，只計算 ZIP）"""
+        return sum(size for _, size, _ in self._entries())
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """(最後使用時間, 大小, 快取鍵)"""
+        try:
+            entries = [entry for entry in os.scandir(self.cache_dir) if entry.name.endswith(".zip")]
+        except FileNotFoundError:
+            return []
+
+        items = []
+        for entry in entries:
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            items.append((stat.st_mtime, stat.st_size, entry.name[:-len(".zip")]))
+        return items
+
+    def _zip_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.zip")
+
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+
+def _link_or_copy(source: str, destination: str):
+    """
+    建立硬連結（不複製內容，快取被刪除時任務的檔案仍然有效）；跨檔案系統時改為複製
+
+    目的檔已存在時先移除，不寫入可能與來源共用的舊檔案。
+    """
+    try:
+        os.remove(destination)
+    except FileNotFoundError:
+        pass
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
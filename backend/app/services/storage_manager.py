@@ -0,0 +1,284 @@
+import os
+import time
+import shutil
+import asyncio
+import logging
+from typing import Dict, List, Optional, Set, Tuple
+
+from ..core.config import settings
+from ..core.redis_client import RedisClient, get_redis_client
+from ..models.task import TaskStatus
+from .task_store import TaskStore
+from .columnar_cache import ColumnarCache
+from .result_cache import ResultCache
+
+logger = logging.getLogger(__name__)
+
+# Redis 鍵
+ACCESS_KEY = "storage:access"          # 各任務最後使用時間（sorted set，用於 LRU 淘汰）
+SWEEP_LOCK_KEY = "storage:sweep_lock"  # 多個 API/worker 程序同時只有一個執行清理
+
+
+class StorageManager:
+    """
+    任務檔案生命週期管理
+
+    每個任務的檔案放在 UPLOAD_DIR/{task_id}（上傳檔）與 OUTPUT_DIR/{task_id}
+    （暫存檔與結果 ZIP）。定期清理：
+    1. Redis 的 task:{task_id}（上傳中為 upload:{task_id}）過期後，刪除該任務的所有檔案，
+       並刪除過期的欄式快取
+    2. 任務檔案與欄式快取、結果快取的總大小超過 STORAGE_MAX_MB 時，先依最後使用時間
+       縮減快取（可以重建，欄式快取優先），仍然不足時淘汰未在處理中的任務
+       （同時刪除 task:/result: 鍵，任務視為已過期）
+
+    剛建立的目錄在 STORAGE_ORPHAN_GRACE_SECONDS 內不會被清除，避免刪除上傳中、
+    尚未寫入 Redis 的任務。
+    """
+
+    def __init__(self, redis_client: Optional[RedisClient] = None):
+        self._redis_client = redis_client
+        self._sweeper: Optional[asyncio.Task] = None
+        # 依縮減順序排列：未壓縮的欄式快取較大，重建成本也較低
+        self.caches = [ColumnarCache(), ResultCache()]
+
+    @property
+    def redis_client(self) -> RedisClient:
+        return self._redis_client or get_redis_client()
+
+    @property
+    def budget_bytes(self) -> int:
+        return settings.STORAGE_MAX_MB * 1024 * 1024
+
+    def start(self):
+        """在目前的事件迴圈啟動定期清理"""
+        if self._sweeper is None and settings.STORAGE_SWEEP_INTERVAL > 0:
+            self._sweeper = asyncio.get_running_loop().create_task(self._sweep_loop())
+            logger.info(f"檔案清理已啟動: 每 {settings.STORAGE_SWEEP_INTERVAL} 秒檢查一次")
+
+    def shutdown(self):
+        """停止定期清理"""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+
+    def task_paths(self, task_id: str) -> List[str]:
+        """任務的所有檔案目錄"""
+        return [os.path.join(settings.UPLOAD_DIR, task_id), os.path.join(settings.OUTPUT_DIR, task_id)]
+
+    async def touch(self, task_id: str) -> None:
+        """記錄任務的最後使用時間（上傳、開始切分、下載時呼叫）"""
+        await self.redis_client.zadd(ACCESS_KEY, {task_id: time.time()})
+
+    async def release(self, task_id: str) -> int:
+        """刪除任務的所有檔案，回傳釋放的位元組數"""
+        freed = await asyncio.to_thread(_remove_paths, self.task_paths(task_id))
+        await self.redis_client.zrem(ACCESS_KEY, task_id)
+        return freed
+
+    async def sweep(self) -> Dict:
+        """清除過期任務的檔案與過期的欄式快取，再依容量上限縮減快取、淘汰最久未使用的任務"""
+        await asyncio.to_thread(self.caches[0].purge_expired)
+        reaped, reaped_bytes = await self.reap_expired()
+        evicted, evicted_bytes = await self.enforce_budget()
+        if reaped or evicted:
+            logger.info(
+                f"檔案清理完成: 過期 {reaped} 個任務（{reaped_bytes} bytes），"
+                f"容量淘汰 {evicted} 個任務（{evicted_bytes} bytes）"
+            )
+        return {"reaped": reaped, "reaped_bytes": reaped_bytes, "evicted": evicted, "evicted_bytes": evicted_bytes}
+
+    async def reap_expired(self) -> Tuple[int, int]:
+        """刪除 task:{task_id} 已過期的任務檔案，回傳 (任務數, 位元組數)"""
+        last_access = dict(await self.redis_client.zrange_withscores(ACCESS_KEY))
+        task_ids = set(last_access) | await asyncio.to_thread(self._task_ids_on_disk)
+        grace_before = time.time() - settings.STORAGE_ORPHAN_GRACE_SECONDS
+
+        reaped, freed = 0, 0
+        for task_id in task_ids:
+            if await self._in_use(task_id):
+                continue
+            touched_at = max(last_access.get(task_id, 0), await asyncio.to_thread(self._modified_at, task_id))
+            if touched_at > grace_before:
+                continue
+            freed += await self.release(task_id)
+            reaped += 1
+        return reaped, freed
+
+    async def enforce_budget(self, reserve_bytes: int = 0) -> Tuple[int, int]:
+        """
+        縮減快取並淘汰最久未使用的任務，直到任務檔案與快取的總大小加上 reserve_bytes 不超過容量上限
+
+        Returns:
+            (淘汰的任務數, 釋放的位元組數（含快取）)
+        """
+        if self.budget_bytes <= 0:
+            return 0, 0
+
+        sizes, cache_bytes = await asyncio.to_thread(self._disk_usage)
+        used = sum(sizes.values()) + cache_bytes
+        if used + reserve_bytes <= self.budget_bytes:
+            return 0, 0
+
+        # 快取可以重建，先縮減快取；與任務共用的 ZIP 刪除快取後仍然佔用空間，重新計算用量
+        await asyncio.to_thread(self._trim_caches, used + reserve_bytes - self.budget_bytes)
+        sizes, cache_bytes = await asyncio.to_thread(self._disk_usage)
+        cache_freed = used - sum(sizes.values()) - cache_bytes
+        used -= cache_freed
+        if used + reserve_bytes <= self.budget_bytes:
+            return 0, cache_freed
+
+        # 沒有使用紀錄的目錄（例如舊版本留下的檔案）視為最久未使用
+        last_access = dict(await self.redis_client.zrange_withscores(ACCESS_KEY))
+        task_store = TaskStore(self._redis_client)
+        evicted, freed = 0, 0
+        for task_id in sorted(sizes, key=lambda task_id: last_access.get(task_id, 0)):
+            if used + reserve_bytes <= self.budget_bytes:
+                break
+            # 上傳中、等待中與處理中的任務不淘汰
+            if await self.redis_client.exists(f"upload:{task_id}"):
+                continue
+            if await task_store.get_status(task_id) in (TaskStatus.PENDING, TaskStatus.PROCESSING):
+                continue
+            await task_store.delete(task_id)
+            await self.release(task_id)
+            used -= sizes[task_id]
+            freed += sizes[task_id]
+            evicted += 1
+            logger.info(f"容量不足，淘汰任務 {task_id}（{sizes[task_id]} bytes）")
+        return evicted, freed + cache_freed
+
+    async def ensure_capacity(self, reserve_bytes: int) -> bool:
+        """上傳前確保有 reserve_bytes 的空間，必要時淘汰舊任務；仍然不足時回傳 False"""
+        if self.budget_bytes <= 0:
+            return True
+        await self.enforce_budget(reserve_bytes)
+        sizes, cache_bytes = await asyncio.to_thread(self._disk_usage)
+        return sum(sizes.values()) + cache_bytes + reserve_bytes <= self.budget_bytes
+
+    async def usage(self) -> Dict:
+        """目前的儲存空間用量（used_bytes 為計入容量上限的總大小，含快取）"""
+        def measure():
+            seen = set()
+            sizes = self._task_sizes(seen)
+            return sizes, {
+                "result_cache_bytes": _path_size(settings.RESULT_CACHE_DIR, seen),
+                "columnar_cache_bytes": _path_size(settings.COLUMNAR_CACHE_DIR, seen)
+            }
+
+        sizes, cache_sizes = await asyncio.to_thread(measure)
+        task_bytes = sum(sizes.values())
+        used = task_bytes + sum(cache_sizes.values())
+        return {
+            "tasks": len(sizes),
+            "task_bytes": task_bytes,
+            "used_bytes": used,
+            "budget_bytes": self.budget_bytes or None,
+            "usage_ratio": round(used / self.budget_bytes, 4) if self.budget_bytes > 0 else None,
+            **cache_sizes
+        }
+
+    async def _in_use(self, task_id: str) -> bool:
+        """任務或分塊上傳工作階段仍存在"""
+        return await self.redis_client.exists(f"task:{task_id}") or await self.redis_client.exists(f"upload:{task_id}")
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(settings.STORAGE_SWEEP_INTERVAL)
+            try:
+                # 同一時間只有一個程序執行清理
+                if await self.redis_client.set(SWEEP_LOCK_KEY, "1", ex=settings.STORAGE_SWEEP_INTERVAL, nx=True):
+                    await self.sweep()
+            except Exception as e:
+                logger.error(f"檔案清理失敗: {str(e)}")
+
+    def _task_ids_on_disk(self) -> Set[str]:
+        task_ids = set()
+        for root in (settings.UPLOAD_DIR, settings.OUTPUT_DIR):
+            try:
+                task_ids.update(entry.name for entry in os.scandir(root) if entry.is_dir(follow_symlinks=False))
+            except FileNotFoundError:
+                continue
+        return task_ids
+
+    def _task_sizes(self, seen: Optional[Set[Tuple[int, int]]] = None) -> Dict[str, int]:
+        return {
+            task_id: sum(_path_size(path, seen) for path in self.task_paths(task_id))
+            for task_id in self._task_ids_on_disk()
+        }
+
+    def _cache_bytes(self, seen: Optional[Set[Tuple[int, int]]] = None) -> int:
+        return sum(_path_size(cache.cache_dir, seen) for cache in self.caches)
+
+    def _disk_usage(self) -> Tuple[Dict[str, int], int]:
+        """
+        (各任務的大小, 快取大小)
+
+        結果快取與任務目錄以硬連結共用 ZIP，同一個檔案只計算一次，
+        先計入任務（只刪除快取不會釋放任務仍在使用的 ZIP）。
+        """
+        seen = set()
+        sizes = self._task_sizes(seen)
+        return sizes, self._cache_bytes(seen)
+
+    def _trim_caches(self, overflow: int) -> int:
+        """依序縮減各快取，合計釋放 overflow 位元組（或快取已清空），回傳實際釋放的位元組數"""
+        freed = 0
+        for cache in self.caches:
+            if freed >= overflow:
+                break
+            before = cache.size()
+            cache.evict(max(before - (overflow - freed), 0))
+            released = before - cache.size()
+            if released:
+                logger.info(f"容量不足，清除快取 {cache.cache_dir}（{released} bytes）")
+            freed += released
+        return freed
+
+    def _modified_at(self, task_id: str) -> float:
+        modified_at = 0.0
+        for path in self.task_paths(task_id):
+            try:
+                modified_at = max(modified_at, os.stat(path).st_mtime)
+            except FileNotFoundError:
+                continue
+        return modified_at
+
+
+def _path_size(path: str, seen: Optional[Set[Tuple[int, int]]] = None) -> int:
+    """
+    目錄下所有檔案的大小合計
+
+    硬連結到同一個 inode 的檔案只計算一次；傳入 seen 時跨多個目錄共用已計算的
+    (st_dev, st_ino)，例如同時連結在結果快取與任務目錄的 ZIP。
+    """
+    if seen is None:
+        seen = set()
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                stat = os.lstat(os.path.join(dirpath, filename))
+            except FileNotFoundError:
+                continue
+            if (stat.st_dev, stat.st_ino) in seen:
+                continue
+            seen.add((stat.st_dev, stat.st_ino))
+            total += stat.st_size
+    return total
+
+
+def _remove_paths(paths: List[str]) -> int:
+    freed, seen = 0, set()
+    for path in paths:
+        if os.path.exists(path):
+            freed += _path_size(path, seen)
+            shutil.rmtree(path, ignore_errors=True)
+    return freed
+
+
+# 全局檔案管理實例
+storage_manager = StorageManager()
+
+def get_storage_manager() -> StorageManager:
+    """獲取檔案管理實例"""
+    return storage_manager
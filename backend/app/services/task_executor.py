@@ -0,0 +1,84 @@
+import asyncio
+import time
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Optional
+
+from ..core.config import settings
+from .file_processor import FileProcessor
+from .progress import ProgressReporter
+
+logger = logging.getLogger(__name__)
+
+
+def _run_file_processing(
+    submitted_at: float, work_dir: Optional[str], task_id: Optional[str], processor_kwargs: Dict
+) -> Dict:
+    """在工作程序中執行檔案切分（有任務 ID 時發布處理進度），並記錄排隊等待與執行時間"""
+    started_at = time.time()
+    result = FileProcessor(work_dir, progress=ProgressReporter(task_id)).process_file(**processor_kwargs)
+    result["timings"] = {
+        "queue_wait_seconds": round(started_at - submitted_at, 3),
+        "run_seconds": round(time.time() - started_at, 3)
+    }
+    return result
+
+
+class ProcessingExecutor:
+    """檔案處理執行層 - 將 CPU 密集的切分工作移出 asyncio 事件迴圈"""
+
+    def __init__(self):
+        self.executor: Optional[Executor] = None
+
+    def start(self):
+        """建立工作程序池；PROCESS_POOL_WORKERS 為 0 時改用單一執行緒"""
+        if self.executor is not None:
+            return
+
+        if settings.PROCESS_POOL_WORKERS > 0:
+            self.executor = ProcessPoolExecutor(
+                max_workers=settings.PROCESS_POOL_WORKERS,
+                max_tasks_per_child=settings.PROCESS_POOL_MAX_TASKS_PER_CHILD or None
+            )
+            logger.info(
+                f"檔案處理程序池已啟動: {settings.PROCESS_POOL_WORKERS} 個工作程序，"
+                f"每個程序最多處理 {settings.PROCESS_POOL_MAX_TASKS_PER_CHILD} 個任務"
+            )
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=1)
+            logger.info("檔案處理使用背景執行緒執行")
+
+    def shutdown(self):
+        """關閉工作程序池"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+            logger.info("檔案處理程序池已關閉")
+
+    async def process_file(
+        self, work_dir: Optional[str] = None, task_id: Optional[str] = None, **processor_kwargs
+    ) -> Dict:
+        """
+        在工作程序中執行 FileProcessor.process_file
+
+        Args:
+            work_dir: 輸出檔案目錄（可選，預設為臨時目錄）
+            task_id: 任務 ID（可選，指定時經 Redis 發布處理進度）
+            processor_kwargs: 傳給 FileProcessor.process_file 的參數
+
+        Returns:
+            處理結果字典，另含 timings（queue_wait_seconds、run_seconds）
+        """
+        self.start()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, _run_file_processing, time.time(), work_dir, task_id, processor_kwargs
+        )
+
+
+# 全局執行層實例
+processing_executor = ProcessingExecutor()
+
+def get_processing_executor() -> ProcessingExecutor:
+    """獲取檔案處理執行層實例"""
+    return processing_executor
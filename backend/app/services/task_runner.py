@@ -0,0 +1,186 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Dict, List, Optional, Union
+
+from ..core.config import settings
+from ..models.task import TaskStatus
+from .task_executor import get_processing_executor
+from .result_cache import ResultCache
+from .progress import publish_task_status
+from .task_store import get_task_store
+
+logger = logging.getLogger(__name__)
+
+result_cache = ResultCache()
+
+
+async def run_split_task(
+    task_id: str,
+    file_path: str,
+    filename: str,
+    column_name: Union[str, List[Union[str, List[str]]]],
+    batch_size: Optional[int] = None,
+    dialect: Optional[dict] = None,
+    content_hash: Optional[str] = None,
+    enqueued_at: Optional[float] = None
+):
+    """
+    執行檔案切分任務
+    
+    由 API 程序的 BackgroundTasks 或獨立的 worker 程序（app.worker）呼叫，
+    實際的切分工作交給處理程序池執行，事件迴圈只負責等待結果。
+    處理流程：
+    1. 有相同內容與設定的快取結果時直接完成任務（例如排隊期間完成的相同任務）
+    2. 將任務狀態更新為 PROCESSING
+    3. 在處理程序池中調用 FileProcessor 處理檔案分割
+    4. 將結果保存到 Redis 與結果快取
+    5. 更新任務狀態為 COMPLETED 或 ERROR
+    
+    狀態改變時發布到任務的進度頻道，處理中的進度由處理程序發布（見 progress 模組）。
+    上傳檔與輸出在 task: 鍵過期後由 StorageManager 清除，這裡不清理，避免下載失敗。
+    
+    Args:
+        task_id: 唯一任務識別符
+        file_path: 已寫入上傳目錄的檔案路徑
+        filename: 原始檔案名稱
+        column_name: 用於分割的欄位名稱，或多個切分欄位（欄位名稱或組合鍵）的列表
+        batch_size: 每個輸出檔案的最大行數，超過時同一群組切成多個檔案（可選）
+        dialect: 使用者指定的 CSV/TXT 格式（可選）
+        content_hash: 上傳內容的 SHA-256，用於欄式快取與結果快取（可選）
+        enqueued_at: 任務加入 Redis 佇列的時間戳（可選，用於計算佇列等待時間）
+    """
+    task_store = get_task_store()
+    executor = get_processing_executor()
+    
+    started_at = time.time()
+    
+    try:
+        # 更新任務狀態為處理中
+        task_dict = await task_store.get(task_id)
+        if task_dict is None:
+            logger.warning(f"任務 {task_id} 不存在或已過期，略過處理")
+            return
+        if await complete_from_cache(task_id, task_dict):
+            return
+        
+        updated = await task_store.update(task_id, status=TaskStatus.PROCESSING)
+        if updated is None:
+            logger.warning(f"任務 {task_id} 不存在或已過期，略過處理")
+            return
+        task_dict.update(updated)
+        await publish_task_status(task_id, task_dict)
+        
+        # 執行檔案處理
+        result = await executor.process_file(
+            work_dir=task_work_dir(task_id),
+            task_id=task_id,
+            file_path=file_path,
+            filename=filename,
+            column_name=column_name,
+            batch_size=batch_size,
+            dialect=dialect,
+            content_hash=content_hash
+        )
+        timings = result.setdefault("timings", {})
+        if enqueued_at is not None:
+            timings["job_queue_wait_seconds"] = round(started_at - enqueued_at, 3)
+        logger.info(
+            f"任務 {task_id} 排隊等待 {timings.get('queue_wait_seconds')} 秒，"
+            f"執行 {timings.get('run_seconds')} 秒"
+        )
+        
+        if result["success"]:
+            # 更新任務狀態為完成，處理結果在同一個交易中寫入
+            updated = await task_store.update(task_id, result=result, status=TaskStatus.COMPLETED)
+        else:
+            # 處理失敗
+            updated = await task_store.update(
+                task_id,
+                status=TaskStatus.ERROR,
+                error_message=result.get("error", "處理失敗")
+            )
+        if updated is None:
+            logger.warning(f"任務 {task_id} 在處理期間過期，不更新狀態")
+            return
+        task_dict.update(updated)
+        await publish_task_status(task_id, task_dict)
+        
+        # 任務完成後才寫入結果快取，不延遲狀態更新
+        cache_key = result_cache_key(task_dict)
+        if result["success"] and cache_key is not None:
+            await asyncio.to_thread(result_cache.store, cache_key, result)
+        
+    except Exception as e:
+        # 處理異常
+        logger.error(f"背景任務處理失敗: {task_id}, 錯誤: {str(e)}")
+        await mark_task_error(task_id, str(e))
+
+
+async def complete_from_cache(task_id: str, task_dict: Dict, create: bool = False) -> bool:
+    """
+    以結果快取完成任務：把快取的 ZIP 連結到任務工作目錄並更新狀態，不進行任何處理
+    
+    Args:
+        task_id: 任務 ID
+        task_dict: 任務資訊
+        create: 任務尚未寫入 Redis 時為 True，命中快取時才建立任務
+    
+    Returns:
+        是否命中快取
+    """
+    cache_key = result_cache_key(task_dict)
+    if cache_key is None:
+        return False
+    
+    started_at = time.perf_counter()
+    result = await asyncio.to_thread(result_cache.lookup, cache_key, task_work_dir(task_id))
+    if result is None:
+        return False
+    result["cached"] = True
+    result["timings"] = {"cache_seconds": round(time.perf_counter() - started_at, 3)}
+    
+    task_store = get_task_store()
+    if create:
+        await task_store.create(task_id, task_dict)
+    updated = await task_store.update(task_id, result=result, status=TaskStatus.COMPLETED)
+    if updated is None:
+        return False
+    task_dict.update(updated)
+    await publish_task_status(task_id, task_dict)
+    logger.info(f"任務 {task_id} 使用結果快取完成")
+    return True
+
+
+def result_cache_key(task_dict: Dict) -> Optional[str]:
+    """任務的結果快取鍵；沒有內容雜湊或停用快取時回傳 None"""
+    content_hash = task_dict.get("content_hash")
+    if not content_hash or not task_dict.get("column_name") or not result_cache.enabled:
+        return None
+    return result_cache.make_key(
+        content_hash,
+        task_dict["filename"],
+        task_dict["column_name"],
+        task_dict.get("batch_size"),
+        task_dict.get("dialect")
+    )
+
+
+def task_work_dir(task_id: str) -> str:
+    """任務的工作目錄（輸出 ZIP 檔所在位置），API 與 worker 程序共用"""
+    return os.path.join(settings.OUTPUT_DIR, task_id)
+
+
+async def mark_task_error(task_id: str, error_message: str):
+    """將任務狀態更新為 ERROR（任務已過期時不重新建立）"""
+    try:
+        task_dict = await get_task_store().transition(
+            task_id,
+            status=TaskStatus.ERROR,
+            error_message=error_message
+        )
+        if task_dict:
+            await publish_task_status(task_id, task_dict)
+    except Exception as redis_error:
+        logger.error(f"Redis 更新錯誤: {str(redis_error)}")
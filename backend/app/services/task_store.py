@@ -0,0 +1,164 @@
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from redis.exceptions import WatchError
+
+from ..core.redis_client import RedisClient, get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Redis 鍵：task:{task_id} 為任務資訊（哈希表），result:{task_id} 為處理結果（JSON）
+TASK_KEY_PREFIX = "task:"
+RESULT_KEY_PREFIX = "result:"
+TASK_TTL = 3600
+
+# 條件式狀態轉換在並行修改時的重試次數
+_TRANSITION_RETRIES = 5
+
+
+class TaskStore:
+    """
+    任務資訊的讀寫
+
+    任務存成 Redis 哈希表，每個欄位的值為 JSON（保留列表、字典與 None），
+    狀態改變時只以 HSET 寫入變更的欄位，並在同一個 MULTI/EXEC 中更新 updated_at
+    與延長期限，不需要先讀出整個任務，也不會覆蓋其他程序同時寫入的欄位；
+    寫入前以 WATCH 確認任務仍存在，已過期的任務不會被重新建立。
+    需要依目前狀態決定是否更新時（例如只有 UPLOADED 的任務可以開始切分）使用 transition，
+    以 WATCH 確認期間沒有其他程序修改任務。
+    """
+
+    def __init__(self, redis_client: Optional[RedisClient] = None):
+        self._redis_client = redis_client
+
+    @property
+    def redis_client(self) -> RedisClient:
+        return self._redis_client or get_redis_client()
+
+    async def create(self, task_id: str, task: Dict) -> None:
+        """建立任務（取代同 ID 的舊任務）"""
+        key = task_key(task_id)
+        pipe = self.redis_client.pipeline()
+        pipe.delete(key)
+        pipe.hset(key, mapping=_encode(task))
+        pipe.expire(key, TASK_TTL)
+        await pipe.execute()
+
+    async def get(self, task_id: str) -> Optional[Dict]:
+        """讀取任務，不存在或已過期時回傳 None"""
+        return _decode(await self.redis_client.hgetall(task_key(task_id)))
+
+    async def get_with_result(self, task_id: str) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """以一次往返讀取任務與處理結果"""
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.hgetall(task_key(task_id))
+        pipe.get(result_key(task_id))
+        task_data, result_data = await pipe.execute()
+        return _decode(task_data), json.loads(result_data) if result_data else None
+
+    async def get_status(self, task_id: str) -> Optional[str]:
+        """只讀取任務狀態"""
+        status = await self.redis_client.hget(task_key(task_id), "status")
+        return json.loads(status) if status else None
+
+    async def update(self, task_id: str, result: Optional[Dict] = None, **fields) -> Optional[Dict]:
+        """
+        更新任務欄位並延長期限
+
+        以 WATCH 確認任務仍存在後在同一個交易中寫入，任務過期後才送達的更新
+        （例如處理完成時任務已過期）不會重新建立只有部分欄位的任務。
+
+        Args:
+            task_id: 任務 ID
+            result: 處理結果（可選，與任務狀態在同一個交易中寫入 result:{task_id}）
+            **fields: 要更新的欄位
+
+        Returns:
+            寫入的欄位（含 updated_at）；任務不存在或已過期時回傳 None
+        """
+        key = task_key(task_id)
+        for _ in range(_TRANSITION_RETRIES):
+            async with self.redis_client.pipeline() as pipe:
+                try:
+                    await pipe.watch(key)
+                    if not await pipe.exists(key):
+                        return None
+                    fields["updated_at"] = datetime.now().isoformat()
+                    pipe.multi()
+                    pipe.hset(key, mapping=_encode(fields))
+                    pipe.expire(key, TASK_TTL)
+                    if result is not None:
+                        pipe.setex(result_key(task_id), TASK_TTL, json.dumps(result, default=str))
+                    await pipe.execute()
+                    return fields
+                except WatchError:
+                    continue
+        logger.warning(f"任務 {task_id} 持續被其他程序修改，更新失敗")
+        return None
+
+    async def transition(
+        self,
+        task_id: str,
+        from_statuses: Optional[Iterable[str]] = None,
+        **fields
+    ) -> Optional[Dict]:
+        """
+        任務存在且狀態為 from_statuses 之一時更新欄位（from_statuses 為 None 時只要求任務存在）
+
+        Returns:
+            更新後的完整任務；任務不存在或狀態不符時回傳 None
+        """
+        key = task_key(task_id)
+        allowed = None if from_statuses is None else set(from_statuses)
+        for _ in range(_TRANSITION_RETRIES):
+            async with self.redis_client.pipeline() as pipe:
+                try:
+                    await pipe.watch(key)
+                    task = _decode(await pipe.hgetall(key))
+                    if task is None or (allowed is not None and task.get("status") not in allowed):
+                        return None
+                    fields["updated_at"] = datetime.now().isoformat()
+                    pipe.multi()
+                    pipe.hset(key, mapping=_encode(fields))
+                    pipe.expire(key, TASK_TTL)
+                    await pipe.execute()
+                    return {**task, **fields}
+                except WatchError:
+                    continue
+        logger.warning(f"任務 {task_id} 持續被其他程序修改，狀態轉換失敗")
+        return None
+
+    async def delete(self, task_id: str) -> None:
+        """刪除任務與處理結果"""
+        pipe = self.redis_client.pipeline()
+        pipe.delete(task_key(task_id))
+        pipe.delete(result_key(task_id))
+        await pipe.execute()
+
+
+def task_key(task_id: str) -> str:
+    return f"{TASK_KEY_PREFIX}{task_id}"
+
+
+def result_key(task_id: str) -> str:
+    return f"{RESULT_KEY_PREFIX}{task_id}"
+
+
+def _encode(fields: Dict[str, Any]) -> Dict[str, str]:
+    return {name: json.dumps(value, default=str) for name, value in fields.items()}
+
+
+def _decode(data: Dict[str, str]) -> Optional[Dict]:
+    if not data:
+        return None
+    return {name: json.loads(value) for name, value in data.items()}
+
+
+# 全局任務資訊實例
+task_store = TaskStore()
+
+def get_task_store() -> TaskStore:
+    """獲取任務資訊實例"""
+    return task_store
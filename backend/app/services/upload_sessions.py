@@ -0,0 +1,265 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+import logging
+from typing import AsyncIterator, Dict, Optional, Set, Tuple
+
+from ..core.config import settings
+from ..core.redis_client import RedisClient, get_redis_client
+from ..utils.file_utils import sanitize_filename, ensure_directory_exists
+
+logger = logging.getLogger(__name__)
+
+# Redis 鍵
+SESSION_KEY_PREFIX = "upload:"  # upload:{upload_id} 為工作階段資訊，upload:{upload_id}:chunks 為已收到的區塊編號
+
+# 寫入磁碟前在記憶體累積的最大位元組數（單一區塊請求）
+_WRITE_BUFFER_BYTES = 1024 * 1024
+
+
+class UploadSessionError(Exception):
+    """續傳工作階段的錯誤（區塊編號、長度或檢查碼不符等），訊息可直接回傳給用戶"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class UploadSessionManager:
+    """
+    可續傳的分塊上傳
+
+    建立工作階段時預先配置 UPLOAD_DIR/{upload_id}/{檔名}.part，各區塊可以並行上傳。
+    區塊先寫入暫存檔（邊接收邊寫入，不在記憶體保留整個區塊），長度與 SHA-256 檢查碼
+    驗證通過後才寫入檔案中的對應位置，損壞的重傳不會覆蓋已收到的內容。
+    已收到的區塊記錄在 Redis，連線中斷後查詢狀態，只需補傳缺少的區塊。
+    全部收到後提交，檔案改名為正式檔名，交給切分流程。
+
+    upload_id 即為提交後的任務 ID。
+    """
+
+    def __init__(self, redis_client: Optional[RedisClient] = None):
+        self._redis_client = redis_client
+
+    @property
+    def redis_client(self) -> RedisClient:
+        return self._redis_client or get_redis_client()
+
+    async def create(self, upload_id: str, user_id: str, filename: str, size: int) -> Dict:
+        """建立工作階段並預先配置檔案空間"""
+        chunk_size = settings.UPLOAD_SESSION_CHUNK_SIZE
+        file_path = os.path.join(settings.UPLOAD_DIR, upload_id, sanitize_filename(filename))
+        session = {
+            "upload_id": upload_id,
+            "user_id": user_id,
+            "filename": filename,
+            "file_path": file_path,
+            "size": size,
+            "chunk_size": chunk_size,
+            "total_chunks": -(-size // chunk_size),
+            "created_at": time.time()
+        }
+        await asyncio.to_thread(_allocate, _part_path(file_path), size)
+        await self.redis_client.setex(
+            self._session_key(upload_id),
+            settings.UPLOAD_SESSION_TTL,
+            json.dumps(session)
+        )
+        logger.info(f"建立上傳工作階段: {upload_id}, {size} bytes, {session['total_chunks']} 個區塊")
+        return session
+
+    async def get(self, upload_id: str) -> Optional[Dict]:
+        data = await self.redis_client.get(self._session_key(upload_id))
+        return json.loads(data) if data else None
+
+    async def received_chunks(self, upload_id: str) -> Set[int]:
+        members = await self.redis_client.smembers(self._chunks_key(upload_id))
+        return {int(member) for member in members}
+
+    async def status(self, session: Dict) -> Dict:
+        """
+        工作階段狀態
+
+        Returns:
+            已收到與缺少的區塊編號、已收到的位元組數，以及 offset（從檔案開頭連續收到的位元組數）
+        """
+        received = await self.received_chunks(session["upload_id"])
+        missing = [index for index in range(session["total_chunks"]) if index not in received]
+        contiguous = missing[0] if missing else session["total_chunks"]
+        return {
+            "upload_id": session["upload_id"],
+            "filename": session["filename"],
+            "size": session["size"],
+            "chunk_size": session["chunk_size"],
+            "total_chunks": session["total_chunks"],
+            "received_chunks": sorted(received),
+            "missing_chunks": missing,
+            "received_bytes": sum(self._chunk_length(session, index) for index in received),
+            "offset": min(contiguous * session["chunk_size"], session["size"]),
+            "complete": not missing
+        }
+
+    async def write_chunk(
+        self,
+        session: Dict,
+        index: int,
+        body: AsyncIterator[bytes],
+        checksum: Optional[str] = None
+    ) -> int:
+        """
+        驗證一個區塊後寫入檔案中的對應位置（驗證失敗時不改動檔案）
+
+        Args:
+            session: 工作階段資訊
+            index: 區塊編號（從 0 開始）
+            body: 請求內容的非同步串流
+            checksum: 區塊的 SHA-256（十六進位，可選），不符時不記錄為已收到
+
+        Returns:
+            已收到的區塊數
+
+        Raises:
+            UploadSessionError: 區塊編號、長度或檢查碼不符
+        """
+        if not 0 <= index < session["total_chunks"]:
+            raise UploadSessionError(f"區塊編號超出範圍: {index}（共 {session['total_chunks']} 個區塊）")
+        expected_length = self._chunk_length(session, index)
+        offset = index * session["chunk_size"]
+
+        part_path = _part_path(session["file_path"])
+        # 同一區塊可能同時重傳，暫存檔名不可重複
+        staging_path = f"{part_path}.{index}.{uuid.uuid4().hex}"
+        sha256 = hashlib.sha256()
+        length = 0
+        buffer = bytearray()
+        try:
+            fd = await asyncio.to_thread(os.open, staging_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            try:
+                async for piece in body:
+                    length += len(piece)
+                    if length > expected_length:
+                        raise UploadSessionError(f"區塊 {index} 超過預期大小 {expected_length} bytes")
+                    sha256.update(piece)
+                    buffer += piece
+                    if len(buffer) >= _WRITE_BUFFER_BYTES:
+                        await asyncio.to_thread(os.write, fd, bytes(buffer))
+                        buffer.clear()
+                if buffer:
+                    await asyncio.to_thread(os.write, fd, bytes(buffer))
+            finally:
+                await asyncio.to_thread(os.close, fd)
+
+            if length != expected_length:
+                raise UploadSessionError(f"區塊 {index} 大小不符: 收到 {length} bytes，預期 {expected_length} bytes")
+            if checksum and sha256.hexdigest() != checksum.lower():
+                raise UploadSessionError(f"區塊 {index} 檢查碼不符，請重新上傳此區塊")
+
+            await asyncio.to_thread(_copy_into, staging_path, part_path, offset)
+        finally:
+            await asyncio.to_thread(_remove_if_exists, staging_path)
+
+        upload_id = session["upload_id"]
+        await self.redis_client.sadd(self._chunks_key(upload_id), str(index))
+        # 每收到一個區塊就延長工作階段期限
+        await self.redis_client.expire(self._chunks_key(upload_id), settings.UPLOAD_SESSION_TTL)
+        await self.redis_client.expire(self._session_key(upload_id), settings.UPLOAD_SESSION_TTL)
+        return await self.redis_client.scard(self._chunks_key(upload_id))
+
+    async def commit(self, session: Dict, checksum: Optional[str] = None) -> Tuple[str, int, str]:
+        """
+        確認所有區塊都已收到，計算整個檔案的 SHA-256 並改為正式檔名
+
+        Args:
+            session: 工作階段資訊
+            checksum: 整個檔案的 SHA-256（可選）
+
+        Returns:
+            (檔案路徑, 位元組數, SHA-256)
+
+        Raises:
+            UploadSessionError: 仍有缺少的區塊或檢查碼不符
+        """
+        received = await self.received_chunks(session["upload_id"])
+        missing = session["total_chunks"] - len(received)
+        if missing:
+            raise UploadSessionError(f"尚有 {missing} 個區塊未上傳", status_code=409)
+
+        file_path = session["file_path"]
+        content_hash = await asyncio.to_thread(_file_sha256, _part_path(file_path))
+        if checksum and content_hash != checksum.lower():
+            raise UploadSessionError("檔案檢查碼不符，請重新上傳", status_code=409)
+
+        await asyncio.to_thread(os.replace, _part_path(file_path), file_path)
+        await self.redis_client.delete(self._session_key(session["upload_id"]))
+        await self.redis_client.delete(self._chunks_key(session["upload_id"]))
+        logger.info(f"上傳工作階段已提交: {session['upload_id']}")
+        return file_path, session["size"], content_hash
+
+    async def abort(self, session: Dict) -> None:
+        """取消工作階段並刪除已上傳的資料"""
+        await self.redis_client.delete(self._session_key(session["upload_id"]))
+        await self.redis_client.delete(self._chunks_key(session["upload_id"]))
+        part_path = _part_path(session["file_path"])
+        if os.path.exists(part_path):
+            await asyncio.to_thread(os.remove, part_path)
+
+    @staticmethod
+    def _chunk_length(session: Dict, index: int) -> int:
+        return min(session["chunk_size"], session["size"] - index * session["chunk_size"])
+
+    @staticmethod
+    def _session_key(upload_id: str) -> str:
+        return f"{SESSION_KEY_PREFIX}{upload_id}"
+
+    @staticmethod
+    def _chunks_key(upload_id: str) -> str:
+        return f"{SESSION_KEY_PREFIX}{upload_id}:chunks"
+
+
+def _part_path(file_path: str) -> str:
+    return f"{file_path}.part"
+
+
+def _allocate(path: str, size: int):
+    """建立指定大小的檔案（稀疏檔，不實際寫入資料）"""
+    ensure_directory_exists(os.path.dirname(path))
+    with open(path, 'wb') as f:
+        f.truncate(size)
+
+
+def _copy_into(source: str, destination: str, offset: int, block_size: int = _WRITE_BUFFER_BYTES):
+    """將 source 的內容寫入 destination 的 offset 位置"""
+    fd = os.open(destination, os.O_WRONLY)
+    try:
+        with open(source, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b""):
+                os.pwrite(fd, block, offset)
+                offset += len(block)
+    finally:
+        os.close(fd)
+
+
+def _remove_if_exists(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _file_sha256(path: str, block_size: int = 1024 * 1024) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+# 全局上傳工作階段管理實例
+upload_session_manager = UploadSessionManager()
+
+def get_upload_session_manager() -> UploadSessionManager:
+    """獲取上傳工作階段管理實例"""
+    return upload_session_manager
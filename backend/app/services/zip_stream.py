@@ -0,0 +1,76 @@
+import os
+import json
+import asyncio
+import logging
+from typing import AsyncIterator, Dict, Optional
+
+from ..core.config import settings
+from ..models.task import TaskStatus
+from .file_processor import FileProcessor
+from .task_store import TaskStore
+
+logger = logging.getLogger(__name__)
+
+
+class ZipStreamError(Exception):
+    """串流下載途中任務失敗或結果檔案被重寫，無法產生完整的 ZIP"""
+
+
+async def stream_zip_archive(redis_client, task_id: str, work_dir: str) -> AsyncIterator[bytes]:
+    """
+    邊處理邊傳送 ZIP 檔
+
+    FileProcessor 每寫完一個項目就更新進度檔（已完成部分的結尾位移），
+    此處只傳送該位移之前已定案的位元組；寫入結束、中央目錄寫入後傳送剩餘部分。
+    任務失敗或重試（進度檔的 run_id 改變）時中斷傳送，讓客戶端知道下載不完整。
+    """
+    zip_path = os.path.join(work_dir, FileProcessor.ZIP_FILENAME)
+    progress_path = os.path.join(work_dir, FileProcessor.ZIP_PROGRESS_FILENAME)
+    chunk_size = settings.ZIP_STREAM_CHUNK_SIZE
+
+    run_id = None
+    sent = 0
+    f = None
+    try:
+        while True:
+            progress = await asyncio.to_thread(_read_progress, progress_path)
+            if progress is not None:
+                if run_id is None:
+                    try:
+                        f = await asyncio.to_thread(open, zip_path, 'rb')
+                    except FileNotFoundError:
+                        # 讀到前一次執行留下的進度檔，新的 ZIP 尚未建立
+                        await asyncio.sleep(settings.ZIP_STREAM_POLL_INTERVAL)
+                        continue
+                    run_id = progress["run_id"]
+                elif progress["run_id"] != run_id:
+                    raise ZipStreamError(f"任務 {task_id} 已重新執行，串流下載中斷")
+
+                while sent < progress["offset"]:
+                    chunk = await asyncio.to_thread(f.read, min(chunk_size, progress["offset"] - sent))
+                    if not chunk:
+                        raise ZipStreamError(f"任務 {task_id} 的結果檔案已被截斷")
+                    sent += len(chunk)
+                    yield chunk
+
+                if progress["complete"]:
+                    logger.info(f"任務 {task_id} 串流下載完成，共 {sent} bytes")
+                    return
+
+            status = await TaskStore(redis_client).get_status(task_id)
+            if status not in (TaskStatus.PENDING, TaskStatus.PROCESSING, TaskStatus.COMPLETED):
+                raise ZipStreamError(f"任務 {task_id} 處理失敗（狀態: {status}），串流下載中斷")
+            if status == TaskStatus.COMPLETED and progress is None:
+                raise ZipStreamError(f"任務 {task_id} 沒有 ZIP 寫入進度，無法串流下載")
+            await asyncio.sleep(settings.ZIP_STREAM_POLL_INTERVAL)
+    finally:
+        if f is not None:
+            f.close()
+
+
+def _read_progress(progress_path: str) -> Optional[Dict]:
+    try:
+        with open(progress_path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
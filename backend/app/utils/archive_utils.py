@@ -0,0 +1,240 @@
+import bz2
+import time
+import zlib
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+# 可設定的 ZIP 壓縮方式（zlib 與 bz2 壓縮時都會釋放 GIL，可以多執行緒並行）
+COMPRESSION_METHODS = {
+    "stored": zipfile.ZIP_STORED,
+    "deflated": zipfile.ZIP_DEFLATED,
+    "bzip2": zipfile.ZIP_BZIP2,
+}
+
+_READ_BLOCK_SIZE = 1024 * 1024
+
+BytesLike = Union[bytes, bytearray, memoryview]
+Segment = Tuple[str, int, Optional[int]]
+
+
+class ParallelZipWriter:
+    """
+    多執行緒壓縮的 ZIP 寫入器
+
+    各項目在執行緒池中壓縮，完成後依加入順序寫入 ZIP 檔，輸出內容與逐一以
+    zipfile 寫入相同。同時壓縮中的項目最多 2 × threads 個，記憶體用量有上限。
+    壓縮後沒有變小的項目改以 STORED 保存。
+
+    Args:
+        path: 輸出 ZIP 檔路徑
+        method: 壓縮方式（stored、deflated、bzip2）
+        level: 壓縮等級（deflated 為 0-9，-1 表示 zlib 預設；bzip2 為 1-9）
+        threads: 壓縮執行緒數，0 表示在目前執行緒壓縮
+        on_entry: 每個項目寫入後呼叫，參數為目前已定案內容的結尾位移
+    """
+
+    def __init__(
+        self,
+        path: str,
+        method: str = "deflated",
+        level: int = -1,
+        threads: int = 0,
+        on_entry: Optional[Callable[[int], None]] = None
+    ):
+        if method not in COMPRESSION_METHODS:
+            raise ValueError(f"不支援的壓縮方式: {method}，可用: {list(COMPRESSION_METHODS)}")
+        self.method = method
+        self.level = level
+        self.threads = threads
+        self.on_entry = on_entry
+        self.zipf = zipfile.ZipFile(path, 'w', COMPRESSION_METHODS[method])
+        self.filename = self.zipf.filename
+        self._pool = ThreadPoolExecutor(max_workers=threads) if threads > 0 else None
+        self._pending = deque()
+        self._started_at = time.perf_counter()
+        self.stats = {"entries": 0, "uncompressed_bytes": 0, "compressed_bytes": 0, "compress_seconds": 0.0}
+
+    def __enter__(self) -> "ParallelZipWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def add(self, name: str, data: BytesLike, compress: bool = True):
+        """加入記憶體中的內容（compress=False 用於 xlsx 等已壓縮的內容）"""
+        self._submit(name, _compress_bytes, data, self._compress_type(compress))
+
+    def add_file(self, name: str, path: str, compress: bool = True, on_done: Optional[Callable[[], None]] = None):
+        """加入磁碟上的檔案，在壓縮執行緒中分塊讀取；on_done 在讀取完成後呼叫（例如刪除暫存檔）"""
+        self.add_segments(name, [(path, 0, None)], compress, on_done)
+
+    def add_segments(
+        self,
+        name: str,
+        segments: List[Segment],
+        compress: bool = True,
+        on_done: Optional[Callable[[], None]] = None
+    ):
+        """加入依序串接的多個檔案片段 (路徑, 起始位移, 結束位移或 None 表示到檔案結尾)"""
+        self._submit(name, _compress_segments, segments, self._compress_type(compress), on_done)
+
+    def close(self):
+        """寫入所有剩餘項目與中央目錄（需要時 zipfile 會自動使用 ZIP64 格式）"""
+        try:
+            while self._pending:
+                self._write_next()
+            self.zipf.close()
+        finally:
+            self._shutdown_pool()
+
+    def abort(self):
+        """發生錯誤時放棄尚未寫入的項目並關閉檔案"""
+        for name, future in self._pending:
+            future.cancel()
+        self._pending.clear()
+        self._shutdown_pool()
+        self.zipf.close()
+
+    def summary(self) -> Dict:
+        """壓縮統計：方式、等級、位元組數、壓縮率、各執行緒壓縮 CPU 時間合計與整體耗時"""
+        uncompressed = self.stats["uncompressed_bytes"]
+        compressed = self.stats["compressed_bytes"]
+        return {
+            "method": self.method,
+            "level": self.level,
+            "threads": self.threads,
+            "entries": self.stats["entries"],
+            "uncompressed_bytes": uncompressed,
+            "compressed_bytes": compressed,
+            "ratio": round(compressed / uncompressed, 4) if uncompressed else None,
+            "compress_seconds": round(self.stats["compress_seconds"], 3),
+            "archive_seconds": round(time.perf_counter() - self._started_at, 3)
+        }
+
+    def _compress_type(self, compress: bool) -> int:
+        return COMPRESSION_METHODS[self.method] if compress else zipfile.ZIP_STORED
+
+    def _submit(self, name: str, fn, source, compress_type: int, *args):
+        if self._pool is None:
+            future = _CompletedFuture(fn(source, compress_type, self.level, *args))
+        else:
+            future = self._pool.submit(fn, source, compress_type, self.level, *args)
+        self._pending.append((name, future))
+        # 依加入順序寫出，限制同時保留在記憶體中的壓縮結果數量
+        while len(self._pending) > self.threads * 2:
+            self._write_next()
+
+    def _write_next(self):
+        name, future = self._pending.popleft()
+        compress_type, file_size, crc, payload, seconds = future.result()
+
+        zinfo = zipfile.ZipInfo(name, date_time=time.localtime(time.time())[:6])
+        zinfo.compress_type = compress_type
+        zinfo.external_attr = 0o600 << 16
+        zinfo.file_size = file_size
+        zinfo.compress_size = len(payload)
+        zinfo.CRC = crc
+
+        # 與 zipfile.writestr 相同寫入本地標頭與資料，再登記到中央目錄
+        fp = self.zipf.fp
+        zinfo.header_offset = fp.tell()
+        zip64 = file_size > zipfile.ZIP64_LIMIT or len(payload) > zipfile.ZIP64_LIMIT
+        fp.write(zinfo.FileHeader(zip64))
+        fp.write(payload)
+        self.zipf.filelist.append(zinfo)
+        self.zipf.NameToInfo[name] = zinfo
+        self.zipf.start_dir = fp.tell()
+
+        self.stats["entries"] += 1
+        self.stats["uncompressed_bytes"] += file_size
+        self.stats["compressed_bytes"] += len(payload)
+        self.stats["compress_seconds"] += seconds
+
+        if self.on_entry is not None:
+            fp.flush()
+            self.on_entry(self.zipf.start_dir)
+
+    def _shutdown_pool(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+
+class _CompletedFuture:
+    """不使用執行緒池時的同步結果"""
+
+    def __init__(self, result):
+        self._result = result
+
+    def result(self):
+        return self._result
+
+    def cancel(self):
+        return False
+
+
+def _new_compressor(compress_type: int, level: int):
+    if compress_type == zipfile.ZIP_DEFLATED:
+        return zlib.compressobj(level, zlib.DEFLATED, -15)
+    if compress_type == zipfile.ZIP_BZIP2:
+        return bz2.BZ2Compressor(level if 1 <= level <= 9 else 9)
+    return None
+
+
+def _compress_bytes(data: BytesLike, compress_type: int, level: int) -> Tuple[int, int, int, bytes, float]:
+    """壓縮一個項目，回傳 (實際壓縮方式, 原始大小, CRC, 資料, 壓縮 CPU 秒數)"""
+    started_at = time.thread_time()
+    crc = zlib.crc32(data)
+    compressor = _new_compressor(compress_type, level)
+    if compressor is not None:
+        payload = compressor.compress(data) + compressor.flush()
+        if len(payload) < len(data):
+            return compress_type, len(data), crc, payload, time.thread_time() - started_at
+    return zipfile.ZIP_STORED, len(data), crc, bytes(data), time.thread_time() - started_at
+
+
+def _compress_segments(
+    segments: List[Segment],
+    compress_type: int,
+    level: int,
+    on_done: Optional[Callable[[], None]] = None
+) -> Tuple[int, int, int, bytes, float]:
+    """分塊讀取並壓縮檔案片段；壓縮後沒有變小時重新讀取原始內容以 STORED 保存"""
+    started_at = time.thread_time()
+    compressor = _new_compressor(compress_type, level)
+    crc = 0
+    file_size = 0
+    chunks = []
+    for block in _iter_segments(segments):
+        crc = zlib.crc32(block, crc)
+        file_size += len(block)
+        chunks.append(compressor.compress(block) if compressor is not None else block)
+    if compressor is not None:
+        chunks.append(compressor.flush())
+    payload = b"".join(chunks)
+    if compressor is None or len(payload) >= file_size:
+        if compressor is not None:
+            payload = b"".join(_iter_segments(segments))
+        compress_type = zipfile.ZIP_STORED
+    if on_done is not None:
+        on_done()
+    return compress_type, file_size, crc, payload, time.thread_time() - started_at
+
+
+def _iter_segments(segments: List[Segment]) -> Iterator[bytes]:
+    for path, start, end in segments:
+        with open(path, 'rb') as f:
+            f.seek(start)
+            remaining = end - start if end is not None else None
+            while remaining is None or remaining > 0:
+                block = f.read(_READ_BLOCK_SIZE if remaining is None else min(_READ_BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                if remaining is not None:
+                    remaining -= len(block)
+                yield block
@@ -0,0 +1,257 @@
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+except ImportError:  # 未安裝時 CSV_BACKEND=arrow 會退回 pandas
+    pa = None
+
+from pandas._libs.parsers import STR_NA_VALUES
+
+
+# 與 pandas 預設相同的空值字串與布林值字串
+NULL_VALUES = sorted(STR_NA_VALUES)
+TRUE_VALUES = ['True', 'TRUE', 'true']
+FALSE_VALUES = ['False', 'FALSE', 'false']
+
+# pandas 不會自動轉換的型別（日期、時間、decimal 等）需以字串重新讀取
+_PANDAS_COMPATIBLE_KINDS = ('integer', 'floating', 'boolean', 'string', 'binary', 'null')
+
+
+class ArrowParseError(ValueError):
+    """Arrow 無法以與 pandas 相同的方式解析檔案（例如資料列欄位數不一致）"""
+
+
+def arrow_available() -> bool:
+    """是否已安裝 pyarrow"""
+    return pa is not None
+
+
+def read_csv_table(
+    file_path: Union[str, Callable[[], BinaryIO]],
+    encoding: str,
+    sep: str = ',',
+    quotechar: str = '"',
+    column_names: Optional[List[str]] = None
+) -> "pa.Table":
+    """
+    以多執行緒 Arrow CSV 讀取器讀取整個檔案，型別推斷規則與 pd.read_csv 一致
+
+    Args:
+        file_path: 檔案路徑，或每次呼叫都開啟新串流的函式（例如解壓縮中的檔案）
+        encoding: 檔案編碼
+        sep: 分隔符
+        quotechar: 引號字元
+        column_names: 沒有標題列時使用的欄位名稱
+
+    Raises:
+        UnicodeError: 內容無法以指定編碼解碼
+        ArrowParseError: 資料列欄位數不一致等無法解析的情況
+    """
+    read_options = pa_csv.ReadOptions(
+        use_threads=True,
+        encoding=encoding,
+        column_names=column_names
+    )
+    parse_options = pa_csv.ParseOptions(delimiter=sep, quote_char=quotechar)
+
+    def read(column_types: Dict) -> "pa.Table":
+        convert_options = pa_csv.ConvertOptions(
+            null_values=NULL_VALUES,
+            true_values=TRUE_VALUES,
+            false_values=FALSE_VALUES,
+            strings_can_be_null=True,
+            column_types=column_types
+        )
+        source = _CapturingStream(file_path()) if callable(file_path) else file_path
+        try:
+            table = pa_csv.read_csv(
+                source,
+                read_options=read_options,
+                parse_options=parse_options,
+                convert_options=convert_options
+            )
+        except pa.ArrowInvalid as e:
+            if isinstance(source, _CapturingStream):
+                source.raise_captured()
+            raise ArrowParseError(str(e))
+        finally:
+            if isinstance(source, _CapturingStream):
+                source.close()
+        if isinstance(source, _CapturingStream):
+            source.raise_captured()
+        return table
+
+    table = read({})
+    string_columns = {
+        field.name: pa.string()
+        for field in table.schema
+        if _type_kind(field.type) not in _PANDAS_COMPATIBLE_KINDS
+    }
+    if string_columns:
+        # 日期等欄位在 pandas 中保持原始字串
+        table = read(string_columns)
+
+    if any(pa.types.is_binary(field.type) for field in table.schema):
+        # Arrow 遇到無效的 UTF-8 內容會讀成 binary 欄位，視同解碼失敗
+        raise UnicodeError(f"內容無法以 {encoding} 編碼解碼")
+
+    return table
+
+
+def has_pandas_compatible_header(table: "pa.Table") -> bool:
+    """欄位名稱不含空白或重複（pandas 會改名為 Unnamed: N 或加上 .1 後綴）"""
+    names = table.column_names
+    return all(names) and len(set(names)) == len(names)
+
+
+def format_table_like_pandas(table: "pa.Table") -> "pa.Table":
+    """
+    將所有欄位轉為 pandas to_csv 會輸出的文字
+
+    - 整數欄位：含空值時 pandas 讀成 float64，輸出 1.0
+    - 浮點數欄位：使用與 pandas 相同的 numpy 最短表示法
+    - 布林欄位：True / False
+    - 空值輸出為空字串（保留為 null）
+    """
+    columns = [_format_column(table.column(i)) for i in range(table.num_columns)]
+    return pa.table(columns, names=table.column_names)
+
+
+def needs_quoting(table: "pa.Table", sep: str) -> bool:
+    """
+    檢查標題或任何值是否需要加上引號
+
+    需要引號時交由 pandas 寫出，確保引號規則與 pandas 完全相同。
+    """
+    special_chars = {sep, '"', '\n', '\r'}
+    if any(char in name for name in table.column_names for char in special_chars):
+        return True
+
+    for column in table.columns:
+        for char in special_chars:
+            if pc.any(pc.match_substring(column, char)).as_py():
+                return True
+
+    # 單欄位檔案中的空值，csv 模組會寫成 ""
+    if table.num_columns == 1 and table.column(0).null_count:
+        return True
+    return False
+
+
+def iter_groups(table: "pa.Table", column_name: str) -> Iterator[Tuple[object, "pa.Array"]]:
+    """
+    依欄位值排序產生 (群組值, 列索引)，群組順序與 pandas 模式的切分相同
+
+    群組內保持原始列順序，空值群組（群組值 None）排在最後。
+    """
+    keys = table.column(column_name)
+    indices = pc.sort_indices(
+        pa.table({"key": keys}), sort_keys=[("key", "ascending")], null_placement="at_end"
+    )
+
+    counts = pc.value_counts(keys)
+    values = counts.field("values")
+    totals = counts.field("counts")
+    valid = pc.is_valid(values)
+    values = pc.filter(values, valid)
+    totals = pc.filter(totals, valid)
+    order = pc.sort_indices(values)
+
+    offset = 0
+    for value, count in zip(pc.take(values, order).to_pylist(), pc.take(totals, order).to_pylist()):
+        yield value, indices.slice(offset, count)
+        offset += count
+
+    if keys.null_count:
+        yield None, indices.slice(offset, keys.null_count)
+
+
+def count_groups(table: "pa.Table", column_name: str) -> int:
+    """欄位的群組數（不重複值數，空值算一個群組）"""
+    return pc.count_distinct(table.column(column_name), mode="all").as_py()
+
+
+def write_csv_table(table: "pa.Table", sink: BinaryIO, sep: str, header: bool):
+    """以 Arrow CSV writer 將已格式化、不需引號的文字表格寫入二進位串流（例如 ZIP 項目）"""
+    write_options = pa_csv.WriteOptions(
+        include_header=False,
+        delimiter=sep,
+        quoting_style='none'
+    )
+    # Arrow 的標題列一律加上引號，改為自行寫出
+    if header:
+        sink.write((sep.join(table.column_names) + '\n').encode('utf-8'))
+    pa_csv.write_csv(table, sink, write_options=write_options)
+
+
+def _type_kind(data_type) -> str:
+    if pa.types.is_integer(data_type):
+        return 'integer'
+    if pa.types.is_floating(data_type):
+        return 'floating'
+    if pa.types.is_boolean(data_type):
+        return 'boolean'
+    if pa.types.is_string(data_type) or pa.types.is_large_string(data_type):
+        return 'string'
+    if pa.types.is_binary(data_type):
+        return 'binary'
+    if pa.types.is_null(data_type):
+        return 'null'
+    return 'other'
+
+
+def _format_column(column: "pa.ChunkedArray") -> "pa.Array":
+    """將單一欄位轉為 pandas 輸出的文字，空值保留為 null"""
+    kind = _type_kind(column.type)
+    if kind == 'string':
+        return column
+    if kind == 'null':
+        return pa.nulls(len(column), pa.string())
+    if kind == 'boolean':
+        return pc.if_else(column, 'True', 'False')
+    if kind == 'integer' and column.null_count == 0:
+        return pc.cast(column, pa.string())
+
+    # 浮點數（以及含空值、被 pandas 轉為 float64 的整數）
+    values = column.to_numpy(zero_copy_only=False).astype(np.float64)
+    mask = np.isnan(values)
+    return pa.array(values.astype(str), type=pa.string(), mask=mask)
+
+
+class _CapturingStream:
+    """
+    讀取串流的例外先保存並回傳檔案結尾，待 Arrow 讀取結束後再引發
+
+    例外直接穿過 Arrow 的背景讀取執行緒時，程序可能在回收物件時中止
+    （例如解壓縮中的檔案超過大小上限）。
+    """
+
+    def __init__(self, stream: BinaryIO):
+        self._stream = stream
+        self._error: Optional[BaseException] = None
+        self.closed = False
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        if self._error is not None:
+            return b""
+        try:
+            return self._stream.read(size)
+        except Exception as e:
+            self._error = e
+            return b""
+
+    def raise_captured(self):
+        if self._error is not None:
+            raise self._error
+
+    def close(self):
+        if not self.closed:
+            self._stream.close()
+            self.closed = True
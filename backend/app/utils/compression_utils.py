@@ -0,0 +1,173 @@
+import io
+import os
+import bz2
+import gzip
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+try:
+    import zstandard
+except ImportError:  # 未安裝時不接受 .zst 檔案
+    zstandard = None
+
+# 接受的壓縮格式（壓縮檔內只能是 CSV/TXT；xlsx 本身已是壓縮格式）
+COMPRESSION_EXTENSIONS = {
+    ".gz": "gzip",
+    ".bz2": "bz2",
+    ".zst": "zstd",
+    ".zip": "zip",
+}
+COMPRESSIBLE_EXTENSIONS = {".csv", ".txt"}
+
+# 解壓縮後的大小在此以下不檢查壓縮率，避免小檔案因重複內容被誤判
+_MIN_GUARDED_BYTES = 16 * 1024 * 1024
+
+
+class DecompressionBombError(ValueError):
+    """解壓縮後的大小或壓縮率超過上限"""
+    pass
+
+
+def compression_of(filename: str) -> Optional[str]:
+    """依副檔名判斷壓縮格式，不是壓縮檔時回傳 None"""
+    return COMPRESSION_EXTENSIONS.get(Path(filename).suffix.lower())
+
+
+def compression_available(compression: str) -> bool:
+    """壓縮格式的解壓縮模組是否可用"""
+    return compression != "zstd" or zstandard is not None
+
+
+def is_supported_compressed_name(filename: str) -> bool:
+    """
+    檔名是否為可接受的壓縮檔
+
+    .gz/.bz2/.zst 需要能從檔名看出內容為 CSV/TXT（例如 data.csv.gz）；
+    .zip 的內容檔名在上傳後由 inner_filename 檢查。
+    """
+    compression = compression_of(filename)
+    if compression is None or not compression_available(compression):
+        return False
+    return compression == "zip" or Path(Path(filename).stem).suffix.lower() in COMPRESSIBLE_EXTENSIONS
+
+
+def inner_filename(file_path: str, filename: str, max_ratio: int, max_bytes: int) -> str:
+    """
+    壓縮檔內容的檔名（data.csv.gz → data.csv；ZIP 為唯一成員的檔名）
+
+    Raises:
+        ValueError: ZIP 不是只有一個檔案、內容不是 CSV/TXT，或宣告的解壓縮大小超過上限
+    """
+    compression = compression_of(filename)
+    if compression == "zip":
+        try:
+            with zipfile.ZipFile(file_path) as archive:
+                members = [info for info in archive.infolist() if not info.is_dir()]
+        except zipfile.BadZipFile:
+            raise ValueError("無法讀取 ZIP 檔案")
+        if len(members) != 1:
+            raise ValueError(f"ZIP 檔案必須只包含一個檔案，實際包含 {len(members)} 個")
+        member = members[0]
+        name = Path(member.filename).name
+        _check_size(member.file_size, member.compress_size, max_ratio, max_bytes)
+    else:
+        name = Path(filename).stem
+
+    if Path(name).suffix.lower() not in COMPRESSIBLE_EXTENSIONS:
+        raise ValueError(f"壓縮檔內只支援 CSV 與 TXT 檔案: {name}")
+    return name
+
+
+def open_decompressed(file_path: str, compression: str, max_ratio: int, max_bytes: int) -> BinaryIO:
+    """
+    開啟邊讀取邊解壓縮的二進位串流（不寫出解壓縮後的暫存檔）
+
+    解壓縮後的大小超過 max_bytes，或超過 16MB 且壓縮率超過 max_ratio 時，
+    讀取會引發 DecompressionBombError。
+    """
+    source = open(file_path, "rb")
+    try:
+        if compression == "gzip":
+            raw = gzip.GzipFile(fileobj=source, mode="rb")
+        elif compression == "bz2":
+            raw = bz2.BZ2File(source, "rb")
+        elif compression == "zstd":
+            if zstandard is None:
+                raise ValueError("未安裝 zstandard，無法讀取 .zst 檔案")
+            raw = zstandard.ZstdDecompressor().stream_reader(source, closefd=False)
+        elif compression == "zip":
+            archive = zipfile.ZipFile(source)
+            member = next(info for info in archive.infolist() if not info.is_dir())
+            raw = _ZipMemberReader(archive, archive.open(member))
+        else:
+            raise ValueError(f"不支援的壓縮格式: {compression}")
+    except BaseException:
+        source.close()
+        raise
+
+    return io.BufferedReader(_GuardedReader(raw, source, max_ratio, max_bytes), buffer_size=1024 * 1024)
+
+
+def input_position(stream: BinaryIO) -> int:
+    """串流目前讀到的檔案位置；解壓縮串流為已讀取的壓縮檔位元組數（用於回報處理進度）"""
+    raw = getattr(stream, "raw", None)
+    if isinstance(raw, _GuardedReader):
+        return raw.source_position()
+    return stream.tell()
+
+
+def _check_size(decompressed: int, compressed: int, max_ratio: int, max_bytes: int):
+    if decompressed > max_bytes:
+        raise DecompressionBombError(
+            f"解壓縮後的檔案超過上限 {max_bytes // (1024 * 1024)}MB"
+        )
+    if decompressed > _MIN_GUARDED_BYTES and decompressed > max(compressed, 1) * max_ratio:
+        raise DecompressionBombError(f"壓縮率超過上限 {max_ratio} 倍，疑似解壓縮炸彈")
+
+
+class _GuardedReader(io.RawIOBase):
+    """計算解壓縮後的位元組數，超過大小或壓縮率上限時停止讀取"""
+
+    def __init__(self, raw, source: BinaryIO, max_ratio: int, max_bytes: int):
+        self._raw = raw
+        self._source = source
+        self._compressed_size = os.fstat(source.fileno()).st_size
+        self._max_ratio = max_ratio
+        self._max_bytes = max_bytes
+        self._total = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._raw.read(len(buffer))
+        size = len(data)
+        buffer[:size] = data
+        self._total += size
+        _check_size(self._total, self._compressed_size, self._max_ratio, self._max_bytes)
+        return size
+
+    def source_position(self) -> int:
+        return self._source.tell()
+
+    def close(self):
+        if not self.closed:
+            self._raw.close()
+            self._source.close()
+        super().close()
+
+
+class _ZipMemberReader:
+    """ZIP 成員串流，關閉時一併關閉 ZIP 檔"""
+
+    def __init__(self, archive: zipfile.ZipFile, member):
+        self._archive = archive
+        self._member = member
+
+    def read(self, size: int = -1) -> bytes:
+        return self._member.read(size)
+
+    def close(self):
+        self._member.close()
+        self._archive.close()
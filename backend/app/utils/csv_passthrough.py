@@ -0,0 +1,427 @@
+import os
+import codecs
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from pandas._libs.parsers import STR_NA_VALUES
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # 未安裝時全部以 Python 逐列處理
+    pa = None
+
+# 與 pandas 預設相同的空值字串（以及空欄位），這些值歸入「空值」群組
+NULL_TOKENS = frozenset({b''} | {value.encode('ascii') for value in STR_NA_VALUES})
+
+# 多位元組編碼（Big5、GBK 等）的第二個位元組從 0x40 開始，低於此值的 ASCII 字元不會出現在字元中間
+_MULTIBYTE_SAFE_MAX = 0x40
+_SINGLE_BYTE_ENCODINGS = {'ascii', 'utf-8', 'latin-1', 'iso8859-1', 'cp1252'}
+
+_UTF8_BOM = codecs.BOM_UTF8
+
+# 尋找範圍邊界時每次往後讀取的大小
+_BOUNDARY_SCAN_BYTES = 64 * 1024
+
+
+class PassthroughUnsupportedError(ValueError):
+    """檔案無法以位元組直通方式切分（編碼、分隔符或標題列不適用），應改用一般模式"""
+
+
+def passthrough_supported(encoding: str, sep: str, quotechar: str) -> bool:
+    """
+    是否能直接在原始位元組上尋找分隔符與引號
+
+    UTF-8 與單位元組編碼的 ASCII 字元不會出現在其他字元的位元組中；
+    Big5、GBK 等雙位元組編碼只有 0x40 以下的字元（逗號、tab、引號）是安全的。
+    """
+    if len(sep) != 1 or len(quotechar) != 1 or ord(sep) >= 0x80 or ord(quotechar) >= 0x80:
+        return False
+    if codecs.lookup(encoding).name in _SINGLE_BYTE_ENCODINGS:
+        return True
+    return ord(sep) < _MULTIBYTE_SAFE_MAX and ord(quotechar) < _MULTIBYTE_SAFE_MAX
+
+
+class RowBlock:
+    """
+    連續存放的多筆原始資料列（每筆含結尾 \\n）
+
+    offsets[i] 為第 i 筆資料列的起始位移，切片時不複製資料。
+    """
+
+    def __init__(self, data, offsets: np.ndarray):
+        self.data = memoryview(data)
+        self.offsets = offsets
+
+    @classmethod
+    def from_records(cls, records: List[bytes]) -> "RowBlock":
+        lengths = np.fromiter(map(len, records), dtype=np.int64, count=len(records)) + 1
+        offsets = np.zeros(len(records) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return cls(b'\n'.join(records) + b'\n', offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, rows: slice) -> "RowBlock":
+        start, stop, _ = rows.indices(len(self))
+        begin, end = int(self.offsets[start]), int(self.offsets[stop])
+        return RowBlock(self.data[begin:end], self.offsets[start:stop + 1] - begin)
+
+
+def read_header(file_path: str, quote: bytes, has_header: bool) -> Tuple[Optional[bytes], int]:
+    """
+    讀取標題列（略過開頭的 UTF-8 BOM 與空白行）
+
+    Returns:
+        (標題列位元組（不含 \\n），資料開始的位移)；沒有標題列時標題列為 None
+    """
+    with open(file_path, 'rb') as f:
+        offset = len(_UTF8_BOM) if f.read(len(_UTF8_BOM)) == _UTF8_BOM else 0
+        if not has_header:
+            return None, offset
+        f.seek(offset)
+        record = None
+        for line in f:
+            offset += len(line)
+            line = line[:-1] if line.endswith(b'\n') else line
+            if record is not None:
+                record += b'\n' + line
+            elif line and line != b'\r':
+                record = line
+            else:
+                continue
+            if record.count(quote) % 2 == 0:
+                return record, offset
+    if record is None:
+        raise ValueError("檔案沒有任何資料")
+    return record, offset
+
+
+def iter_line_blocks(file_path: str, start: int, block_size: int, end: Optional[int] = None) -> Iterator[bytes]:
+    """從 start 讀取到 end（預設為檔案結尾），產生以完整行結尾的區塊（最後一行沒有換行時補上 \\n）"""
+    carry = b''
+    remaining = end - start if end is not None else None
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        while remaining is None or remaining > 0:
+            block = f.read(block_size if remaining is None else min(block_size, remaining))
+            if remaining is not None:
+                remaining -= len(block)
+            if not block:
+                break
+            block = carry + block
+            cut = block.rfind(b'\n') + 1
+            carry = block[cut:]
+            if cut:
+                yield block[:cut]
+    if carry:
+        yield carry + b'\n'
+
+
+def record_boundaries(file_path: str, start: int, parts: int, quote: bytes, block_size: int) -> List[int]:
+    """
+    將 start 之後的資料切成約 parts 個位元組範圍，回傳範圍邊界（含頭尾）
+
+    每個邊界都是資料列的起點：從等分點往後找第一個引號數量（自 start 起累計）為偶數的換行，
+    引號內的換行不會被當成邊界。邊界與逐列解析時的資料列結尾完全一致。
+    """
+    size = os.path.getsize(file_path)
+    boundaries = [start]
+    quotes = 0  # [start, position) 之間的引號數
+    position = start
+    with open(file_path, 'rb') as f:
+        for i in range(1, parts):
+            target = start + (size - start) * i // parts
+            if target <= boundaries[-1]:
+                continue
+            f.seek(position)
+            remaining = target - position
+            while remaining > 0:
+                block = f.read(min(block_size, remaining))
+                if not block:
+                    break
+                quotes += block.count(quote)
+                remaining -= len(block)
+            position = target
+
+            boundary = None
+            while boundary is None:
+                block = f.read(_BOUNDARY_SCAN_BYTES)
+                if not block:
+                    break
+                line_start = 0
+                while True:
+                    newline = block.find(b'\n', line_start)
+                    if newline < 0:
+                        quotes += block.count(quote, line_start)
+                        position += len(block)
+                        break
+                    quotes += block.count(quote, line_start, newline)
+                    line_start = newline + 1
+                    if quotes % 2 == 0:
+                        boundary = position + line_start
+                        break
+            if boundary is None or boundary >= size:
+                break
+            boundaries.append(boundary)
+            position = boundary
+    boundaries.append(size)
+    return boundaries
+
+
+class BlockGrouper:
+    """
+    依切分欄位將原始資料列區塊分組
+
+    不含引號的區塊以 Arrow 運算切出欄位並排序（pyarrow 已安裝時），
+    含引號的區塊以 Python 逐列解析，引號內的換行會合併為同一筆資料列。
+    空白行略過（與 pandas 相同）。
+    """
+
+    def __init__(self, index: int, sep: bytes, quote: bytes):
+        self.index = index
+        self.sep = sep
+        self.quote = quote
+        self.rows = 0
+        self._pending: Optional[bytes] = None  # 跨區塊、引號尚未結束的資料列
+
+    def group(self, block: bytes) -> Dict[Optional[bytes], RowBlock]:
+        """將區塊分組，回傳 {欄位值（空值為 None）: 資料列}"""
+        if self._pending is None and pa is not None and self.quote not in block:
+            return self._group_arrow(block)
+        lines = block.split(b'\n')
+        lines.pop()  # 區塊以 \n 結尾
+        return self._group_records(self._collect_records(lines))
+
+    def finish(self) -> Dict[Optional[bytes], RowBlock]:
+        """檔案結束時引號仍未結束，與 csv 模組相同保留剩餘內容"""
+        if self._pending is None:
+            return {}
+        records = [self._pending]
+        self._pending = None
+        return self._group_records(records)
+
+    def _collect_records(self, lines: List[bytes]) -> List[bytes]:
+        quote = self.quote
+        pending = self._pending
+        records = []
+        for line in lines:
+            if pending is not None:
+                pending += b'\n' + line
+                if pending.count(quote) % 2 == 0:
+                    records.append(pending)
+                    pending = None
+            elif quote in line and line.count(quote) % 2:
+                pending = line
+            elif line and line != b'\r':
+                records.append(line)
+        self._pending = pending
+        return records
+
+    def _group_records(self, records: List[bytes]) -> Dict[Optional[bytes], RowBlock]:
+        index, sep, quote = self.index, self.sep, self.quote
+        buckets: Dict[Optional[bytes], List[bytes]] = {}
+        for record in records:
+            key = extract_field(record, index, sep, quote)
+            if key in NULL_TOKENS:
+                key = None
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = []
+            bucket.append(record)
+        self.rows += len(records)
+        return {key: RowBlock.from_records(bucket) for key, bucket in buckets.items()}
+
+    def _group_arrow(self, block: bytes) -> Dict[Optional[bytes], RowBlock]:
+        data = np.frombuffer(block, dtype=np.uint8)
+        ends = np.flatnonzero(data == 10) + 1
+        offsets = np.concatenate(([0], ends)).astype(np.int64)
+        lines = pa.Array.from_buffers(
+            pa.large_binary(), len(ends), [None, pa.py_buffer(offsets), pa.py_buffer(block)]
+        )
+        lengths = np.diff(offsets)
+        blank = (lengths == 1) | ((lengths == 2) & (data[ends - 2] == 13))
+        if blank.any():
+            lines = lines.filter(pa.array(~blank))
+        self.rows += len(lines)
+        if not len(lines):
+            return {}
+
+        # 只切到切分欄位為止；欄位數不足的資料列為 null
+        fields = pc.split_pattern(lines, pattern=self.sep, max_splits=self.index + 1)
+        keys = pc.list_slice(fields, self.index, self.index + 1, return_fixed_size_list=True).flatten()
+        encoded = pc.dictionary_encode(keys)
+
+        # 最後一個欄位帶有結尾的 \n（以及 CRLF 的 \r），去除後合併相同的值
+        canonical: Dict[Optional[bytes], int] = {}
+        mapping = [
+            canonical.setdefault(_normalize_key(value), len(canonical))
+            for value in encoded.dictionary.to_pylist()
+        ]
+        mapping.append(canonical.setdefault(None, len(canonical)))
+        codes = np.asarray(mapping, dtype=np.int64)[
+            encoded.indices.fill_null(len(mapping) - 1).to_numpy(zero_copy_only=False)
+        ]
+        if len(canonical) <= np.iinfo(np.uint16).max:
+            # 群組數少時以 uint16 排序（numpy 對小整數的穩定排序為 radix sort）
+            codes = codes.astype(np.uint16)
+
+        order = np.argsort(codes, kind='stable')
+        counts = np.bincount(codes, minlength=len(canonical))
+        grouped = lines.take(pa.array(order))
+        row_offsets = np.frombuffer(grouped.buffers()[1], dtype=np.int64)[:len(grouped) + 1]
+        grouped_rows = RowBlock(grouped.buffers()[2], row_offsets - row_offsets[0])
+
+        result = {}
+        start = 0
+        for key, code in canonical.items():
+            count = int(counts[code])
+            if count:
+                result[key] = grouped_rows[start:start + count]
+                start += count
+        return result
+
+
+def _normalize_key(value: Optional[bytes]) -> Optional[bytes]:
+    if value is None:
+        return None
+    if value.endswith(b'\n'):
+        value = value[:-1]
+        if value.endswith(b'\r'):
+            value = value[:-1]
+    return None if value in NULL_TOKENS else value
+
+
+def split_fields(record: bytes, sep: bytes, quote: bytes, max_fields: Optional[int] = None) -> List[bytes]:
+    """
+    依分隔符切分一筆資料列並移除引號（"" 還原為 "）
+
+    指定 max_fields 時只切出前 max_fields 個欄位。
+    """
+    if record.endswith(b'\r'):
+        record = record[:-1]
+    if quote not in record:
+        if max_fields is None:
+            return record.split(sep)
+        return record.split(sep, max_fields)[:max_fields]
+
+    fields = []
+    i = 0
+    n = len(record)
+    while max_fields is None or len(fields) < max_fields:
+        if i < n and record[i:i + 1] == quote:
+            # 引號欄位：找到結尾引號，成對的 "" 代表一個引號字元
+            parts = []
+            j = i + 1
+            while True:
+                k = record.find(quote, j)
+                if k < 0:
+                    parts.append(record[j:])
+                    i = n
+                    break
+                if record[k + 1:k + 2] == quote:
+                    parts.append(record[j:k + 1])
+                    j = k + 2
+                    continue
+                parts.append(record[j:k])
+                i = k + 1
+                break
+            end = record.find(sep, i)
+            parts.append(record[i:] if end < 0 else record[i:end])
+            fields.append(b''.join(parts))
+        else:
+            end = record.find(sep, i)
+            fields.append(record[i:] if end < 0 else record[i:end])
+        if end < 0:
+            break
+        i = end + 1
+    return fields
+
+
+def extract_field(record: bytes, index: int, sep: bytes, quote: bytes) -> Optional[bytes]:
+    """取出第 index 個欄位的值；欄位數不足時回傳 None"""
+    if quote not in record:
+        parts = record.split(sep, index + 1)
+        if len(parts) <= index:
+            return None
+        value = parts[index]
+        # 最後一個欄位可能帶有 CRLF 的 \r
+        return value[:-1] if len(parts) == index + 1 and value.endswith(b'\r') else value
+    fields = split_fields(record, sep, quote, index + 1)
+    return fields[index] if len(fields) > index else None
+
+
+def record_ends(data: bytes, quote: bytes) -> np.ndarray:
+    """完整資料列組成的位元組中，每筆資料列的結尾位移（引號內的換行不算結尾）"""
+    array = np.frombuffer(data, dtype=np.uint8)
+    newlines = np.flatnonzero(array == 10)
+    if quote in data:
+        quotes = np.cumsum(array == ord(quote))
+        newlines = newlines[quotes[newlines] % 2 == 0]
+    return newlines.astype(np.int64) + 1
+
+
+def group_byte_range(
+    file_path: str,
+    start: int,
+    end: int,
+    indices: List[int],
+    sep: bytes,
+    quote: bytes,
+    encoding: str,
+    transcode: bool,
+    spool_prefix: str,
+    block_size: int,
+    buffer_bytes: int,
+    track_rows: bool
+) -> Tuple[int, Dict[Tuple[int, Optional[bytes]], Tuple[str, int, Optional[np.ndarray]]]]:
+    """
+    將檔案中的一個位元組範圍依 indices 中的每個欄位分組（在行程池中執行）
+
+    各群組的資料列依原始順序附加到 {spool_prefix}{N}.part 部分輸出檔，transcode 時轉為 UTF-8。
+    track_rows 時記錄每筆資料列在部分輸出檔中的結尾位移，供父行程依批次大小切分。
+
+    Returns:
+        (資料列數, {(欄位在 indices 中的順序, 欄位值（空值為 None）): (部分輸出檔路徑, 資料列數, 資料列結尾位移或 None)})
+    """
+    groupers = [BlockGrouper(index, sep, quote) for index in indices]
+    partials: Dict[Tuple[int, Optional[bytes]], list] = {}  # -> [路徑, 資料列數, 檔案大小, 結尾位移]
+    buffers: Dict[Tuple[int, Optional[bytes]], List[RowBlock]] = {}
+    buffered = 0
+
+    def flush():
+        for group_id, blocks in buffers.items():
+            partial = partials.get(group_id)
+            if partial is None:
+                partial = partials[group_id] = [f"{spool_prefix}{len(partials)}.part", 0, 0, []]
+            with open(partial[0], 'ab') as f:
+                for rows in blocks:
+                    data = str(rows.data, encoding).encode('utf-8') if transcode else rows.data
+                    f.write(data)
+                    if track_rows:
+                        ends = record_ends(data, quote) if transcode else rows.offsets[1:]
+                        partial[3].append(ends + partial[2])
+                    partial[1] += len(rows)
+                    partial[2] += len(data)
+        buffers.clear()
+
+    def collect(position: int, grouped: Dict):
+        for key, rows in grouped.items():
+            buffers.setdefault((position, key), []).append(rows)
+
+    for block in iter_line_blocks(file_path, start, block_size, end):
+        for position, grouper in enumerate(groupers):
+            collect(position, grouper.group(block))
+        buffered += len(block)
+        if buffered >= buffer_bytes:
+            flush()
+            buffered = 0
+    for position, grouper in enumerate(groupers):
+        collect(position, grouper.finish())
+    flush()
+
+    return groupers[0].rows, {
+        group_id: (path, rows, np.concatenate(ends) if track_rows else None)
+        for group_id, (path, rows, _, ends) in partials.items()
+    }
@@ -0,0 +1,131 @@
+import csv
+import io
+from typing import Dict, List, Optional
+
+
+# TXT 檔案支援的分隔符（依優先順序）
+TXT_DELIMITERS = ['\t', ',', ';', '|']
+
+# 使用者可用名稱指定的分隔符
+DELIMITER_ALIASES = {
+    'tab': '\t',
+    '\\t': '\t',
+    'comma': ',',
+    'semicolon': ';',
+    'pipe': '|',
+    'space': ' ',
+}
+
+
+def sniff_dialect(
+    sample: str,
+    complete: bool = False,
+    delimiters: List[str] = TXT_DELIMITERS
+) -> Optional[Dict]:
+    """
+    從文字樣本偵測分隔符、引號字元與是否有標題列
+
+    依優先順序選擇第一個能將標題列切成多欄，且樣本中沒有任何資料列
+    欄位數超過標題列的分隔符（與 pandas 完整解析成功的條件相同）。
+
+    Args:
+        sample: 檔案開頭的文字樣本
+        complete: 樣本是否為完整檔案；否則捨棄最後一行不完整的內容
+        delimiters: 候選分隔符
+
+    Returns:
+        {"sep", "quotechar", "header", "columns"}，無法分欄時回傳 None
+    """
+    if not complete and '\n' in sample:
+        sample = sample[:sample.rindex('\n') + 1]
+
+    quotechar = _guess_quotechar(sample, delimiters)
+
+    for sep in delimiters:
+        rows = _parse_rows(sample, sep, quotechar)
+        if not rows or len(rows[0]) <= 1:
+            continue
+        column_count = len(rows[0])
+        if all(len(row) <= column_count for row in rows[1:]):
+            return {
+                "sep": sep,
+                "quotechar": quotechar,
+                "header": _has_header(rows),
+                "columns": column_count
+            }
+
+    return None
+
+
+def normalize_dialect_override(
+    delimiter: Optional[str] = None,
+    quotechar: Optional[str] = None,
+    has_header: Optional[bool] = None
+) -> Optional[Dict]:
+    """
+    整理使用者於上傳時指定的格式設定
+
+    Returns:
+        只包含有指定項目的設定字典，未指定任何項目時回傳 None
+    """
+    dialect = {}
+
+    if delimiter:
+        delimiter = DELIMITER_ALIASES.get(delimiter.lower(), delimiter)
+        if len(delimiter) != 1:
+            raise ValueError(f"分隔符必須是單一字元: {delimiter!r}")
+        dialect["sep"] = delimiter
+
+    if quotechar:
+        if len(quotechar) != 1:
+            raise ValueError(f"引號字元必須是單一字元: {quotechar!r}")
+        dialect["quotechar"] = quotechar
+
+    if has_header is not None:
+        dialect["header"] = has_header
+
+    return dialect or None
+
+
+def _guess_quotechar(sample: str, delimiters: List[str]) -> str:
+    """以 csv.Sniffer 推測引號字元，無法判斷時使用雙引號"""
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=''.join(delimiters)).quotechar or '"'
+    except csv.Error:
+        return '"'
+
+
+def _parse_rows(sample: str, sep: str, quotechar: str) -> List[List[str]]:
+    """以指定分隔符解析樣本，略過空白行（與 pandas 預設行為相同）"""
+    try:
+        reader = csv.reader(io.StringIO(sample), delimiter=sep, quotechar=quotechar)
+        return [row for row in reader if row]
+    except csv.Error:
+        return []
+
+
+def _has_header(rows: List[List[str]]) -> bool:
+    """
+    判斷第一列是否為標題列
+
+    若某欄位在樣本資料列中全為數值，且第一列該欄位也是數值，
+    則第一列視為資料而非標題。
+    """
+    if len(rows) < 2:
+        return True
+
+    for index, first_value in enumerate(rows[0]):
+        values = [row[index] for row in rows[1:] if index < len(row) and row[index].strip()]
+        if values and _is_number(first_value) and all(_is_number(value) for value in values):
+            return False
+
+    return True
+
+
+def _is_number(value: str) -> bool:
+    """檢查字串是否為數值"""
+    try:
+        float(value)
+        return True
+    except ValueError:
+        return False
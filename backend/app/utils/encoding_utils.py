@@ -0,0 +1,109 @@
+import codecs
+import os
+from typing import BinaryIO, Iterator, List, Tuple, Union
+
+from chardet.universaldetector import UniversalDetector
+
+
+# chardet 偵測結果對應到較寬鬆的超集編碼，避免樣本外的罕用字解碼失敗
+ENCODING_SUPERSETS = {
+    'ascii': 'utf-8',
+    'gb2312': 'gbk',
+}
+
+
+def detect_encoding(
+    file_path: Union[str, BinaryIO],
+    candidates: List[str],
+    max_sample_bytes: int = 2 * 1024 * 1024,
+    block_size: int = 64 * 1024
+) -> Tuple[str, float]:
+    """
+    以檔案樣本漸進式偵測編碼
+
+    先讀取檔案開頭，其餘額度平均分散到檔案各處（分層抽樣），
+    chardet 一旦達到高信心即停止讀取。偵測結果會再以樣本驗證能否解碼，
+    失敗時依序改用候選編碼。傳入無法跳躍讀取的串流（例如解壓縮中的檔案）時只讀取開頭。
+
+    Args:
+        file_path: 檔案路徑或二進位串流
+        candidates: 偵測失敗時依序嘗試的候選編碼
+        max_sample_bytes: 最多讀取的樣本大小（位元組）
+        block_size: 每次餵入偵測器的區塊大小（位元組）
+
+    Returns:
+        (encoding, confidence)
+    """
+    detector = UniversalDetector()
+    blocks = []
+    for block, contiguous in _iter_sample_blocks(file_path, max_sample_bytes, block_size):
+        blocks.append((block, contiguous))
+        detector.feed(block)
+        if detector.done:
+            break
+    detector.close()
+
+    detected = (detector.result.get('encoding') or 'utf-8').lower()
+    detected = ENCODING_SUPERSETS.get(detected, detected)
+    confidence = float(detector.result.get('confidence') or 0.0)
+
+    encodings_to_try = [detected] + [enc for enc in candidates if enc != detected]
+    for encoding in encodings_to_try:
+        if _can_decode(blocks, encoding):
+            if encoding != detected:
+                confidence = 0.0
+            return encoding, round(confidence, 2)
+
+    raise ValueError(f"無法判斷檔案編碼，已嘗試編碼: {encodings_to_try}")
+
+
+def _iter_sample_blocks(
+    file_path: Union[str, BinaryIO],
+    max_sample_bytes: int,
+    block_size: int
+) -> Iterator[Tuple[bytes, bool]]:
+    """依序產生 (樣本區塊, 是否緊接前一區塊)，包含檔案開頭與分散於檔案各處的區塊"""
+    if not isinstance(file_path, str):
+        for _ in range(max(max_sample_bytes // block_size, 1)):
+            block = file_path.read(block_size)
+            if not block:
+                return
+            yield block, True
+        return
+
+    file_size = os.path.getsize(file_path)
+
+    with open(file_path, 'rb') as f:
+        if file_size <= max_sample_bytes:
+            for block in iter(lambda: f.read(block_size), b''):
+                yield block, True
+            return
+
+        # 開頭佔一半額度，其餘分散到檔案後段
+        head_bytes = max_sample_bytes // 2
+        for _ in range(max(head_bytes // block_size, 1)):
+            yield f.read(block_size), True
+
+        stride_count = max((max_sample_bytes - head_bytes) // block_size, 1)
+        stride = (file_size - head_bytes) // stride_count
+        for i in range(stride_count):
+            f.seek(head_bytes + i * stride)
+            block = f.read(block_size)
+            # 對齊到下一行開頭，避免從多位元組字元中間切入
+            newline = block.find(b'\n')
+            if newline >= 0:
+                yield block[newline + 1:], False
+
+
+def _can_decode(blocks: List[Tuple[bytes, bool]], encoding: str) -> bool:
+    """檢查樣本區塊能否以指定編碼解碼（允許區塊結尾截斷的字元）"""
+    try:
+        decoder = codecs.getincrementaldecoder(encoding)()
+        for block, contiguous in blocks:
+            if not contiguous:
+                decoder = codecs.getincrementaldecoder(encoding)()
+            decoder.decode(block, final=False)
+    except (UnicodeDecodeError, LookupError):
+        return False
+    return True
+
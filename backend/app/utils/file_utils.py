@@ -1,8 +1,16 @@
 import os
+import hashlib
 import mimetypes
 from pathlib import Path
 from typing import Optional, Tuple
 import magic
+from fastapi.concurrency import run_in_threadpool
+
+from .compression_utils import is_supported_compressed_name
+
+
+class FileTooLargeError(ValueError):
+    """上傳檔案超過大小限制"""
 
 
 def get_file_type(file_path: str) -> Tuple[str, str]:
@@ -60,7 +68,7 @@ def get_file_size_mb(file_path: str) -> float:
 
 def is_supported_file_type(filename: str) -> bool:
     """
-    檢查是否為支援的檔案類型
+    檢查是否為支援的檔案類型（含 .gz/.bz2/.zst/.zip 壓縮的 CSV/TXT）
     
     Args:
         filename: 檔案名稱
@@ -70,7 +78,7 @@ def is_supported_file_type(filename: str) -> bool:
     """
     supported_extensions = {'.csv', '.xlsx', '.xls', '.txt'}
     extension = Path(filename).suffix.lower()
-    return extension in supported_extensions
+    return extension in supported_extensions or is_supported_compressed_name(filename)
 
 
 def sanitize_filename(filename: str) -> str:
@@ -139,4 +147,53 @@ def get_available_filename(file_path: str) -> str:
         if not new_path.exists():
             return str(new_path)
         
-        counter += 1
\ No newline at end of file
+        counter += 1
+
+
+async def save_upload_file(
+    upload_file,
+    destination: str,
+    max_size_bytes: int,
+    chunk_size: int = 1024 * 1024
+) -> Tuple[int, str]:
+    """
+    以固定大小區塊將上傳檔案串流寫入磁碟，同時檢查大小限制並計算 SHA-256
+    
+    Args:
+        upload_file: FastAPI UploadFile 物件
+        destination: 目標檔案路徑
+        max_size_bytes: 最大檔案大小（位元組）
+        chunk_size: 每次讀取的區塊大小（位元組）
+        
+    Returns:
+        (size_bytes, sha256_hex)
+        
+    Raises:
+        FileTooLargeError: 檔案超過大小限制，已寫入的部分會被刪除
+    """
+    ensure_directory_exists(os.path.dirname(destination))
+    sha256 = hashlib.sha256()
+    size_bytes = 0
+    
+    try:
+        with open(destination, 'wb') as f:
+            while True:
+                chunk = await upload_file.read(chunk_size)
+                if not chunk:
+                    break
+                size_bytes += len(chunk)
+                if size_bytes > max_size_bytes:
+                    raise FileTooLargeError(f"檔案超過 {max_size_bytes // (1024 * 1024)}MB 限制")
+                # 雜湊與寫入磁碟在執行緒池中進行，不阻塞事件迴圈
+                await run_in_threadpool(_write_chunk, f, sha256, chunk)
+    except Exception:
+        if os.path.exists(destination):
+            os.remove(destination)
+        raise
+    
+    return size_bytes, sha256.hexdigest()
+
+
+def _write_chunk(f, sha256, chunk: bytes) -> None:
+    sha256.update(chunk)
+    f.write(chunk)
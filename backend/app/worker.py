@@ -0,0 +1,119 @@
+"""
+檔案切分 worker
+
+從 Redis 佇列取出切分任務並執行，與 API 程序分開部署與擴展：
+
+    python -m app.worker
+"""
+import asyncio
+import logging
+import os
+import signal
+import socket
+
+from .core.config import settings
+from .core.redis_client import redis_client
+from .services.job_queue import JobQueue
+from .services.task_executor import processing_executor
+from .services.storage_manager import storage_manager
+from .services.task_runner import run_split_task, mark_task_error
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+logger = logging.getLogger("app.worker")
+
+
+class Worker:
+    """Redis 佇列 worker - 同時處理 WORKER_CONCURRENCY 個任務，並定期更新心跳"""
+
+    def __init__(self, worker_id: str = None):
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.queue = JobQueue(redis_client)
+        self.stopping = asyncio.Event()
+
+    async def run(self):
+        """啟動 worker，直到收到 SIGTERM/SIGINT"""
+        await redis_client.connect()
+        processing_executor.start()
+        storage_manager.start()
+
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, self.stopping.set)
+
+        await self.queue.heartbeat(self.worker_id)
+        await self.queue.recover_orphaned_jobs()
+        logger.info(f"Worker {self.worker_id} 已啟動，並行數: {settings.WORKER_CONCURRENCY}")
+
+        heartbeat = asyncio.create_task(self._heartbeat_loop())
+        try:
+            await asyncio.gather(*(self._slot() for _ in range(settings.WORKER_CONCURRENCY)))
+        finally:
+            heartbeat.cancel()
+            await self.queue.unregister(self.worker_id)
+            storage_manager.shutdown()
+            processing_executor.shutdown()
+            await redis_client.disconnect()
+            logger.info(f"Worker {self.worker_id} 已停止")
+
+    async def _heartbeat_loop(self):
+        """更新心跳，並接手其他已停止 worker 遺留的任務"""
+        interval = max(settings.WORKER_HEARTBEAT_TTL // 3, 1)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.queue.heartbeat(self.worker_id)
+                await self.queue.recover_orphaned_jobs()
+            except Exception as e:
+                logger.error(f"心跳更新失敗: {str(e)}")
+
+    async def _slot(self):
+        """
+        單一處理槽：取出任務、執行、確認完成；收到停止訊號後處理完手上的任務才結束
+
+        Redis 暫時無法使用時記錄錯誤並在 WORKER_RETRY_DELAY 秒後重試，不讓單一錯誤停止整個 worker。
+        """
+        while not self.stopping.is_set():
+            try:
+                item = await self.queue.dequeue(self.worker_id, settings.WORKER_POLL_TIMEOUT)
+            except Exception as e:
+                logger.error(f"取出任務失敗: {str(e)}")
+                await self._backoff()
+                continue
+            if item is None:
+                continue
+
+            raw, job = item
+            task_id = job.pop("task_id")
+            attempts = job.pop("attempts")
+
+            if attempts > settings.JOB_MAX_ATTEMPTS:
+                logger.error(f"任務 {task_id} 已執行 {attempts - 1} 次仍未完成，停止重試")
+                await mark_task_error(task_id, "檔案處理多次中斷，請重新上傳")
+            else:
+                logger.info(f"Worker {self.worker_id} 開始處理任務 {task_id}（第 {attempts} 次）")
+                await run_split_task(task_id, **job)
+
+            await self._ack(raw, task_id)
+
+    async def _ack(self, raw: str, task_id: str):
+        """確認任務完成，失敗時重試；停止前仍未確認的任務留在處理中列表，由其他 worker 接手"""
+        while True:
+            try:
+                await self.queue.ack(self.worker_id, raw, task_id)
+                return
+            except Exception as e:
+                logger.error(f"確認任務 {task_id} 完成失敗: {str(e)}")
+                if self.stopping.is_set():
+                    return
+                await self._backoff()
+
+    async def _backoff(self):
+        """等待 WORKER_RETRY_DELAY 秒，收到停止訊號時立即返回"""
+        try:
+            await asyncio.wait_for(self.stopping.wait(), timeout=settings.WORKER_RETRY_DELAY)
+        except asyncio.TimeoutError:
+            pass
+
+
+if __name__ == "__main__":
+    asyncio.run(Worker().run())
@@ -0,0 +1,93 @@
+import zipfile
+from itertools import count
+
+import fakeredis
+import pytest
+import pytest_asyncio
+
+from app.core.redis_client import get_redis_client
+
+
+@pytest_asyncio.fixture
+async def redis_client():
+    """以 fakeredis 連線的全局 Redis 客戶端（服務與 worker 共用同一個實例）"""
+    client = get_redis_client()
+    await client.connect(connection=fakeredis.FakeAsyncRedis(decode_responses=True))
+    yield client
+    await client.disconnect()
+
+
+@pytest.fixture
+def run_split(tmp_path, monkeypatch):
+    """
+    以指定設定執行一次 FileProcessor.process_file，回傳 (file_details, {ZIP 項目名稱: 內容})
+
+    關閉欄式快取，每次執行使用各自的工作目錄，方便比較不同處理模式的輸出。
+    """
+    from app.core.config import settings
+    from app.services.file_processor import FileProcessor
+
+    monkeypatch.setattr(settings, "COLUMNAR_CACHE_ENABLED", False)
+    runs = count()
+
+    def run(file_path, filename, column_name, batch_size=None, **overrides):
+        with monkeypatch.context() as patch:
+            for name, value in overrides.items():
+                patch.setattr(settings, name, value)
+            work_dir = str(tmp_path / f"run{next(runs)}")
+            result = FileProcessor(work_dir).process_file(file_path, filename, column_name, batch_size)
+        assert result["success"], result.get("error")
+        with zipfile.ZipFile(result["zip_path"]) as archive:
+            entries = {name: archive.read(name) for name in archive.namelist()}
+        return result["file_details"], entries
+
+    return run
+
+
+# 各處理模式與一般模式比較用的 CSV：(內容, 編碼)
+SAMPLE_CSVS = {
+    "nulls.csv": (
+        "store,region,amount,note\n"
+        "A01,北區,10,\n"
+        ",南區,2.5,有備註\n"
+        "A02,,NA,\n"
+        "A01,北區,,n/a\n"
+        "A10,南區,7,再一筆\n"
+        ",,3,\n"
+        "A02,北區,10,最後\n",
+        "utf-8",
+    ),
+    "quoted.csv": (
+        'store,region,note\n'
+        '"A,01",北區,"含,逗號"\n'
+        'B02,"南區","含""引號"""\n'
+        '"A,01","北區","跨\n行"\n'
+        'C03,東區,一般\n'
+        'B02,南區,"""開頭引號"\n',
+        "utf-8",
+    ),
+    "big5.csv": (
+        "門市,地區,金額\n" + "".join(
+            f"{['王五', '李四', '張三'][i % 3]},{['臺北市', '高雄市', '臺中市'][i % 4 % 3]},{i * 10}\n"
+            for i in range(40)
+        ),
+        "big5",
+    ),
+    "bom.csv": (
+        "﻿門市,地區,金額\r\n" + "".join(
+            f"{['S1', 'S2', 'S10'][i % 3]},{['北', '南'][i % 2]},{i}.5\r\n" for i in range(30)
+        ),
+        "utf-8",
+    ),
+}
+
+
+@pytest.fixture(params=sorted(SAMPLE_CSVS))
+def sample_csv(request, tmp_path):
+    """寫出一個比較用 CSV，回傳 (路徑, 檔名, 欄位列表)"""
+    filename = request.param
+    content, encoding = SAMPLE_CSVS[filename]
+    path = tmp_path / filename
+    path.write_bytes(content.encode(encoding))
+    header = content.lstrip("﻿").split("\n", 1)[0].strip("\r")
+    return str(path), filename, header.split(",")
@@ -0,0 +1,29 @@
+import logging
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+PANDAS = {"STREAMING_SPLIT_ENABLED": False, "CSV_BACKEND": "pandas"}
+ARROW = {"STREAMING_SPLIT_ENABLED": False, "CSV_BACKEND": "arrow"}
+
+
+@pytest.mark.parametrize("batch_size", [None, 2])
+def test_arrow_matches_pandas(run_split, sample_csv, batch_size, caplog):
+    caplog.set_level(logging.INFO, logger="app.services.file_processor")
+    path, filename, columns = sample_csv
+    for column_name in (columns[0], columns[1], columns[:2]):
+        expected = run_split(path, filename, column_name, batch_size, **PANDAS)
+        actual = run_split(path, filename, column_name, batch_size, **ARROW)
+        assert "Arrow 模式成功切分" in caplog.text
+        caplog.clear()
+        assert actual == expected, column_name
+
+
+def test_arrow_composite_key_falls_back_to_pandas(run_split, sample_csv, caplog):
+    caplog.set_level(logging.INFO, logger="app.services.file_processor")
+    path, filename, columns = sample_csv
+    expected = run_split(path, filename, [columns[:2]], **PANDAS)
+    actual = run_split(path, filename, [columns[:2]], **ARROW)
+    assert "Arrow 模式成功切分" not in caplog.text
+    assert actual == expected
@@ -0,0 +1,40 @@
+from app.core.config import settings
+from app.services.file_processor import FileProcessor
+from app.utils.cardinality_utils import extrapolate_distinct
+
+
+def _write_csv(path, rows: int) -> str:
+    with open(path, "w") as f:
+        f.write("id,region\n")
+        for i in range(rows):
+            f.write(f"{i:08d},R{i % 5}\n")
+    return str(path)
+
+
+def test_profile_reads_whole_file_below_sample_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CARDINALITY_SAMPLE_ROWS", 10000)
+    file_path = _write_csv(tmp_path / "small.csv", 500)
+    profile = FileProcessor(str(tmp_path)).profile_columns(file_path, "small.csv")
+    assert profile["sampled"] is False
+    assert profile["total_rows"] == 500
+    assert profile["columns"]["region"]["distinct_estimate"] == 5
+
+
+def test_profile_extrapolates_from_sample(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CARDINALITY_SAMPLE_ROWS", 20000)
+    monkeypatch.setattr(settings, "STREAMING_CHUNK_ROWS", 5000)
+    file_path = _write_csv(tmp_path / "large.csv", 400000)
+    profile = FileProcessor(str(tmp_path)).profile_columns(file_path, "large.csv")
+    assert profile["sampled"] is True
+    assert profile["sample_rows"] == 20000
+    # 依讀取位置推估總行數，只要求大致正確
+    assert 0.8 * 400000 < profile["total_rows"] < 1.2 * 400000
+    # 每行不同的欄位依行數放大，少數重複值的欄位維持樣本的數量
+    assert profile["columns"]["id"]["distinct_estimate"] > 0.9 * profile["total_rows"]
+    assert profile["columns"]["region"]["distinct_estimate"] == 5
+
+
+def test_extrapolate_distinct_bounds():
+    assert extrapolate_distinct(100, 1000, 1000) == 100
+    assert extrapolate_distinct(1000, 1000, 5000) == 5000
+    assert extrapolate_distinct(3, 1000, 10 ** 6) == 3
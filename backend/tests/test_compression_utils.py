@@ -0,0 +1,115 @@
+import bz2
+import gzip
+import zipfile
+
+import pytest
+
+from app.utils import compression_utils
+from app.utils.compression_utils import DecompressionBombError, inner_filename, open_decompressed
+
+MB = 1024 * 1024
+CONTENT = b"store,value\n" + b"".join(b"S%d,%d\n" % (i % 7, i) for i in range(2000))
+
+
+def _write_zip(path, members):
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return str(path)
+
+
+def _compressed(tmp_path, compression: str, data: bytes) -> str:
+    if compression == "gzip":
+        path = tmp_path / "data.csv.gz"
+        path.write_bytes(gzip.compress(data))
+    elif compression == "bz2":
+        path = tmp_path / "data.csv.bz2"
+        path.write_bytes(bz2.compress(data))
+    elif compression == "zstd":
+        zstandard = pytest.importorskip("zstandard")
+        path = tmp_path / "data.csv.zst"
+        path.write_bytes(zstandard.ZstdCompressor().compress(data))
+    else:
+        path = tmp_path / "data.zip"
+        _write_zip(path, {"data.csv": data})
+    return str(path)
+
+
+def _read_all(path: str, compression: str, max_ratio: int = 100, max_bytes: int = 100 * MB) -> bytes:
+    with open_decompressed(path, compression, max_ratio, max_bytes) as stream:
+        return stream.read()
+
+
+@pytest.mark.parametrize("compression", ["gzip", "bz2", "zstd", "zip"])
+def test_open_decompressed_round_trip(tmp_path, compression):
+    path = _compressed(tmp_path, compression, CONTENT)
+    assert _read_all(path, compression) == CONTENT
+
+
+@pytest.mark.parametrize("compression", ["gzip", "bz2", "zstd", "zip"])
+def test_decompressed_size_limit(tmp_path, compression):
+    path = _compressed(tmp_path, compression, CONTENT)
+    with pytest.raises(DecompressionBombError):
+        _read_all(path, compression, max_bytes=len(CONTENT) - 1)
+
+
+@pytest.mark.parametrize("compression", ["gzip", "zip"])
+def test_compression_ratio_limit(tmp_path, compression):
+    # 17MB 的零壓縮後只有數十 KB，超過 16MB 後依壓縮率拒絕
+    path = _compressed(tmp_path, compression, bytes(17 * MB))
+    with pytest.raises(DecompressionBombError, match="壓縮率"):
+        _read_all(path, compression, max_ratio=100)
+    assert len(_read_all(path, compression, max_ratio=10 ** 6)) == 17 * MB
+
+
+def test_ratio_not_checked_for_small_outputs(tmp_path):
+    # 16MB 以下的高壓縮率內容（例如大量重複值）仍可讀取
+    path = _compressed(tmp_path, "gzip", bytes(MB))
+    assert len(_read_all(path, "gzip", max_ratio=2)) == MB
+
+
+def test_inner_filename_of_stream_formats(tmp_path):
+    path = _compressed(tmp_path, "gzip", CONTENT)
+    assert inner_filename(path, "sales.csv.gz", 100, 100 * MB) == "sales.csv"
+    with pytest.raises(ValueError, match="CSV 與 TXT"):
+        inner_filename(path, "sales.xlsx.gz", 100, 100 * MB)
+
+
+def test_inner_filename_of_single_member_zip(tmp_path):
+    path = _write_zip(tmp_path / "upload.zip", {"folder/": b"", "folder/report.txt": CONTENT})
+    assert inner_filename(path, "upload.zip", 100, 100 * MB) == "report.txt"
+
+
+def test_zip_with_several_members_is_rejected(tmp_path):
+    path = _write_zip(tmp_path / "upload.zip", {"a.csv": CONTENT, "b.csv": CONTENT})
+    with pytest.raises(ValueError, match="只包含一個檔案"):
+        inner_filename(path, "upload.zip", 100, 100 * MB)
+
+
+def test_empty_zip_is_rejected(tmp_path):
+    path = _write_zip(tmp_path / "upload.zip", {})
+    with pytest.raises(ValueError, match="實際包含 0 個"):
+        inner_filename(path, "upload.zip", 100, 100 * MB)
+
+
+def test_zip_declared_size_is_checked_before_reading(tmp_path):
+    path = _write_zip(tmp_path / "upload.zip", {"bomb.csv": bytes(17 * MB)})
+    with pytest.raises(DecompressionBombError):
+        inner_filename(path, "upload.zip", 100, 100 * MB)
+    with pytest.raises(DecompressionBombError):
+        inner_filename(path, "upload.zip", 10 ** 6, 16 * MB)
+
+
+def test_invalid_zip_is_rejected(tmp_path):
+    path = tmp_path / "upload.zip"
+    path.write_bytes(b"not a zip file")
+    with pytest.raises(ValueError, match="無法讀取"):
+        inner_filename(str(path), "upload.zip", 100, 100 * MB)
+
+
+def test_zstd_requires_module(monkeypatch):
+    monkeypatch.setattr(compression_utils, "zstandard", None)
+    assert not compression_utils.is_supported_compressed_name("data.csv.zst")
+    assert compression_utils.is_supported_compressed_name("data.csv.gz")
+    assert not compression_utils.is_supported_compressed_name("data.xlsx.gz")
+    assert compression_utils.is_supported_compressed_name("data.zip")
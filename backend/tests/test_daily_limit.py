@@ -0,0 +1,76 @@
+import hashlib
+import os
+from datetime import datetime
+
+import pytest
+from fastapi import BackgroundTasks, HTTPException
+
+from app.api.endpoints import files
+from app.core.config import settings
+from app.models.task import TaskStatus
+from app.models.user import User
+from app.services import task_runner
+from app.services.result_cache import ResultCache
+from app.services.task_store import TaskStore
+
+CONTENT = b"id,region\n1,A\n2,B\n"
+
+
+@pytest.fixture
+def free_user_at_limit(tmp_path, monkeypatch, redis_client):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setattr(settings, "OUTPUT_DIR", str(tmp_path / "outputs"))
+    monkeypatch.setattr(settings, "RESULT_CACHE_ENABLED", True)
+    monkeypatch.setattr(task_runner, "result_cache", ResultCache(cache_dir=str(tmp_path / "results"), max_bytes=1024 * 1024))
+    user = User(user_id="u1", email="u1@example.com")
+    usage_key = f"daily_usage:u1:{datetime.now().strftime('%Y-%m-%d')}"
+    return user, usage_key
+
+
+async def _register(redis_client, user, task_id, column_name):
+    file_path = os.path.join(settings.UPLOAD_DIR, task_id, "a.csv")
+    os.makedirs(os.path.dirname(file_path))
+    with open(file_path, "wb") as f:
+        f.write(CONTENT)
+    return await files._register_upload(
+        BackgroundTasks(), redis_client, user, task_id, "a.csv", file_path,
+        len(CONTENT), hashlib.sha256(CONTENT).hexdigest(), column_name, None, None
+    )
+
+
+def _cache_result(tmp_path, column_name):
+    zip_path = str(tmp_path / "split_results.zip")
+    with open(zip_path, "wb") as f:
+        f.write(b"zip")
+    key = task_runner.result_cache_key({
+        "content_hash": hashlib.sha256(CONTENT).hexdigest(),
+        "filename": "a.csv",
+        "column_name": column_name
+    })
+    task_runner.result_cache.store(key, {"success": True, "zip_path": zip_path})
+
+
+@pytest.mark.asyncio
+async def test_cached_result_not_blocked_by_daily_limit(redis_client, free_user_at_limit, tmp_path):
+    user, usage_key = free_user_at_limit
+    await redis_client.set(usage_key, str(settings.FREE_DAILY_LIMIT))
+    _cache_result(tmp_path, "region")
+
+    response = await _register(redis_client, user, "t1", "region")
+    assert response.cached
+    assert response.status == TaskStatus.COMPLETED
+    assert await TaskStore().get_status("t1") == TaskStatus.COMPLETED
+    # 快取命中不計入每日使用量
+    assert int(await redis_client.get(usage_key)) == settings.FREE_DAILY_LIMIT
+
+
+@pytest.mark.asyncio
+async def test_uncached_upload_rejected_at_daily_limit(redis_client, free_user_at_limit):
+    user, usage_key = free_user_at_limit
+    await redis_client.set(usage_key, str(settings.FREE_DAILY_LIMIT))
+
+    with pytest.raises(HTTPException) as excinfo:
+        await _register(redis_client, user, "t1", "region")
+    assert excinfo.value.status_code == 429
+    assert not os.path.exists(os.path.join(settings.UPLOAD_DIR, "t1"))
+    assert await TaskStore().get("t1") is None
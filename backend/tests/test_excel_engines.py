@@ -0,0 +1,56 @@
+import datetime
+import io
+
+import openpyxl
+import pytest
+
+from app.services import file_processor
+
+
+@pytest.fixture
+def dated_workbook(tmp_path):
+    path = tmp_path / "dates.xlsx"
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(["day", "at", "time", "duration", "store", "qty"])
+    sheet.append([datetime.date(2020, 1, 1), datetime.datetime(2020, 1, 1, 12, 30),
+                  datetime.time(8, 15), datetime.timedelta(hours=30), "A", 1])
+    sheet.append([datetime.date(2020, 1, 2), datetime.datetime(2020, 1, 2),
+                  datetime.time(0, 0), datetime.timedelta(minutes=5), "B", 2])
+    sheet.append([datetime.date(2020, 1, 1), datetime.datetime(2020, 1, 3, 9),
+                  datetime.time(23, 59), datetime.timedelta(days=2), None, 3])
+    sheet.append([None, None, None, None, "A", 4])
+    workbook.save(path)
+    return str(path)
+
+
+def _read_cells(entries):
+    """各輸出檔的儲存格值、數值格式與是否粗體（標題列）"""
+    cells = {}
+    for name, content in entries.items():
+        sheet = openpyxl.load_workbook(io.BytesIO(content)).active
+        cells[name] = [
+            [(cell.value, cell.number_format, cell.font.b) for cell in row]
+            for row in sheet.iter_rows()
+        ]
+    return cells
+
+
+@pytest.mark.skipif(file_processor.CalamineWorkbook is None, reason="python-calamine 未安裝")
+@pytest.mark.parametrize("column_name", ["day", "at", "time", "duration", ["day", "store"]])
+def test_excel_engines_match_pandas(run_split, dated_workbook, column_name):
+    outputs = {
+        engine: run_split(dated_workbook, "dates.xlsx", column_name, EXCEL_ENGINE=engine)
+        for engine in ("pandas", "openpyxl", "calamine")
+    }
+    expected_details, expected_entries = outputs.pop("pandas")
+    expected_cells = _read_cells(expected_entries)
+    for engine, (details, entries) in outputs.items():
+        assert details == expected_details, engine
+        assert list(entries) == list(expected_entries), engine
+        assert _read_cells(entries) == expected_cells, engine
+
+
+def test_date_groups_keep_pandas_names(run_split, dated_workbook):
+    details, _ = run_split(dated_workbook, "dates.xlsx", "day", EXCEL_ENGINE="calamine")
+    assert [detail["group_value"] for detail in details] == ["2020-01-01 00:00:00", "2020-01-02 00:00:00", "空值"]
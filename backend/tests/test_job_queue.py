@@ -0,0 +1,74 @@
+import asyncio
+import json
+
+import pytest
+
+from app.core.config import settings
+from app.services.job_queue import JobQueue, QUEUE_KEY, ATTEMPTS_KEY, HEARTBEAT_KEY_PREFIX
+
+
+@pytest.mark.asyncio
+async def test_enqueue_dequeue_ack(redis_client):
+    queue = JobQueue(redis_client)
+    await queue.enqueue("t1", filename="a.csv")
+    await queue.enqueue("t2", filename="b.csv")
+    assert await queue.size() == 2
+
+    # 先推入的任務先取出
+    raw, job = await queue.dequeue("w1", timeout=1)
+    assert job["task_id"] == "t1"
+    assert job["filename"] == "a.csv"
+    assert job["attempts"] == 1
+    assert await queue.size() == 1
+    assert await redis_client.llen("queue:processing:w1") == 1
+
+    await queue.ack("w1", raw, "t1")
+    assert await redis_client.llen("queue:processing:w1") == 0
+    assert await redis_client.hget(ATTEMPTS_KEY, "t1") is None
+
+
+@pytest.mark.asyncio
+async def test_dequeue_timeout_returns_none(redis_client):
+    assert await JobQueue(redis_client).dequeue("w1", timeout=1) is None
+
+
+@pytest.mark.asyncio
+async def test_recover_orphaned_jobs(redis_client):
+    queue = JobQueue(redis_client)
+    await queue.enqueue("t1")
+    await queue.enqueue("t2")
+    await queue.dequeue("dead", timeout=1)
+    await queue.heartbeat("alive")
+    await queue.dequeue("alive", timeout=1)
+
+    # 只接手沒有心跳的 worker 的任務，並放回佇列前端
+    assert await queue.recover_orphaned_jobs() == 1
+    assert await redis_client.llen("queue:processing:dead") == 0
+    assert await redis_client.llen("queue:processing:alive") == 1
+
+    _, job = await queue.dequeue("alive", timeout=1)
+    assert job["task_id"] == "t1"
+    assert job["attempts"] == 2
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_expiry_releases_jobs(redis_client, monkeypatch):
+    monkeypatch.setattr(settings, "WORKER_HEARTBEAT_TTL", 1)
+    queue = JobQueue(redis_client)
+    await queue.heartbeat("w1")
+    await queue.enqueue("t1")
+    await queue.dequeue("w1", timeout=1)
+
+    assert await queue.recover_orphaned_jobs() == 0
+    await asyncio.sleep(1.2)
+    assert not await redis_client.exists(f"{HEARTBEAT_KEY_PREFIX}w1")
+    assert await queue.recover_orphaned_jobs() == 1
+    assert json.loads((await redis_client.redis.lrange(QUEUE_KEY, 0, -1))[0])["task_id"] == "t1"
+
+
+@pytest.mark.asyncio
+async def test_unregister_removes_heartbeat(redis_client):
+    queue = JobQueue(redis_client)
+    await queue.heartbeat("w1")
+    await queue.unregister("w1")
+    assert not await redis_client.exists(f"{HEARTBEAT_KEY_PREFIX}w1")
@@ -0,0 +1,42 @@
+import pytest
+
+MODES = {
+    "pandas": {"STREAMING_SPLIT_ENABLED": False, "CSV_BACKEND": "pandas"},
+    "streaming": {"STREAMING_MIN_FILE_MB": 0, "STREAMING_CHUNK_ROWS": 3, "CSV_BACKEND": "pandas"},
+    "arrow": {"STREAMING_SPLIT_ENABLED": False, "CSV_BACKEND": "arrow"},
+    "passthrough": {"STREAMING_SPLIT_ENABLED": False, "CSV_BACKEND": "passthrough"},
+}
+
+
+def _strip_folder(name: str, folder: str) -> str:
+    assert name.startswith(folder + "/"), name
+    return name[len(folder) + 1:]
+
+
+@pytest.mark.parametrize("mode", sorted(MODES))
+@pytest.mark.parametrize("batch_size", [None, 2])
+def test_multi_column_split_matches_single_column_runs(run_split, sample_csv, mode, batch_size):
+    """一次讀取切分多個欄位，各資料夾的內容與分別切分單一欄位相同"""
+    path, filename, columns = sample_csv
+    split_keys = [columns[0], columns[1]]
+    if mode != "passthrough":
+        # 直通模式不支援組合鍵，含組合鍵時整個任務改用一般模式
+        split_keys.append(columns[:2])
+    details, entries = run_split(path, filename, split_keys, batch_size, **MODES[mode])
+
+    for split_key in split_keys:
+        single_details, single_entries = run_split(
+            path, filename, [split_key] if isinstance(split_key, list) else split_key, batch_size, **MODES[mode]
+        )
+        folder = split_key if isinstance(split_key, str) else "_".join(split_key)
+        key = split_key if isinstance(split_key, str) else tuple(split_key)
+        column_details = [detail for detail in details if detail["split_column"] == key]
+        assert [
+            {**detail, "filename": _strip_folder(detail["filename"], folder)} for detail in column_details
+        ] == single_details
+        column_entries = {
+            _strip_folder(name, folder): content
+            for name, content in entries.items() if name.startswith(folder + "/")
+        }
+        assert column_entries == single_entries
+    assert len(details) == len(entries)
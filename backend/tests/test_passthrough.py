@@ -0,0 +1,70 @@
+import logging
+
+import pytest
+
+
+def _write(path, text: str, encoding: str = "utf-8") -> str:
+    with open(path, "wb") as f:
+        f.write(text.encode(encoding))
+    return str(path)
+
+
+@pytest.fixture
+def big5_csv(tmp_path):
+    rows = ["姓名,城市,備註"]
+    for i in range(60):
+        name = ["王五", "李四", "張三"][i % 3]
+        city = ["臺北市", "高雄市", "臺中市", "新竹縣"][i % 4]
+        rows.append(f"{name},{city},第{i}筆資料")
+    return _write(tmp_path / "big5.csv", "\n".join(rows) + "\n", "big5")
+
+
+@pytest.mark.parametrize("column_name", ["姓名", ["姓名", "城市"]])
+@pytest.mark.parametrize("batch_size", [None, 7])
+def test_passthrough_big5_matches_pandas(run_split, big5_csv, column_name, batch_size):
+    expected = run_split(big5_csv, "big5.csv", column_name, batch_size, CSV_BACKEND="pandas")
+    actual = run_split(big5_csv, "big5.csv", column_name, batch_size, CSV_BACKEND="passthrough")
+    assert actual == expected
+    if column_name == "姓名" and batch_size is None:
+        assert [detail["group_value"] for detail in actual[0]] == ["張三", "李四", "王五"]
+
+
+@pytest.fixture
+def multiline_csv(tmp_path):
+    """UTF-8 BOM、CRLF 換行、引號內含換行與分隔符，最後一列沒有換行"""
+    rows = ['"區域","說明","數量"']
+    for i in range(300):
+        note = f'"第{i}筆\r\n跨行, 含""引號""\n第三行"' if i % 2 else f"單行{i}"
+        rows.append(f'{["北區", "南區", "東區"][i % 3]},{note},{i:03d}')
+    return _write(tmp_path / "multiline.csv", "﻿" + "\r\n".join(rows), "utf-8")
+
+
+@pytest.mark.parametrize("workers", [2, 3, 8])
+@pytest.mark.parametrize("batch_size", [None, 11])
+def test_parallel_passthrough_matches_serial(run_split, multiline_csv, workers, batch_size, caplog):
+    caplog.set_level(logging.INFO, logger="app.services.file_processor")
+    options = {"CSV_BACKEND": "passthrough", "PASSTHROUGH_BLOCK_BYTES": 97}
+    serial = run_split(multiline_csv, "multiline.csv", ["區域", "數量"], batch_size, PASSTHROUGH_WORKERS=1, **options)
+    assert "並行分組" not in caplog.text
+    parallel = run_split(
+        multiline_csv, "multiline.csv", ["區域", "數量"], batch_size,
+        PASSTHROUGH_WORKERS=workers, PASSTHROUGH_PARALLEL_MIN_BYTES=0, PASSTHROUGH_BUFFER_BYTES=256, **options
+    )
+    assert "並行分組" in caplog.text
+    assert parallel == serial
+    # 直通模式保留原始的 CRLF，確認沒有改用一般模式
+    assert all(b"\r\n" in content for content in serial[1].values())
+
+
+def test_range_boundaries_skip_quoted_newlines(multiline_csv):
+    from app.utils.csv_passthrough import read_header, record_boundaries
+
+    _, data_start = read_header(multiline_csv, b'"', True)
+    boundaries = record_boundaries(multiline_csv, data_start, 16, b'"', 97)
+    assert len(boundaries) > 2
+    with open(multiline_csv, "rb") as f:
+        data = f.read()
+    for boundary in boundaries[1:-1]:
+        # 每個邊界都是資料列的起點：前一個字元為換行，且之前的引號數為偶數
+        assert data[boundary - 1:boundary] == b"\n"
+        assert data[:boundary].count(b'"') % 2 == 0
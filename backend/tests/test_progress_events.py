@@ -0,0 +1,118 @@
+import json
+
+import pytest
+
+from app.core.config import settings
+from app.models.task import TaskStatus
+from app.services.progress import progress_channel, publish_task_status, stream_task_events
+from app.services.task_store import TaskStore
+
+
+async def _connected():
+    return False
+
+
+async def _disconnected():
+    return True
+
+
+def _parse(chunk: str) -> dict:
+    """每個事件為一行 data: JSON，以空行結尾"""
+    assert chunk.startswith("data: ")
+    assert chunk.endswith("\n\n")
+    assert "\n" not in chunk[:-2]
+    return json.loads(chunk[len("data: "):])
+
+
+async def _collect(stream) -> list:
+    return [chunk async for chunk in stream]
+
+
+@pytest.fixture
+def heartbeat(monkeypatch):
+    monkeypatch.setattr(settings, "PROGRESS_HEARTBEAT_SECONDS", 0.05)
+
+
+async def _create_task(status, **fields):
+    task = {"task_id": "t1", "user_id": "u1", "filename": "a.csv", "status": status, **fields}
+    await TaskStore().create("t1", task)
+    return task
+
+
+@pytest.mark.asyncio
+async def test_finished_task_sends_one_event(redis_client):
+    await _create_task(TaskStatus.COMPLETED)
+
+    chunks = await _collect(stream_task_events("t1", _connected))
+    assert len(chunks) == 1
+    event = _parse(chunks[0])
+    assert event["status"] == TaskStatus.COMPLETED
+    assert event["progress"] == 100
+
+
+@pytest.mark.asyncio
+async def test_missing_task_ends_with_error(redis_client):
+    chunks = await _collect(stream_task_events("missing", _connected))
+    assert len(chunks) == 1
+    # 中文訊息不轉成 \u 跳脫字元
+    assert "任務不存在或已過期" in chunks[0]
+    assert _parse(chunks[0])["status"] == TaskStatus.ERROR
+
+
+@pytest.mark.asyncio
+async def test_forwards_events_until_terminal(redis_client, heartbeat):
+    await _create_task(TaskStatus.PROCESSING)
+
+    stream = stream_task_events("t1", _connected)
+    assert _parse(await stream.__anext__())["status"] == TaskStatus.PROCESSING
+
+    progress = {"task_id": "t1", "status": TaskStatus.PROCESSING, "progress": 40, "stage": "reading"}
+    await redis_client.publish(progress_channel("t1"), json.dumps(progress))
+    await publish_task_status("t1", {"status": TaskStatus.ERROR, "error_message": "處理失敗"})
+    # 終止事件之後的事件不再轉送
+    await redis_client.publish(progress_channel("t1"), json.dumps(progress))
+
+    # 事件之間可能穿插心跳
+    events = [_parse(chunk) for chunk in await _collect(stream) if chunk != ": heartbeat\n\n"]
+    assert [event["progress"] for event in events] == [40, 0]
+    assert events[-1]["status"] == TaskStatus.ERROR
+    assert events[-1]["error_message"] == "處理失敗"
+    # 結束時取消訂閱
+    assert (await redis_client.redis.pubsub_numsub(progress_channel("t1")))[0][1] == 0
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_while_idle(redis_client, heartbeat):
+    await _create_task(TaskStatus.PROCESSING)
+
+    stream = stream_task_events("t1", _connected)
+    await stream.__anext__()
+    assert await stream.__anext__() == ": heartbeat\n\n"
+    assert await stream.__anext__() == ": heartbeat\n\n"
+    await stream.aclose()
+    assert (await redis_client.redis.pubsub_numsub(progress_channel("t1")))[0][1] == 0
+
+
+@pytest.mark.asyncio
+async def test_idle_stream_picks_up_unpublished_terminal_status(redis_client, heartbeat):
+    await _create_task(TaskStatus.PROCESSING)
+
+    stream = stream_task_events("t1", _connected)
+    await stream.__anext__()
+    # 處理程序異常結束時只有任務狀態被改為失敗，沒有發布事件
+    await TaskStore().update("t1", status=TaskStatus.ERROR, error_message="處理程序中斷")
+
+    chunks = await _collect(stream)
+    assert len(chunks) == 1
+    event = _parse(chunks[0])
+    assert event["status"] == TaskStatus.ERROR
+    assert event["error_message"] == "處理程序中斷"
+
+
+@pytest.mark.asyncio
+async def test_disconnect_stops_stream(redis_client, heartbeat):
+    await _create_task(TaskStatus.PROCESSING)
+
+    chunks = await _collect(stream_task_events("t1", _disconnected))
+    assert len(chunks) == 1
+    assert _parse(chunks[0])["status"] == TaskStatus.PROCESSING
@@ -0,0 +1,52 @@
+import os
+
+from app.services.result_cache import ResultCache
+
+
+def _write(path: str, content: bytes):
+    with open(path, "wb") as f:
+        f.write(content)
+
+
+def _cache_with_entry(tmp_path, content: bytes = b"zip-v1"):
+    cache = ResultCache(cache_dir=str(tmp_path / "cache"), max_bytes=1024 * 1024)
+    task_dir = tmp_path / "task1"
+    task_dir.mkdir()
+    zip_path = str(task_dir / "split_results.zip")
+    _write(zip_path, content)
+    cache.store("key", {"zip_path": zip_path, "total_rows": 3})
+    return cache, zip_path
+
+
+def test_lookup_returns_result_in_work_dir(tmp_path):
+    cache, _ = _cache_with_entry(tmp_path)
+    result = cache.lookup("key", str(tmp_path / "task2"))
+    assert result["total_rows"] == 3
+    assert result["zip_path"] == str(tmp_path / "task2" / "split_results.zip")
+    with open(result["zip_path"], "rb") as f:
+        assert f.read() == b"zip-v1"
+
+
+def test_lookup_replaces_existing_destination(tmp_path):
+    cache, _ = _cache_with_entry(tmp_path)
+    work_dir = str(tmp_path / "task2")
+    first = cache.lookup("key", work_dir)
+    # 目的檔已存在（甚至與快取為同一個檔案）時仍可再次連結
+    second = cache.lookup("key", work_dir)
+    assert first["zip_path"] == second["zip_path"]
+    with open(second["zip_path"], "rb") as f:
+        assert f.read() == b"zip-v1"
+
+
+def test_rewriting_task_zip_does_not_change_cache(tmp_path):
+    cache, zip_path = _cache_with_entry(tmp_path)
+    result = cache.lookup("key", str(tmp_path / "task2"))
+
+    # 任務重新產生 ZIP 時先移除舊檔，不截斷共用的內容
+    for path in (zip_path, result["zip_path"]):
+        os.remove(path)
+        _write(path, b"zip-v2")
+
+    assert cache.lookup("key", str(tmp_path / "task3")) is not None
+    with open(str(tmp_path / "task3" / "split_results.zip"), "rb") as f:
+        assert f.read() == b"zip-v1"
@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.file_processor import FileProcessor
+
+
+def _reference_split(df, column, batch_size=None):
+    """先前逐群組的切分方式：groupby 依值排序，空值歸入最後的「空值」群組"""
+    results = {}
+    for value, group_df in df.groupby(column, sort=True, dropna=False):
+        key = "空值" if pd.isna(value) else str(value)
+        if batch_size and len(group_df) > batch_size:
+            for i, start in enumerate(range(0, len(group_df), batch_size)):
+                results[f"{key}_batch_{i + 1}"] = group_df.iloc[start:start + batch_size]
+        else:
+            results[key] = group_df
+    return results
+
+
+@pytest.fixture
+def processor(tmp_path):
+    return FileProcessor(str(tmp_path))
+
+
+def _assert_same_split(actual, expected):
+    assert list(actual) == list(expected)
+    for key, frame in expected.items():
+        pd.testing.assert_frame_equal(actual[key], frame, obj=str(key))
+
+
+FRAMES = {
+    "strings_with_nulls": pd.DataFrame({
+        "k": ["b", None, "a", "b", np.nan, "c", "a"],
+        "v": range(7),
+    }),
+    "floats_with_nan": pd.DataFrame({
+        "k": [2.5, np.nan, 10.0, 2.5, 1.0, np.nan],
+        "v": list("abcdef"),
+    }),
+    "mixed_types": pd.DataFrame({
+        "k": pd.Series([3, "b", 1.5, "a", None, 3, "b", 10], dtype=object),
+        "v": range(8),
+    }),
+    "integers": pd.DataFrame({
+        "k": [5, 1, 5, 3, 1, 5, 5],
+        "v": range(7),
+    }),
+}
+
+
+@pytest.mark.parametrize("name", sorted(FRAMES))
+@pytest.mark.parametrize("batch_size", [None, 1, 2])
+def test_split_matches_per_group_loop(processor, name, batch_size):
+    df = FRAMES[name]
+    actual = processor._split_by_column(df, "k", batch_size)
+    _assert_same_split(actual, _reference_split(df, "k", batch_size))
+
+
+def test_split_keeps_original_row_order_within_groups(processor):
+    df = FRAMES["strings_with_nulls"]
+    actual = processor._split_by_column(df, "k")
+    assert list(actual) == ["a", "b", "c", "空值"]
+    assert actual["b"]["v"].tolist() == [0, 3]
+    assert actual["空值"]["v"].tolist() == [1, 4]
+
+
+def test_split_empty_frame(processor):
+    df = pd.DataFrame({"k": pd.Series([], dtype=object), "v": []})
+    assert processor._split_by_column(df, "k") == {}
+
+
+def _reference_composite_split(df, columns, batch_size=None, prefix=()):
+    """先前逐層的多層切分：依第一個欄位分組後，在各群組內依下一個欄位分組"""
+    results = {}
+    for value, group_df in df.groupby(columns[0], sort=True, dropna=False):
+        key = prefix + ("空值" if pd.isna(value) else str(value),)
+        if len(columns) > 1:
+            results.update(_reference_composite_split(group_df, columns[1:], batch_size, key))
+        elif batch_size and len(group_df) > batch_size:
+            for i, start in enumerate(range(0, len(group_df), batch_size)):
+                results[key[:-1] + (f"{key[-1]}_batch_{i + 1}",)] = group_df.iloc[start:start + batch_size]
+        else:
+            results[key] = group_df
+    return results
+
+
+COMPOSITE_FRAME = pd.DataFrame({
+    "region": ["北", None, "南", "北", "南", None, "北", "南"],
+    "store": pd.Series([2, "A", None, 2, "B", "A", 10, None], dtype=object),
+    "level": [1.5, np.nan, 1.5, 0.5, np.nan, np.nan, 1.5, 0.5],
+    "v": range(8),
+})
+
+
+@pytest.mark.parametrize("columns", [
+    ("region", "store"),
+    ("store", "region"),
+    ("region", "store", "level"),
+])
+@pytest.mark.parametrize("batch_size", [None, 1])
+def test_composite_split_matches_per_level_loop(processor, columns, batch_size):
+    actual = processor._split_by_column(COMPOSITE_FRAME, columns, batch_size)
+    _assert_same_split(actual, _reference_composite_split(COMPOSITE_FRAME, list(columns), batch_size))
+
+
+def test_composite_split_with_overflowing_codes(processor):
+    # 20 個欄位各有 11 種編號（含空值），組合編號超過 int64，需先壓縮再合併
+    rng = np.random.default_rng(0)
+    values = rng.integers(0, 10, size=(200, 20)).astype(float)
+    values[rng.random(values.shape) < 0.1] = np.nan
+    columns = [f"c{i}" for i in range(20)]
+    df = pd.DataFrame(values, columns=columns)
+    actual = processor._split_by_column(df, tuple(columns))
+    _assert_same_split(actual, _reference_composite_split(df, columns))
+
+
+def test_nested_split_layout(run_split, tmp_path):
+    path = tmp_path / "sales.csv"
+    path.write_text("region,store,v\n北,S2,1\n南,S1,2\n北,S1,3\n,S1,4\n北,,5\n", encoding="utf-8")
+    details, entries = run_split(str(path), "sales.csv", [["region", "store"]])
+    assert list(entries) == [
+        "北/sales_S1.csv",
+        "北/sales_S2.csv",
+        "北/sales_空值.csv",
+        "南/sales_S1.csv",
+        "空值/sales_S1.csv",
+    ]
+    assert entries["北/sales_S1.csv"] == "region,store,v\n北,S1,3\n".encode("utf-8")
+    assert [detail["group_value"] for detail in details] == ["北/S1", "北/S2", "北/空值", "南/S1", "空值/S1"]
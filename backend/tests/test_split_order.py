@@ -0,0 +1,37 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.file_processor import _null_key, _streaming_sort_key
+
+
+def _factorize_order(values):
+    """一般模式的群組順序：pd.factorize(sort=True) 的值，空值排在最後"""
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object), sort=True)
+    return list(uniques) + ([None] if (codes < 0).any() else [])
+
+
+@pytest.mark.parametrize("values", [
+    ["b", 10, "a", 2.5, None, 1],
+    [3, "10", np.nan, "9", 1.5, "x"],
+    ["only", "strings", None],
+])
+def test_streaming_order_matches_factorize(values):
+    keys = list(dict.fromkeys(_null_key(value) for value in values))
+    assert sorted(keys, key=_streaming_sort_key) == _factorize_order(values)
+
+
+def test_streaming_order_for_composite_keys():
+    keys = [("b", 2), (1, None), ("a", "x"), (1, 3), (None, 1)]
+    assert sorted(keys, key=_streaming_sort_key) == [(1, 3), (1, None), ("a", "x"), ("b", 2), (None, 1)]
+
+
+def test_incomparable_values_sort_by_type_name():
+    keys = [datetime.date(2024, 1, 2), 5, "a", None, datetime.date(2024, 1, 1)]
+    with pytest.raises(TypeError):
+        sorted(keys, key=_streaming_sort_key)
+    ordered = sorted(reversed(keys), key=lambda key: _streaming_sort_key(key, by_type=True))
+    assert ordered == [datetime.date(2024, 1, 1), datetime.date(2024, 1, 2), 5, "a", None]
+    assert ordered == sorted(keys, key=lambda key: _streaming_sort_key(key, by_type=True))
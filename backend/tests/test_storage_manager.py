@@ -0,0 +1,102 @@
+import os
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services.columnar_cache import ColumnarCache
+from app.services.result_cache import ResultCache
+from app.services.storage_manager import StorageManager
+
+MB = 1024 * 1024
+
+
+def _write(path: str, size: int, age: float = 0):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"\0" * size)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch, redis_client):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setattr(settings, "OUTPUT_DIR", str(tmp_path / "outputs"))
+    monkeypatch.setattr(settings, "STORAGE_MAX_MB", 3)
+    manager = StorageManager(redis_client)
+    manager.caches = [
+        ColumnarCache(cache_dir=str(tmp_path / "columnar"), max_bytes=10 * MB),
+        ResultCache(cache_dir=str(tmp_path / "results"), max_bytes=10 * MB)
+    ]
+    return manager
+
+
+def test_columnar_cache_evicts_least_recently_used(tmp_path):
+    cache = ColumnarCache(cache_dir=str(tmp_path), max_bytes=2 * MB)
+    _write(str(tmp_path / "old.arrow"), MB, age=30)
+    _write(str(tmp_path / "mid.arrow"), MB, age=20)
+    _write(str(tmp_path / "new.arrow"), MB, age=10)
+
+    assert cache.evict() == 1
+    assert sorted(os.listdir(tmp_path)) == ["mid.arrow", "new.arrow"]
+    assert cache.size() == 2 * MB
+
+
+@pytest.mark.asyncio
+async def test_budget_counts_and_trims_caches_before_tasks(storage, tmp_path):
+    columnar, results = storage.caches
+    _write(os.path.join(settings.OUTPUT_DIR, "t1", "split_results.zip"), MB, age=3600)
+    _write(str(tmp_path / "columnar" / "a.arrow"), MB, age=20)
+    _write(str(tmp_path / "columnar" / "b.arrow"), MB, age=10)
+    _write(str(tmp_path / "results" / "k.zip"), MB)
+
+    # 4MB > 3MB：只需清除最舊的欄式快取，任務檔案保留
+    evicted, freed = await storage.enforce_budget()
+    assert (evicted, freed) == (0, MB)
+    assert columnar.size() == MB
+    assert results.size() == MB
+    assert os.path.exists(os.path.join(settings.OUTPUT_DIR, "t1"))
+
+    # 再預留 3MB：快取全部清除後仍不足，才淘汰任務
+    evicted, freed = await storage.enforce_budget(reserve_bytes=3 * MB)
+    assert evicted == 1
+    assert freed == 3 * MB
+    assert columnar.size() == results.size() == 0
+    assert not os.path.exists(os.path.join(settings.OUTPUT_DIR, "t1"))
+
+
+@pytest.mark.asyncio
+async def test_usage_includes_caches(storage, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "COLUMNAR_CACHE_DIR", str(tmp_path / "columnar"))
+    monkeypatch.setattr(settings, "RESULT_CACHE_DIR", str(tmp_path / "results"))
+    _write(os.path.join(settings.UPLOAD_DIR, "t1", "a.csv"), MB)
+    _write(str(tmp_path / "columnar" / "a.arrow"), MB)
+
+    usage = await storage.usage()
+    assert usage["task_bytes"] == MB
+    assert usage["columnar_cache_bytes"] == MB
+    assert usage["used_bytes"] == 2 * MB
+
+
+@pytest.mark.asyncio
+async def test_hard_linked_zip_counted_once(storage, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "COLUMNAR_CACHE_DIR", str(tmp_path / "columnar"))
+    monkeypatch.setattr(settings, "RESULT_CACHE_DIR", str(tmp_path / "results"))
+    columnar, results = storage.caches
+    # 結果快取命中時 ZIP 以硬連結放進任務目錄
+    cached_zip = str(tmp_path / "results" / "k.zip")
+    _write(cached_zip, MB)
+    os.makedirs(os.path.join(settings.OUTPUT_DIR, "t1"))
+    os.link(cached_zip, os.path.join(settings.OUTPUT_DIR, "t1", "split_results.zip"))
+    _write(str(tmp_path / "columnar" / "a.arrow"), MB)
+
+    usage = await storage.usage()
+    assert usage["task_bytes"] == MB
+    assert usage["result_cache_bytes"] == 0
+    assert usage["used_bytes"] == 2 * MB
+
+    # 2MB + 預留 1MB 不超過 3MB，不需要清除任何檔案
+    assert await storage.enforce_budget(reserve_bytes=MB) == (0, 0)
+    assert await storage.ensure_capacity(MB)
+    assert columnar.size() == results.size() == MB
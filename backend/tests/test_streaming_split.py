@@ -0,0 +1,37 @@
+import logging
+
+import pytest
+
+# 一般模式：整個檔案一次讀入；串流模式：每 3 行一個區塊，群組跨越多個區塊
+PANDAS = {"STREAMING_SPLIT_ENABLED": False, "CSV_BACKEND": "pandas"}
+STREAMING = {"STREAMING_MIN_FILE_MB": 0, "STREAMING_CHUNK_ROWS": 3, "CSV_BACKEND": "pandas"}
+
+
+def _split_columns(columns):
+    return [
+        columns[0],
+        columns[1],
+        columns[:2],
+        [columns[:2]],
+    ]
+
+
+@pytest.mark.parametrize("batch_size", [None, 2])
+def test_streaming_matches_pandas(run_split, sample_csv, batch_size, caplog):
+    caplog.set_level(logging.INFO, logger="app.services.file_processor")
+    path, filename, columns = sample_csv
+    for column_name in _split_columns(columns):
+        expected = run_split(path, filename, column_name, batch_size, **PANDAS)
+        assert "串流模式" not in caplog.text
+        actual = run_split(path, filename, column_name, batch_size, **STREAMING)
+        assert "串流模式成功切分" in caplog.text
+        caplog.clear()
+        assert actual == expected, column_name
+
+
+def test_streaming_null_group_is_last(run_split, tmp_path):
+    path = tmp_path / "nulls.csv"
+    path.write_text("k,v\nb,1\n,2\na,3\n,4\nb,5\n", encoding="utf-8")
+    details, entries = run_split(str(path), "nulls.csv", "k", **STREAMING)
+    assert [detail["group_value"] for detail in details] == ["a", "b", "空值"]
+    assert entries["nulls_空值.csv"] == b"k,v\n,2\n,4\n"
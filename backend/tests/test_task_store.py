@@ -0,0 +1,130 @@
+import json
+
+import pytest
+
+from app.models.task import TaskStatus
+from app.services.task_store import TASK_TTL, TaskStore, result_key, task_key
+
+
+def _new_task(**fields):
+    return {
+        "task_id": "t1",
+        "user_id": "u1",
+        "filename": "a.csv",
+        "status": TaskStatus.UPLOADED,
+        "column_name": None,
+        "file_details": {"columns": ["id", "region"]},
+        **fields,
+    }
+
+
+@pytest.mark.asyncio
+async def test_create_and_get_round_trip(redis_client):
+    store = TaskStore(redis_client)
+    await store.create("t1", _new_task())
+
+    task = await store.get("t1")
+    assert task["user_id"] == "u1"
+    # 每個欄位以 JSON 保存，None 與字典讀回時型別不變
+    assert task["column_name"] is None
+    assert task["file_details"] == {"columns": ["id", "region"]}
+    assert await store.get_status("t1") == TaskStatus.UPLOADED
+    assert 0 < await redis_client.redis.ttl(task_key("t1")) <= TASK_TTL
+
+
+@pytest.mark.asyncio
+async def test_create_replaces_old_fields(redis_client):
+    store = TaskStore(redis_client)
+    await store.create("t1", _new_task(error_message="舊的錯誤"))
+    await store.create("t1", _new_task())
+    assert "error_message" not in await store.get("t1")
+
+
+@pytest.mark.asyncio
+async def test_get_missing_task(redis_client):
+    store = TaskStore(redis_client)
+    assert await store.get("missing") is None
+    assert await store.get_with_result("missing") == (None, None)
+
+
+@pytest.mark.asyncio
+async def test_update_writes_fields_and_result(redis_client):
+    store = TaskStore(redis_client)
+    await store.create("t1", _new_task())
+    await redis_client.expire(task_key("t1"), 10)
+
+    updated = await store.update("t1", result={"success": True, "groups": 3}, status=TaskStatus.COMPLETED)
+    assert updated["status"] == TaskStatus.COMPLETED
+    assert "updated_at" in updated
+
+    task, result = await store.get_with_result("t1")
+    # 只寫入變更的欄位，其他欄位保留
+    assert task["status"] == TaskStatus.COMPLETED
+    assert task["filename"] == "a.csv"
+    assert task["updated_at"] == updated["updated_at"]
+    assert result == {"success": True, "groups": 3}
+    # 更新時延長任務與結果的期限
+    assert await redis_client.redis.ttl(task_key("t1")) > 10
+    assert 0 < await redis_client.redis.ttl(result_key("t1")) <= TASK_TTL
+
+
+@pytest.mark.asyncio
+async def test_update_does_not_recreate_expired_task(redis_client):
+    store = TaskStore(redis_client)
+    await store.create("t1", _new_task())
+    # 模擬任務過期後才送達的進度更新
+    await redis_client.delete(task_key("t1"))
+
+    assert await store.update("t1", result={"success": True}, status=TaskStatus.COMPLETED) is None
+    assert not await redis_client.exists(task_key("t1"))
+    assert not await redis_client.exists(result_key("t1"))
+
+
+@pytest.mark.asyncio
+async def test_transition_from_allowed_status(redis_client):
+    store = TaskStore(redis_client)
+    await store.create("t1", _new_task())
+
+    task = await store.transition("t1", [TaskStatus.UPLOADED], status=TaskStatus.PENDING, column_name="region")
+    # 回傳合併後的完整任務
+    assert task["status"] == TaskStatus.PENDING
+    assert task["column_name"] == "region"
+    assert task["user_id"] == "u1"
+    assert await store.get("t1") == task
+
+
+@pytest.mark.asyncio
+async def test_transition_rejects_other_status(redis_client):
+    store = TaskStore(redis_client)
+    await store.create("t1", _new_task(status=TaskStatus.PROCESSING))
+
+    assert await store.transition("t1", [TaskStatus.UPLOADED], status=TaskStatus.PENDING) is None
+    assert await store.get_status("t1") == TaskStatus.PROCESSING
+    assert "updated_at" not in await store.get("t1")
+
+
+@pytest.mark.asyncio
+async def test_transition_without_status_requirement(redis_client):
+    store = TaskStore(redis_client)
+    await store.create("t1", _new_task(status=TaskStatus.PROCESSING))
+
+    task = await store.transition("t1", status=TaskStatus.ERROR, error_message="失敗")
+    assert task["status"] == TaskStatus.ERROR
+    assert json.loads(await redis_client.hget(task_key("t1"), "error_message")) == "失敗"
+
+
+@pytest.mark.asyncio
+async def test_transition_missing_task(redis_client):
+    store = TaskStore(redis_client)
+    assert await store.transition("missing", status=TaskStatus.ERROR) is None
+    assert not await redis_client.exists(task_key("missing"))
+
+
+@pytest.mark.asyncio
+async def test_delete_removes_task_and_result(redis_client):
+    store = TaskStore(redis_client)
+    await store.create("t1", _new_task())
+    await store.update("t1", result={"success": True}, status=TaskStatus.COMPLETED)
+
+    await store.delete("t1")
+    assert await store.get_with_result("t1") == (None, None)
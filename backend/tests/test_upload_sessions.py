@@ -0,0 +1,60 @@
+import hashlib
+import os
+
+import pytest
+import pytest_asyncio
+
+from app.core.config import settings
+from app.services.upload_sessions import UploadSessionManager, UploadSessionError
+
+
+async def _body(data: bytes, piece: int = 3):
+    for start in range(0, len(data), piece):
+        yield data[start:start + piece]
+
+
+def _part_content(session) -> bytes:
+    with open(f"{session['file_path']}.part", "rb") as f:
+        return f.read()
+
+
+@pytest_asyncio.fixture
+async def session(tmp_path, monkeypatch, redis_client):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "UPLOAD_SESSION_CHUNK_SIZE", 8)
+    manager = UploadSessionManager(redis_client)
+    return manager, await manager.create("u1", "user", "a.csv", 12)
+
+
+@pytest.mark.asyncio
+async def test_chunks_written_at_offsets(session):
+    manager, info = session
+    assert await manager.write_chunk(info, 1, _body(b"5678")) == 1
+    checksum = hashlib.sha256(b"abcdefgh").hexdigest()
+    assert await manager.write_chunk(info, 0, _body(b"abcdefgh"), checksum) == 2
+    assert _part_content(info) == b"abcdefgh5678"
+
+    file_path, size, content_hash = await manager.commit(info)
+    assert size == 12
+    assert content_hash == hashlib.sha256(b"abcdefgh5678").hexdigest()
+    assert os.listdir(os.path.dirname(file_path)) == ["a.csv"]
+
+
+@pytest.mark.asyncio
+async def test_corrupted_retransmit_keeps_received_data(session):
+    manager, info = session
+    checksum = hashlib.sha256(b"abcdefgh").hexdigest()
+    await manager.write_chunk(info, 0, _body(b"abcdefgh"), checksum)
+
+    # 檢查碼不符或長度不符的重傳都不可覆蓋已收到的內容
+    with pytest.raises(UploadSessionError):
+        await manager.write_chunk(info, 0, _body(b"XXXXXXXX"), checksum)
+    with pytest.raises(UploadSessionError):
+        await manager.write_chunk(info, 0, _body(b"XXX"))
+    with pytest.raises(UploadSessionError):
+        await manager.write_chunk(info, 0, _body(b"XXXXXXXXXX"))
+
+    assert _part_content(info)[:8] == b"abcdefgh"
+    assert await manager.received_chunks("u1") == {0}
+    # 暫存檔已全部清除
+    assert os.listdir(os.path.dirname(info["file_path"])) == ["a.csv.part"]
@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from app import worker as worker_module
+from app.core.config import settings
+from app.services.job_queue import ATTEMPTS_KEY
+
+
+@pytest.fixture
+def worker(redis_client, monkeypatch):
+    monkeypatch.setattr(settings, "WORKER_POLL_TIMEOUT", 1)
+    monkeypatch.setattr(settings, "WORKER_RETRY_DELAY", 0.01)
+    return worker_module.Worker("w1")
+
+
+@pytest.mark.asyncio
+async def test_slot_runs_and_acks_job(worker, redis_client, monkeypatch):
+    calls = []
+
+    async def fake_run_split_task(task_id, **job):
+        calls.append((task_id, job))
+        worker.stopping.set()
+
+    monkeypatch.setattr(worker_module, "run_split_task", fake_run_split_task)
+    await worker.queue.enqueue("t1", file_path="/tmp/a.csv", filename="a.csv", column_name="region")
+
+    await asyncio.wait_for(worker._slot(), timeout=5)
+
+    assert [task_id for task_id, _ in calls] == ["t1"]
+    assert calls[0][1]["column_name"] == "region"
+    assert "attempts" not in calls[0][1]
+    assert await redis_client.llen("queue:processing:w1") == 0
+    assert await redis_client.hget(ATTEMPTS_KEY, "t1") is None
+
+
+@pytest.mark.asyncio
+async def test_slot_gives_up_after_max_attempts(worker, redis_client, monkeypatch):
+    errors = []
+
+    async def fake_mark_task_error(task_id, message):
+        errors.append(task_id)
+        worker.stopping.set()
+
+    async def fail_run_split_task(task_id, **job):
+        raise AssertionError("不應再執行")
+
+    monkeypatch.setattr(worker_module, "mark_task_error", fake_mark_task_error)
+    monkeypatch.setattr(worker_module, "run_split_task", fail_run_split_task)
+    await worker.queue.enqueue("t1")
+    await redis_client.hincrby(ATTEMPTS_KEY, "t1", settings.JOB_MAX_ATTEMPTS)
+
+    await asyncio.wait_for(worker._slot(), timeout=5)
+
+    assert errors == ["t1"]
+    assert await redis_client.llen("queue:processing:w1") == 0
+
+
+@pytest.mark.asyncio
+async def test_slot_survives_transient_redis_errors(worker, redis_client, monkeypatch):
+    calls = []
+    dequeue, ack = worker.queue.dequeue, worker.queue.ack
+    failures = {"dequeue": 1, "ack": 1}
+
+    async def flaky_dequeue(*args, **kwargs):
+        if failures["dequeue"]:
+            failures["dequeue"] -= 1
+            raise ConnectionError("Redis 連線中斷")
+        return await dequeue(*args, **kwargs)
+
+    async def flaky_ack(*args, **kwargs):
+        if failures["ack"]:
+            failures["ack"] -= 1
+            raise ConnectionError("Redis 連線中斷")
+        await ack(*args, **kwargs)
+        worker.stopping.set()
+
+    async def fake_run_split_task(task_id, **job):
+        calls.append(task_id)
+
+    monkeypatch.setattr(worker.queue, "dequeue", flaky_dequeue)
+    monkeypatch.setattr(worker.queue, "ack", flaky_ack)
+    monkeypatch.setattr(worker_module, "run_split_task", fake_run_split_task)
+    await worker.queue.enqueue("t1")
+
+    await asyncio.wait_for(worker._slot(), timeout=5)
+
+    assert calls == ["t1"]
+    assert failures == {"dequeue": 0, "ack": 0}
+    assert await redis_client.llen("queue:processing:w1") == 0
@@ -0,0 +1,52 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from app.core.config import settings
+from app.services.file_processor import FileProcessor
+from app.services.task_store import TaskStore
+from app.services.zip_stream import stream_zip_archive
+
+
+def _write_progress(work_dir: str, run_id: str, offset: int, complete: bool = False):
+    with open(os.path.join(work_dir, FileProcessor.ZIP_PROGRESS_FILENAME), "w") as f:
+        json.dump({"run_id": run_id, "offset": offset, "complete": complete}, f)
+
+
+def test_zip_progress_published_after_file_created(tmp_path, monkeypatch):
+    processor = FileProcessor(str(tmp_path))
+    zip_path = os.path.join(processor.temp_dir, FileProcessor.ZIP_FILENAME)
+    published = []
+    publish = processor._publish_zip_progress
+
+    def check_publish(offset, complete=False):
+        published.append(os.path.exists(zip_path))
+        publish(offset, complete)
+
+    monkeypatch.setattr(processor, "_publish_zip_progress", check_publish)
+    csv_path = tmp_path / "a.csv"
+    csv_path.write_text("region,v\na,1\nb,2\n")
+    assert processor.process_file(str(csv_path), "a.csv", "region")["success"]
+    assert published and all(published)
+
+
+@pytest.mark.asyncio
+async def test_stream_waits_for_zip_file(tmp_path, redis_client, monkeypatch):
+    monkeypatch.setattr(settings, "ZIP_STREAM_POLL_INTERVAL", 0.01)
+    await TaskStore(redis_client).create("t1", {"task_id": "t1", "status": "processing"})
+    work_dir = str(tmp_path)
+    # 進度檔已存在但 ZIP 尚未建立（例如前一次執行留下的進度檔）
+    _write_progress(work_dir, "run1", 0)
+
+    async def write_zip_later():
+        await asyncio.sleep(0.05)
+        with open(os.path.join(work_dir, FileProcessor.ZIP_FILENAME), "wb") as f:
+            f.write(b"PK-data")
+        _write_progress(work_dir, "run2", 7, complete=True)
+
+    writer = asyncio.create_task(write_zip_later())
+    chunks = [chunk async for chunk in stream_zip_archive(redis_client, "t1", work_dir)]
+    await writer
+    assert b"".join(chunks) == b"PK-data"
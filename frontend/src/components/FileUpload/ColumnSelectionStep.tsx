@@ -23,7 +23,20 @@ import {
   FormControlLabel,
 } from '@mui/material';
 import { ArrowBack, ArrowForward, Info } from '@mui/icons-material';
-import { StepProps, FileUploadData } from '../../types';
+import { StepProps, FileUploadData, PreviewColumn } from '../../types';
+import { apiService, handleApiError } from '../../services/api';
+
+const PREVIEW_ROWS = 20;
+
+const COLUMN_TYPE_LABELS: Record<PreviewColumn['type'], string> = {
+  integer: '整數',
+  float: '數值',
+  boolean: '布林',
+  datetime: '日期時間',
+  string: '文字',
+  mixed: '混合',
+  empty: '空白',
+};
 
 interface ColumnSelectionStepProps extends StepProps {
   data: FileUploadData;
@@ -38,17 +51,20 @@ export const ColumnSelectionStep: React.FC<ColumnSelectionStepProps> = ({
   onDataChange,
 }) => {
   const [availableColumns, setAvailableColumns] = useState<string[]>([]);
+  const [columnInfo, setColumnInfo] = useState<Record<string, PreviewColumn>>({});
+  const [fileLimits, setFileLimits] = useState({ warning: Infinity, max: Infinity });
+  const [totalRows, setTotalRows] = useState<number | undefined>();
   const [previewData, setPreviewData] = useState<any[]>([]);
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const [enableBatchSize, setEnableBatchSize] = useState(false);
 
-  // 模擬從檔案讀取欄位名稱的功能
+  // 上傳檔案後由後端解析標題列與前幾行，格式設定變更時重新預覽
   useEffect(() => {
     if (data.file) {
       analyzeFile();
     }
-  }, [data.file]);
+  }, [data.file, data.dialect?.delimiter, data.dialect?.hasHeader]);
 
   const analyzeFile = async () => {
     if (!data.file) return;
@@ -57,36 +73,28 @@ export const ColumnSelectionStep: React.FC<ColumnSelectionStepProps> = ({
     setError(null);
 
     try {
-      // 這裡模擬檔案分析過程
-      // 實際實現中，你可能需要使用 FileReader API 或發送到後端分析
-      await new Promise(resolve => setTimeout(resolve, 1000));
-
-      const fileName = data.file.name.toLowerCase();
-      let columns: string[] = [];
-      let preview: any[] = [];
-
-      if (fileName.endsWith('.csv') || fileName.endsWith('.txt')) {
-        // CSV/TXT 檔案模擬欄位
-        columns = ['姓名', '部門', '職位', '城市', '年齡', '薪資'];
-        preview = [
-          { '姓名': '張三', '部門': '銷售部', '職位': '經理', '城市': '台北', '年齡': 35, '薪資': 60000 },
-          { '姓名': '李四', '部門': '技術部', '職位': '工程師', '城市': '新竹', '年齡': 28, '薪資': 55000 },
-          { '姓名': '王五', '部門': '銷售部', '職位': '專員', '城市': '台中', '年齡': 25, '薪資': 40000 },
-        ];
-      } else if (fileName.endsWith('.xlsx') || fileName.endsWith('.xls')) {
-        // Excel 檔案模擬欄位
-        columns = ['產品名稱', '類別', '價格', '庫存', '供應商', '地區'];
-        preview = [
-          { '產品名稱': '筆記型電腦', '類別': '電腦', '價格': 25000, '庫存': 50, '供應商': 'A公司', '地區': '北部' },
-          { '產品名稱': '智慧手機', '類別': '手機', '價格': 15000, '庫存': 100, '供應商': 'B公司', '地區': '南部' },
-          { '產品名稱': '平板電腦', '類別': '電腦', '價格': 12000, '庫存': 30, '供應商': 'A公司', '地區': '中部' },
-        ];
+      let taskId = data.taskId;
+      if (!taskId) {
+        const response = await apiService.uploadFile(data.file, undefined, undefined, data.dialect);
+        taskId = response.task_id;
+        onDataChange({ taskId });
       }
 
+      const preview = await apiService.getFilePreview(taskId, PREVIEW_ROWS, data.dialect);
+      const columns = preview.columns.map((column) => column.name);
+
       setAvailableColumns(columns);
-      setPreviewData(preview);
+      setColumnInfo(Object.fromEntries(preview.columns.map((column) => [column.name, column])));
+      setFileLimits({ warning: preview.output_files_warning, max: preview.max_output_files });
+      setTotalRows(preview.total_rows);
+      setPreviewData(
+        preview.rows.map((row) => Object.fromEntries(columns.map((column, i) => [column, row[i]])))
+      );
+      if (data.columnName && !columns.includes(data.columnName)) {
+        onDataChange({ columnName: '' });
+      }
     } catch (err) {
-      setError('檔案分析失敗，請檢查檔案格式是否正確');
+      setError(`檔案分析失敗：${handleApiError(err)}`);
     } finally {
       setIsLoading(false);
     }
@@ -104,6 +112,34 @@ export const ColumnSelectionStep: React.FC<ColumnSelectionStepProps> = ({
     onDataChange({ batchSize });
   };
 
+  const handleDelimiterChange = (event: SelectChangeEvent<string>) => {
+    const delimiter = event.target.value || undefined;
+    onDataChange({ dialect: { ...data.dialect, delimiter } });
+  };
+
+  const handleHeaderChange = (event: SelectChangeEvent<string>) => {
+    const value = event.target.value;
+    const hasHeader = value === '' ? undefined : value === 'true';
+    onDataChange({ dialect: { ...data.dialect, hasHeader } });
+  };
+
+  const isDelimitedFile = /\.(csv|txt)$/i.test(data.file?.name || '');
+
+  // 依不重複值估計預估輸出檔案數（與後端的估計方式相同）
+  const getEstimatedFiles = (columnName: string): number | undefined => {
+    const info = columnInfo[columnName];
+    if (info?.distinct_estimate === undefined) return undefined;
+    // 空值另外歸入「空值」群組
+    const groups = info.distinct_estimate + (info.null_count ? 1 : 0);
+    if (data.batchSize && totalRows !== undefined) {
+      return Math.max(groups, Math.ceil(totalRows / data.batchSize));
+    }
+    return groups;
+  };
+
+  const estimatedFiles = data.columnName ? getEstimatedFiles(data.columnName) : undefined;
+  const exceedsFileLimit = estimatedFiles !== undefined && estimatedFiles > fileLimits.max;
+
   const handleNext = () => {
     if (!data.columnName) {
       setError('請選擇要切分的欄位');
@@ -177,6 +213,13 @@ export const ColumnSelectionStep: React.FC<ColumnSelectionStepProps> = ({
                 {availableColumns.map((column) => (
                   <MenuItem key={column} value={column}>
                     {column}
+                    {columnInfo[column] && (
+                      <Typography component="span" variant="caption" color="textSecondary" sx={{ ml: 1 }}>
+                        ({COLUMN_TYPE_LABELS[columnInfo[column].type]}
+                        {columnInfo[column].distinct_estimate !== undefined &&
+                          `，約 ${columnInfo[column].distinct_estimate!.toLocaleString()} 個不同的值`})
+                      </Typography>
+                    )}
                   </MenuItem>
                 ))}
               </Select>
@@ -200,7 +243,15 @@ export const ColumnSelectionStep: React.FC<ColumnSelectionStepProps> = ({
                 </Box>
                 <Typography variant="caption" color="textSecondary" sx={{ mt: 1, display: 'block' }}>
                   每個不同的值會生成一個獨立的檔案
+                  {estimatedFiles !== undefined && `，預計產生約 ${estimatedFiles.toLocaleString()} 個檔案`}
                 </Typography>
+                {estimatedFiles !== undefined && estimatedFiles > fileLimits.warning && (
+                  <Alert severity={exceedsFileLimit ? 'error' : 'warning'} sx={{ mt: 2 }}>
+                    {exceedsFileLimit
+                      ? `預計檔案數超過上限 ${fileLimits.max.toLocaleString()} 個，請選擇其他欄位或加大批次大小`
+                      : '預計產生大量檔案，處理與下載可能需要較長時間'}
+                  </Alert>
+                )}
               </Box>
             )}
           </Paper>
@@ -235,6 +286,39 @@ export const ColumnSelectionStep: React.FC<ColumnSelectionStepProps> = ({
               />
             )}
 
+            {isDelimitedFile && (
+              <Box sx={{ display: 'flex', gap: 2, mb: 2 }}>
+                <FormControl fullWidth>
+                  <InputLabel id="delimiter-select-label">分隔符</InputLabel>
+                  <Select
+                    labelId="delimiter-select-label"
+                    value={data.dialect?.delimiter || ''}
+                    onChange={handleDelimiterChange}
+                    label="分隔符"
+                  >
+                    <MenuItem value="">自動偵測</MenuItem>
+                    <MenuItem value="tab">Tab</MenuItem>
+                    <MenuItem value="comma">逗號 (,)</MenuItem>
+                    <MenuItem value="semicolon">分號 (;)</MenuItem>
+                    <MenuItem value="pipe">直線 (|)</MenuItem>
+                  </Select>
+                </FormControl>
+                <FormControl fullWidth>
+                  <InputLabel id="header-select-label">標題列</InputLabel>
+                  <Select
+                    labelId="header-select-label"
+                    value={data.dialect?.hasHeader === undefined ? '' : String(data.dialect.hasHeader)}
+                    onChange={handleHeaderChange}
+                    label="標題列"
+                  >
+                    <MenuItem value="">自動偵測</MenuItem>
+                    <MenuItem value="true">第一列為標題</MenuItem>
+                    <MenuItem value="false">沒有標題列</MenuItem>
+                  </Select>
+                </FormControl>
+              </Box>
+            )}
+
             <Alert severity="info" sx={{ mt: 2 }}>
               <Typography variant="body2">
                 💡 系統會根據您選擇的欄位值自動分組，每個不同的值會生成一個獨立檔案。
@@ -250,7 +334,7 @@ export const ColumnSelectionStep: React.FC<ColumnSelectionStepProps> = ({
             <Paper sx={{ mb: 3 }}>
               <Box sx={{ p: 2, borderBottom: '1px solid #e0e0e0' }}>
                 <Typography variant="subtitle1" sx={{ fontWeight: 'bold' }}>
-                  資料預覽 (前 3 行)
+                  資料預覽 (前 {previewData.length} 行)
                 </Typography>
               </Box>
               <TableContainer sx={{ maxHeight: 300 }}>
@@ -288,7 +372,7 @@ export const ColumnSelectionStep: React.FC<ColumnSelectionStepProps> = ({
                               bgcolor: column === data.columnName ? 'rgba(25, 118, 210, 0.05)' : 'inherit'
                             }}
                           >
-                            {String(row[column] || '')}
+                            {row[column] === null || row[column] === undefined ? '' : String(row[column])}
                           </TableCell>
                         ))}
                       </TableRow>
@@ -320,7 +404,7 @@ export const ColumnSelectionStep: React.FC<ColumnSelectionStepProps> = ({
               variant="contained"
               endIcon={<ArrowForward />}
               onClick={handleNext}
-              disabled={!data.columnName}
+              disabled={!data.columnName || exceedsFileLimit}
               size="large"
             >
               開始處理
@@ -54,15 +54,25 @@ export const FileUploadStep: React.FC<FileUploadStepProps> = ({
   const fileInputRef = useRef<HTMLInputElement>(null);
 
   const supportedExtensions = ['.csv', '.xlsx', '.xls', '.txt'];
+  // 壓縮檔內容須為 CSV/TXT（ZIP 只能包含一個檔案，由伺服器檢查）
+  const compressedExtensions = ['.gz', '.bz2', '.zst', '.zip'];
   const maxSizeLimit = usageLimits?.file_limits.max_size_mb || 10;
 
   const handleFileSelect = (file: File) => {
     setError(null);
 
     // 檢查檔案類型
-    const fileExtension = '.' + file.name.split('.').pop()?.toLowerCase();
-    if (!supportedExtensions.includes(fileExtension)) {
-      setError(`Unsupported file format. Supported formats: ${supportedExtensions.join(', ')}`);
+    const parts = file.name.toLowerCase().split('.');
+    const fileExtension = '.' + parts[parts.length - 1];
+    const innerExtension = parts.length > 2 ? '.' + parts[parts.length - 2] : '';
+    const supported = compressedExtensions.includes(fileExtension)
+      ? fileExtension === '.zip' || ['.csv', '.txt'].includes(innerExtension)
+      : supportedExtensions.includes(fileExtension);
+    if (!supported) {
+      setError(
+        `Unsupported file format. Supported formats: ${supportedExtensions.join(', ')}, ` +
+        'or compressed CSV/TXT (.csv.gz, .csv.bz2, .csv.zst, .zip)'
+      );
       return;
     }
 
@@ -73,7 +83,8 @@ export const FileUploadStep: React.FC<FileUploadStepProps> = ({
       return;
     }
 
-    onDataChange({ file });
+    // 新檔案需要重新上傳與選擇欄位
+    onDataChange({ file, taskId: undefined, columnName: '' });
   };
 
   const handleDrop = (e: React.DragEvent) => {
@@ -155,7 +166,7 @@ export const FileUploadStep: React.FC<FileUploadStepProps> = ({
           Drag and drop files here, or click to select files
         </Typography>
         <Typography variant="body2" color="textSecondary" sx={{ mb: 2 }}>
-          Supported Formats: CSV, Excel (.xlsx, .xls), TXT
+          Supported Formats: CSV, Excel (.xlsx, .xls), TXT, compressed CSV/TXT
         </Typography>
         <Typography variant="body2" color="textSecondary">
           Maximum file size: {maxSizeLimit}MB
@@ -172,7 +183,7 @@ export const FileUploadStep: React.FC<FileUploadStepProps> = ({
           <VisuallyHiddenInput
             ref={fileInputRef}
             type="file"
-            accept=".csv,.xlsx,.xls,.txt"
+            accept=".csv,.xlsx,.xls,.txt,.gz,.bz2,.zst,.zip"
             onChange={handleFileInputChange}
           />
         </Button>
@@ -236,6 +247,15 @@ export const FileUploadStep: React.FC<FileUploadStepProps> = ({
               secondary="Plain text files, support multiple split formats"
             />
           </ListItem>
+          <ListItem>
+            <ListItemIcon>
+              <Info fontSize="small" />
+            </ListItemIcon>
+            <ListItemText
+              primary="Compressed CSV/TXT (.gz, .bz2, .zst, .zip)"
+              secondary="Decompressed while processing; size limits apply to the compressed file"
+            />
+          </ListItem>
         </List>
       </Box>
 
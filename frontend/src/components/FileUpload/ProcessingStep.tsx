@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import {
   Box,
   Paper,
@@ -25,7 +25,7 @@ import {
   Schedule,
   Speed,
 } from '@mui/icons-material';
-import { StepProps, FileUploadData, TaskStatus } from '../../types';
+import { StepProps, FileUploadData, TaskStatus, TaskProgressEvent } from '../../types';
 import { apiService, handleApiError } from '../../services/api';
 
 interface ProcessingStepProps extends StepProps {
@@ -40,11 +40,15 @@ export const ProcessingStep: React.FC<ProcessingStepProps> = ({
   const [taskStatus, setTaskStatus] = useState<TaskStatus | null>(null);
   const [error, setError] = useState<string | null>(null);
   const [isPolling, setIsPolling] = useState(false);
+  const [isDownloading, setIsDownloading] = useState(false);
+  const [progress, setProgress] = useState<TaskProgressEvent | null>(null);
+  const streamController = useRef<AbortController | null>(null);
 
   useEffect(() => {
     if (data.file && data.columnName) {
       startProcessing();
     }
+    return () => streamController.current?.abort();
   }, [data.file, data.columnName]);
 
   const startProcessing = async () => {
@@ -53,17 +57,15 @@ export const ProcessingStep: React.FC<ProcessingStepProps> = ({
     try {
       setError(null);
       
-      // 上傳檔案並開始處理
-      const response = await apiService.uploadFile(
-        data.file,
-        data.columnName,
-        data.batchSize
-      );
+      // 檔案已在選擇欄位時上傳，直接開始切分；否則上傳檔案並開始處理
+      const response = data.taskId
+        ? await apiService.startSplit(data.taskId, data.columnName, data.batchSize, data.dialect)
+        : await apiService.uploadFile(data.file, data.columnName, data.batchSize, data.dialect);
 
-      // 開始輪詢任務狀態
+      // 開始追蹤任務進度
       if (response.task_id) {
         setIsPolling(true);
-        pollTaskStatus(response.task_id);
+        watchTask(response.task_id);
       }
     } catch (err) {
       const errorMessage = handleApiError(err);
@@ -71,6 +73,34 @@ export const ProcessingStep: React.FC<ProcessingStepProps> = ({
     }
   };
 
+  // 以進度事件追蹤任務，完成後再取得完整結果；事件串流無法使用時改為輪詢
+  const watchTask = async (taskId: string) => {
+    streamController.current?.abort();
+    const controller = new AbortController();
+    streamController.current = controller;
+    setProgress(null);
+
+    try {
+      setTaskStatus(await apiService.getTaskStatus(taskId));
+      await apiService.streamTaskEvents(
+        taskId,
+        event => {
+          setProgress(event);
+          if (event.status === 'pending' || event.status === 'processing') {
+            setTaskStatus(prev => (prev ? { ...prev, status: event.status as TaskStatus['status'] } : prev));
+          }
+        },
+        controller.signal
+      );
+    } catch {
+      // 串流中斷或無法連線，由輪詢接手
+    }
+    // 任務結束（或改為輪詢）時取得完整狀態與結果
+    if (!controller.signal.aborted) {
+      pollTaskStatus(taskId);
+    }
+  };
+
   const pollTaskStatus = async (taskId: string) => {
     try {
       const status = await apiService.getTaskStatus(taskId);
@@ -89,11 +119,14 @@ export const ProcessingStep: React.FC<ProcessingStepProps> = ({
     }
   };
 
+  // 處理中即開始下載時以串流模式取得 ZIP，下載與處理同時進行
   const handleDownload = async () => {
     if (!taskStatus?.task_id) return;
 
+    const stream = taskStatus.status === 'pending' || taskStatus.status === 'processing';
     try {
-      const blob = await apiService.downloadResult(taskStatus.task_id);
+      setIsDownloading(true);
+      const blob = await apiService.downloadResult(taskStatus.task_id, stream);
       const url = window.URL.createObjectURL(blob);
       const a = document.createElement('a');
       a.href = url;
@@ -105,6 +138,8 @@ export const ProcessingStep: React.FC<ProcessingStepProps> = ({
     } catch (err) {
       const errorMessage = handleApiError(err);
       setError(errorMessage);
+    } finally {
+      setIsDownloading(false);
     }
   };
 
@@ -138,6 +173,21 @@ export const ProcessingStep: React.FC<ProcessingStepProps> = ({
     }
   };
 
+  const getStageText = (stage?: string) => {
+    switch (stage) {
+      case 'scanning':
+        return '掃描欄位型別';
+      case 'reading':
+        return '讀取與分組';
+      case 'splitting':
+        return '分組';
+      case 'writing':
+        return '寫出檔案';
+      default:
+        return '正在處理檔案';
+    }
+  };
+
   const getStatusIcon = (status: string) => {
     switch (status) {
       case 'pending':
@@ -199,7 +249,10 @@ export const ProcessingStep: React.FC<ProcessingStepProps> = ({
                   切分欄位
                 </Typography>
                 <Typography variant="body1" sx={{ fontWeight: 'bold' }}>
-                  {taskStatus.column_name}
+                  {([] as (string | string[])[])
+                    .concat(taskStatus.column_name || [])
+                    .map(column => (Array.isArray(column) ? column.join(' → ') : column))
+                    .join('、')}
                 </Typography>
               </Grid>
               {taskStatus.batch_size && (
@@ -218,10 +271,37 @@ export const ProcessingStep: React.FC<ProcessingStepProps> = ({
           {/* 進度條 */}
           {isPolling && taskStatus?.status === 'processing' && (
             <Box sx={{ mt: 3 }}>
-              <Typography variant="body2" gutterBottom>
-                正在處理檔案...
-              </Typography>
-              <LinearProgress />
+              {progress?.status === 'processing' ? (
+                <>
+                  <Box sx={{ display: 'flex', justifyContent: 'space-between' }}>
+                    <Typography variant="body2" gutterBottom>
+                      {getStageText(progress.stage)}...
+                      {progress.rows_processed ? ` 已處理 ${progress.rows_processed.toLocaleString()} 行` : ''}
+                    </Typography>
+                    <Typography variant="body2" color="textSecondary">
+                      {progress.progress}%
+                    </Typography>
+                  </Box>
+                  <LinearProgress variant="determinate" value={progress.progress} />
+                </>
+              ) : (
+                <>
+                  <Typography variant="body2" gutterBottom>
+                    正在處理檔案...
+                  </Typography>
+                  <LinearProgress />
+                </>
+              )}
+              <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+                <Button
+                  variant="outlined"
+                  startIcon={<Download />}
+                  onClick={handleDownload}
+                  disabled={isDownloading}
+                >
+                  {isDownloading ? '下載中...' : '立即開始下載 (ZIP)'}
+                </Button>
+              </Box>
             </Box>
           )}
         </CardContent>
@@ -306,6 +386,7 @@ export const ProcessingStep: React.FC<ProcessingStepProps> = ({
                 size="large"
                 startIcon={<Download />}
                 onClick={handleDownload}
+                disabled={isDownloading}
                 color="success"
               >
                 下載處理結果 (ZIP)
@@ -8,7 +8,12 @@ import {
   ResetPasswordRequest,
   ResetPasswordResponse,
   FileUploadResponse,
+  UploadSession,
+  UploadSessionStatus,
+  FilePreview,
+  DialectOptions,
   TaskStatus,
+  TaskProgressEvent,
   UsageLimits,
   SubscriptionInfo,
   PricingPlan,
@@ -16,6 +21,18 @@ import {
 } from '../types';
 import { API_BASE_URL } from '../config/api';
 
+// 分塊上傳：同時上傳的區塊數、每個區塊請求的逾時與最多嘗試次數
+const UPLOAD_CONCURRENCY = 4;
+const CHUNK_TIMEOUT_MS = 120000;
+const CHUNK_MAX_ATTEMPTS = 5;
+
+// 區塊的 SHA-256（十六進位）；非安全來源（http）無法使用 Web Crypto 時回傳 null，伺服器只檢查大小
+async function sha256Hex(data: ArrayBuffer): Promise<string | null> {
+  if (!window.crypto?.subtle) return null;
+  const digest = await window.crypto.subtle.digest('SHA-256', data);
+  return Array.from(new Uint8Array(digest), byte => byte.toString(16).padStart(2, '0')).join('');
+}
+
 class ApiService {
   private api: AxiosInstance;
 
@@ -88,36 +105,211 @@ class ApiService {
   }
 
   // 檔案處理相關 API
+  // 以可續傳的分塊上傳送出檔案：各區塊並行上傳並附上 SHA-256，失敗的區塊個別重試；
+  // 同一檔案再次上傳時（例如重新整理頁面後）只補傳伺服器尚未收到的區塊
   async uploadFile(
     file: File,
-    columnName: string,
-    batchSize?: number
+    columnName?: string | string[],
+    batchSize?: number,
+    dialect?: DialectOptions,
+    nested?: boolean,
+    onProgress?: (uploadedBytes: number, totalBytes: number) => void
   ): Promise<FileUploadResponse> {
+    const session = await this.resumeOrCreateUploadSession(file);
+    await this.uploadChunks(file, session, onProgress);
+
     const formData = new FormData();
-    formData.append('file', file);
-    if (columnName) formData.append('column_name', columnName);
+    // 多個切分欄位以重複的 column_name 欄位傳送；nested 時依序組成組合鍵多層切分
+    ([] as string[]).concat(columnName || []).forEach(column => formData.append('column_name', column));
+    if (nested) formData.append('nested', 'true');
     if (batchSize) formData.append('batch_size', batchSize.toString());
+    if (dialect?.delimiter) formData.append('delimiter', dialect.delimiter);
+    if (dialect?.quotechar) formData.append('quotechar', dialect.quotechar);
+    if (dialect?.hasHeader !== undefined) formData.append('has_header', String(dialect.hasHeader));
 
     const response: AxiosResponse<FileUploadResponse> = await this.api.post(
-      '/files/upload',
+      `/files/uploads/${session.upload_id}/commit`,
       formData,
       {
         headers: {
           'Content-Type': 'multipart/form-data',
         },
+        // 提交時伺服器會計算整個檔案的雜湊並解析開頭，大型檔案需要較長時間
+        timeout: 120000,
+      }
+    );
+    localStorage.removeItem(this.uploadSessionStorageKey(file));
+    return response.data;
+  }
+
+  private uploadSessionStorageKey(file: File): string {
+    return `upload_session:${file.name}:${file.size}:${file.lastModified}`;
+  }
+
+  private async resumeOrCreateUploadSession(file: File): Promise<UploadSessionStatus> {
+    const storageKey = this.uploadSessionStorageKey(file);
+    const savedUploadId = localStorage.getItem(storageKey);
+    if (savedUploadId) {
+      try {
+        const response: AxiosResponse<UploadSessionStatus> = await this.api.get(`/files/uploads/${savedUploadId}`);
+        return response.data;
+      } catch {
+        // 工作階段已過期，重新建立
+        localStorage.removeItem(storageKey);
+      }
+    }
+
+    const formData = new FormData();
+    formData.append('filename', file.name);
+    formData.append('size', file.size.toString());
+    const response: AxiosResponse<UploadSession> = await this.api.post('/files/uploads', formData, {
+      headers: {
+        'Content-Type': 'multipart/form-data',
+      },
+    });
+    localStorage.setItem(storageKey, response.data.upload_id);
+    return {
+      ...response.data,
+      received_chunks: [],
+      missing_chunks: Array.from({ length: response.data.total_chunks }, (_, index) => index),
+      received_bytes: 0,
+    };
+  }
+
+  private async uploadChunks(
+    file: File,
+    session: UploadSessionStatus,
+    onProgress?: (uploadedBytes: number, totalBytes: number) => void
+  ): Promise<void> {
+    const pending = [...session.missing_chunks];
+    let uploadedBytes = session.received_bytes;
+    onProgress?.(uploadedBytes, file.size);
+
+    const worker = async () => {
+      for (let index = pending.shift(); index !== undefined; index = pending.shift()) {
+        const chunk = file.slice(index * session.chunk_size, (index + 1) * session.chunk_size);
+        await this.uploadChunk(session.upload_id, index, chunk);
+        uploadedBytes += chunk.size;
+        onProgress?.(uploadedBytes, file.size);
+      }
+    };
+    await Promise.all(Array.from({ length: UPLOAD_CONCURRENCY }, worker));
+  }
+
+  private async uploadChunk(uploadId: string, index: number, chunk: Blob): Promise<void> {
+    const body = await chunk.arrayBuffer();
+    const checksum = await sha256Hex(body);
+    for (let attempt = 1; ; attempt++) {
+      try {
+        await this.api.put(`/files/uploads/${uploadId}/chunks/${index}`, body, {
+          headers: {
+            'Content-Type': 'application/octet-stream',
+            ...(checksum ? { 'X-Chunk-SHA256': checksum } : {}),
+          },
+          timeout: CHUNK_TIMEOUT_MS,
+        });
+        return;
+      } catch (err: any) {
+        // 4xx（除了逾時與限流）不會因重試而成功
+        const status = err?.response?.status;
+        const retryable = !status || status >= 500 || status === 408 || status === 429;
+        if (!retryable || attempt >= CHUNK_MAX_ATTEMPTS) throw err;
+        await new Promise(resolve => setTimeout(resolve, 1000 * 2 ** (attempt - 1)));
+      }
+    }
+  }
+
+  async getFilePreview(taskId: string, rows?: number, dialect?: DialectOptions): Promise<FilePreview> {
+    const response: AxiosResponse<FilePreview> = await this.api.get(`/files/preview/${taskId}`, {
+      params: { rows, ...this.dialectParams(dialect) },
+    });
+    return response.data;
+  }
+
+  async startSplit(
+    taskId: string,
+    columnName: string | string[],
+    batchSize?: number,
+    dialect?: DialectOptions,
+    nested?: boolean
+  ): Promise<FileUploadResponse> {
+    const response: AxiosResponse<FileUploadResponse> = await this.api.post(
+      `/files/split/${taskId}`,
+      null,
+      {
+        params: {
+          column_name: columnName,
+          nested: nested || undefined,
+          batch_size: batchSize,
+          ...this.dialectParams(dialect),
+        },
+        // 陣列參數以 column_name=a&column_name=b 傳送
+        paramsSerializer: { indexes: null },
       }
     );
     return response.data;
   }
 
+  private dialectParams(dialect?: DialectOptions) {
+    return {
+      delimiter: dialect?.delimiter,
+      quotechar: dialect?.quotechar,
+      has_header: dialect?.hasHeader,
+    };
+  }
+
   async getTaskStatus(taskId: string): Promise<TaskStatus> {
     const response: AxiosResponse<TaskStatus> = await this.api.get(`/files/status/${taskId}`);
     return response.data;
   }
 
-  async downloadResult(taskId: string): Promise<Blob> {
+  // 以 Server-Sent Events 接收任務進度，任務完成或失敗時結束；無法連線時拋出錯誤（呼叫端改用輪詢）
+  // EventSource 無法帶 Authorization 標頭，改以 fetch 讀取串流
+  async streamTaskEvents(
+    taskId: string,
+    onEvent: (event: TaskProgressEvent) => void,
+    signal?: AbortSignal
+  ): Promise<void> {
+    const token = localStorage.getItem('access_token');
+    const response = await fetch(`${API_BASE_URL}/files/status/${taskId}/events`, {
+      headers: {
+        Accept: 'text/event-stream',
+        ...(token ? { Authorization: `Bearer ${token}` } : {}),
+      },
+      signal,
+    });
+    if (!response.ok || !response.body) {
+      throw new Error(`Progress stream unavailable (${response.status})`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) return;
+      buffer += decoder.decode(value, { stream: true });
+      // 事件以空行分隔；心跳為 : 開頭的註解行
+      let boundary = buffer.indexOf('\n\n');
+      while (boundary >= 0) {
+        const data = buffer
+          .slice(0, boundary)
+          .split('\n')
+          .filter(line => line.startsWith('data: '))
+          .map(line => line.slice(6))
+          .join('\n');
+        buffer = buffer.slice(boundary + 2);
+        if (data) onEvent(JSON.parse(data));
+        boundary = buffer.indexOf('\n\n');
+      }
+    }
+  }
+
+  async downloadResult(taskId: string, stream = false): Promise<Blob> {
+    // 串流下載會持續到處理完成，不套用一般請求的逾時
     const response = await this.api.get(`/files/download/${taskId}`, {
       responseType: 'blob',
+      ...(stream ? { params: { stream: true }, timeout: 0 } : {}),
     });
     return response.data;
   }
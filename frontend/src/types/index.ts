@@ -45,14 +45,32 @@ export interface FileUploadResponse {
   task_id: string;
   status: string;
   message: string;
+  estimated_files?: number;
+  warning?: string;
+  cached?: boolean; // 使用結果快取直接完成
+}
+
+// 可續傳的分塊上傳工作階段
+export interface UploadSession {
+  upload_id: string; // 提交後即為任務 ID
+  chunk_size: number;
+  total_chunks: number;
+}
+
+export interface UploadSessionStatus extends UploadSession {
+  received_chunks: number[];
+  missing_chunks: number[];
+  received_bytes: number;
+  offset?: number; // 從檔案開頭連續收到的位元組數
+  complete?: boolean;
 }
 
 export interface TaskStatus {
   task_id: string;
-  status: 'pending' | 'processing' | 'completed' | 'failed';
+  status: 'uploaded' | 'pending' | 'processing' | 'completed' | 'failed';
   filename: string;
   file_size_mb: number;
-  column_name?: string;
+  column_name?: string | (string | string[])[]; // 多欄位切分時為列表，組合鍵為子列表
   batch_size?: number;
   created_at: string;
   updated_at: string;
@@ -60,10 +78,56 @@ export interface TaskStatus {
   total_rows?: number;
   split_groups?: number;
   output_files?: number;
+  split_columns?: (string | string[])[];
+  encoding?: string;
+  encoding_confidence?: number;
+  cached?: boolean; // 結果取自相同檔案與設定的先前任務
+  progress?: number; // 處理進度百分比
+  stage?: ProgressStage;
   file_details?: FileDetail[];
 }
 
+// 處理階段：scanning 統一欄位型別（大型檔案）、reading 讀取與分組、splitting 排序分組、writing 寫出 ZIP
+export type ProgressStage = 'scanning' | 'reading' | 'splitting' | 'writing';
+
+// 任務進度事件（/files/status/{task_id}/events 的 Server-Sent Events）
+export interface TaskProgressEvent {
+  task_id: string;
+  status: TaskStatus['status'] | 'error';
+  progress: number;
+  stage?: ProgressStage;
+  rows_processed?: number;
+  bytes_processed?: number;
+  bytes_total?: number | null;
+  groups_written?: number;
+  groups_total?: number | null;
+  error_message?: string | null;
+  updated_at?: string;
+}
+
+// 檔案預覽：標題列與前幾行資料
+export interface PreviewColumn {
+  name: string;
+  type: 'integer' | 'float' | 'boolean' | 'datetime' | 'string' | 'mixed' | 'empty';
+  distinct_estimate?: number; // 上傳時以 HyperLogLog 估計的不重複值數量
+  null_count?: number;
+}
+
+export interface FilePreview {
+  task_id: string;
+  filename: string;
+  columns: PreviewColumn[];
+  rows: any[][];
+  row_count: number;
+  total_rows?: number;
+  output_files_warning: number;
+  max_output_files: number;
+  encoding?: string;
+  encoding_confidence?: number;
+}
+
 export interface FileDetail {
+  split_column?: string | string[];
   group_value: string;
   row_count: number;
   filename: string;
@@ -120,8 +184,17 @@ export interface StepProps {
 
 export interface FileUploadData {
   file: File | null;
+  taskId?: string; // 已上傳、等待選擇欄位的任務
   columnName: string;
   batchSize?: number;
+  dialect?: DialectOptions;
+}
+
+// CSV/TXT 格式設定，未指定的項目由後端自動偵測
+export interface DialectOptions {
+  delimiter?: string;
+  quotechar?: string;
+  hasHeader?: boolean;
 }
 
 export interface ApiError {